@@ -0,0 +1,28 @@
+"""Add composite (job_id, id) index on leads
+
+Revision ID: 3f9a1c2b7d4e
+Revises: d14809cd09b9
+Create Date: 2026-10-18 10:12:31.204117
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '3f9a1c2b7d4e'
+down_revision: Union[str, Sequence[str], None] = 'd14809cd09b9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_leads_job_id_id', 'leads', ['job_id', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_leads_job_id_id', table_name='leads')
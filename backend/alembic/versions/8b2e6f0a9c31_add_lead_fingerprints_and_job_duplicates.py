@@ -0,0 +1,35 @@
+"""Add lead_fingerprints table and jobs.duplicates_dropped
+
+Revision ID: 8b2e6f0a9c31
+Revises: 3f9a1c2b7d4e
+Create Date: 2026-10-18 14:03:52.118406
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '8b2e6f0a9c31'
+down_revision: Union[str, Sequence[str], None] = '3f9a1c2b7d4e'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('lead_fingerprints',
+    sa.Column('user_id', sa.Integer(), nullable=False),
+    sa.Column('fingerprint', sa.String(length=40), nullable=False),
+    sa.ForeignKeyConstraint(['user_id'], ['users.id'], ),
+    sa.PrimaryKeyConstraint('user_id', 'fingerprint')
+    )
+    op.add_column('jobs', sa.Column('duplicates_dropped', sa.Integer(), nullable=False, server_default='0'))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('jobs', 'duplicates_dropped')
+    op.drop_table('lead_fingerprints')
@@ -0,0 +1,55 @@
+"""Add contacts, job_leads and jobs.known_leads
+
+Revision ID: a4c6e8f2b317
+Revises: f7b2d4e9a1c6
+Create Date: 2026-10-18 19:12:08.603145
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'a4c6e8f2b317'
+down_revision: Union[str, Sequence[str], None] = 'f7b2d4e9a1c6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # The store fills up as jobs run; fingerprints are computed in Python, so there is no backfill
+    op.create_table('contacts',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('fingerprint', sa.String(length=40), nullable=False),
+    sa.Column('name', sa.String(length=255), nullable=True),
+    sa.Column('email', sa.String(length=255), nullable=True),
+    sa.Column('company', sa.String(length=255), nullable=True),
+    sa.Column('title', sa.String(length=255), nullable=True),
+    sa.Column('source_url', sa.String(length=1024), nullable=True),
+    sa.Column('confidence', sa.Float(), nullable=False),
+    sa.Column('seen_at', sa.DateTime(), nullable=False),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('fingerprint')
+    )
+    op.create_index('ix_contacts_seen_at', 'contacts', ['seen_at'], unique=False)
+    op.create_table('job_leads',
+    sa.Column('job_id', sa.Integer(), nullable=False),
+    sa.Column('contact_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['contact_id'], ['contacts.id'], ),
+    sa.ForeignKeyConstraint(['job_id'], ['jobs.id'], ),
+    sa.PrimaryKeyConstraint('job_id', 'contact_id')
+    )
+    op.create_index('ix_job_leads_contact_id', 'job_leads', ['contact_id'], unique=False)
+    op.add_column('jobs', sa.Column('known_leads', sa.Integer(), nullable=False, server_default='0'))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('jobs', 'known_leads')
+    op.drop_index('ix_job_leads_contact_id', table_name='job_leads')
+    op.drop_table('job_leads')
+    op.drop_index('ix_contacts_seen_at', table_name='contacts')
+    op.drop_table('contacts')
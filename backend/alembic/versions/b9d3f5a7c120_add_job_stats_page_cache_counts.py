@@ -0,0 +1,32 @@
+"""Add page cache counts to job_stats
+
+Revision ID: b9d3f5a7c120
+Revises: a4c6e8f2b317
+Create Date: 2026-10-18 20:04:51.118230
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b9d3f5a7c120'
+down_revision: Union[str, Sequence[str], None] = 'a4c6e8f2b317'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('job_stats', sa.Column('pages_cached', sa.Integer(), nullable=False, server_default='0'))
+    op.add_column('job_stats', sa.Column('pages_revalidated', sa.Integer(), nullable=False, server_default='0'))
+    op.add_column('job_stats', sa.Column('pages_downloaded', sa.Integer(), nullable=False, server_default='0'))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('job_stats', 'pages_downloaded')
+    op.drop_column('job_stats', 'pages_revalidated')
+    op.drop_column('job_stats', 'pages_cached')
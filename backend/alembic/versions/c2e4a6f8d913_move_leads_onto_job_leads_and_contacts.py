@@ -0,0 +1,335 @@
+"""Move leads onto job_leads and contacts, drop leads
+
+Revision ID: c2e4a6f8d913
+Revises: b9d3f5a7c120
+Create Date: 2026-10-18 21:26:40.512307
+
+"""
+import hashlib
+import re
+import unicodedata
+from typing import Any, List, Mapping, Optional, Sequence, Union
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c2e4a6f8d913'
+down_revision: Union[str, Sequence[str], None] = 'b9d3f5a7c120'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BACKFILL_CHUNK = 5000
+PERSON_COLUMNS = ('name', 'email', 'email_domain', 'company', 'title', 'source_url')
+
+SEARCH_VECTOR = (
+    "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(company, '')), 'B') || "
+    "setweight(to_tsvector('simple', coalesce(name, '')), 'C')"
+)
+
+leads = sa.table(
+    'leads',
+    sa.column('id', sa.Integer), sa.column('job_id', sa.Integer),
+    *[sa.column(column, sa.String) for column in PERSON_COLUMNS],
+    sa.column('confidence', sa.Float), sa.column('created_at', sa.DateTime),
+)
+contacts = sa.table(
+    'contacts',
+    sa.column('id', sa.Integer), sa.column('fingerprint', sa.String),
+    *[sa.column(column, sa.String) for column in PERSON_COLUMNS],
+    sa.column('confidence', sa.Float), sa.column('seen_at', sa.DateTime),
+)
+job_leads = sa.table(
+    'job_leads',
+    sa.column('id', sa.Integer), sa.column('job_id', sa.Integer), sa.column('contact_id', sa.Integer),
+    sa.column('confidence', sa.Float), sa.column('created_at', sa.DateTime),
+)
+
+
+# Contact fingerprints as app.services.contacts computes them at this revision
+_WHITESPACE = re.compile(r"\s+")
+_TRACKING_PARAMS = ("utm_", "fbclid", "gclid", "trk", "ref")
+
+
+def _normalize_words(value: str) -> str:
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFKC", value)).strip().casefold()
+
+
+def _normalize_url(url: Optional[str]) -> Optional[str]:
+    url = (url or "").strip()
+    if not url:
+        return None
+    parts = urlsplit(url)
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith(_TRACKING_PARAMS)
+    )
+    host = parts.netloc.lower()
+    if host.startswith("www."):
+        host = host[4:]
+    return urlunsplit((parts.scheme.lower() or "https", host, parts.path.rstrip("/"), urlencode(query), ""))
+
+
+def _contact_fingerprint(lead: Mapping[str, Any]) -> str:
+    email = (lead['email'] or "").strip().lower()
+    parts = [lead['name'] or "", lead['company'] or "", lead['source_url'] or ""]
+    if "@" in email:
+        key = f"email:{email}"
+    elif any(part.strip() for part in parts):
+        key = f"person:{_normalize_words(parts[0])}|{_normalize_words(parts[1])}|{_normalize_url(parts[2]) or ''}"
+    else:
+        key = "lead:" + "|".join(str(lead[field] or "") for field in ("name", "email", "company", "title", "source_url"))
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+
+def _create_search(table: str) -> None:
+    if op.get_bind().dialect.name == 'postgresql':
+        # The generated column is computed for existing rows as the table is rewritten
+        op.execute(f"ALTER TABLE {table} ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ({SEARCH_VECTOR}) STORED")
+        op.execute(f"CREATE INDEX ix_{table}_search_vector ON {table} USING gin (search_vector)")
+        return
+
+    op.execute(
+        f"CREATE VIRTUAL TABLE {table}_fts USING fts5("
+        f"name, company, title, content='{table}', content_rowid='id', tokenize='porter unicode61')"
+    )
+    op.execute(
+        f"CREATE TRIGGER {table}_fts_insert AFTER INSERT ON {table} BEGIN "
+        f"INSERT INTO {table}_fts (rowid, name, company, title) VALUES (new.id, new.name, new.company, new.title); END"
+    )
+    op.execute(
+        f"CREATE TRIGGER {table}_fts_delete AFTER DELETE ON {table} BEGIN "
+        f"INSERT INTO {table}_fts ({table}_fts, rowid, name, company, title) "
+        f"VALUES ('delete', old.id, old.name, old.company, old.title); END"
+    )
+    op.execute(
+        f"CREATE TRIGGER {table}_fts_update AFTER UPDATE OF name, company, title ON {table} BEGIN "
+        f"INSERT INTO {table}_fts ({table}_fts, rowid, name, company, title) "
+        f"VALUES ('delete', old.id, old.name, old.company, old.title); "
+        f"INSERT INTO {table}_fts (rowid, name, company, title) VALUES (new.id, new.name, new.company, new.title); END"
+    )
+    op.execute(f"INSERT INTO {table}_fts ({table}_fts) VALUES ('rebuild')")
+
+
+def _drop_search(table: str) -> None:
+    if op.get_bind().dialect.name == 'postgresql':
+        op.drop_index(f'ix_{table}_search_vector', table_name=table)
+        op.drop_column(table, 'search_vector')
+        return
+
+    for trigger in ('fts_update', 'fts_delete', 'fts_insert'):
+        op.execute(f"DROP TRIGGER {table}_{trigger}")
+    op.execute(f"DROP TABLE {table}_fts")
+
+
+def _reset_sequence(table: str) -> None:
+    # Rows were copied with their ids, so the serial must continue after them
+    if op.get_bind().dialect.name == 'postgresql':
+        op.execute(
+            f"SELECT setval(pg_get_serial_sequence('{table}', 'id'), coalesce(max(id), 0) + 1, false) FROM {table}"
+        )
+
+
+def _repeated_leads() -> List[int]:
+    """Ids of leads whose job already has an earlier lead for the same contact."""
+    bind = op.get_bind()
+    repeated = []
+    for job_id in bind.execute(sa.select(leads.c.job_id).distinct()).scalars().all():
+        seen = set()
+        last_id = 0
+        while True:
+            rows = bind.execute(
+                sa.select(leads).where(leads.c.job_id == job_id, leads.c.id > last_id)
+                .order_by(leads.c.id).limit(BACKFILL_CHUNK)
+            ).mappings().all()
+            if not rows:
+                break
+            last_id = rows[-1]['id']
+            for row in rows:
+                fingerprint = _contact_fingerprint(row)
+                if fingerprint in seen:
+                    repeated.append(row['id'])
+                seen.add(fingerprint)
+    return repeated
+
+
+def _backfill_job_leads() -> None:
+    """Point every lead at its contact (creating missing ones), keeping the lead's id."""
+    bind = op.get_bind()
+    last_id = 0
+    while True:
+        rows = bind.execute(
+            sa.select(leads).where(leads.c.id > last_id).order_by(leads.c.id).limit(BACKFILL_CHUNK)
+        ).mappings().all()
+        if not rows:
+            return
+        last_id = rows[-1]['id']
+
+        fingerprints = {row['id']: _contact_fingerprint(row) for row in rows}
+        known = dict(bind.execute(
+            sa.select(contacts.c.fingerprint, contacts.c.id)
+            .where(contacts.c.fingerprint.in_(set(fingerprints.values())))
+        ).all())
+        missing = {}
+        for row in rows:
+            fingerprint = fingerprints[row['id']]
+            if fingerprint not in known:
+                missing.setdefault(fingerprint, {
+                    'fingerprint': fingerprint,
+                    **{column: row[column] for column in PERSON_COLUMNS},
+                    'confidence': row['confidence'],
+                    'seen_at': row['created_at'],
+                })
+        if missing:
+            bind.execute(sa.insert(contacts), list(missing.values()))
+            known.update(bind.execute(
+                sa.select(contacts.c.fingerprint, contacts.c.id).where(contacts.c.fingerprint.in_(missing))
+            ).all())
+
+        # One link per lead: `_repeated_leads` found no job listing a contact twice
+        bind.execute(sa.insert(job_leads), [
+            {
+                'id': row['id'], 'job_id': row['job_id'], 'contact_id': known[fingerprints[row['id']]],
+                'confidence': row['confidence'], 'created_at': row['created_at'],
+            }
+            for row in rows
+        ])
+
+
+def _recompute_job_stats() -> None:
+    """
+    Recount the job aggregates from the contacts now behind the leads: a lead
+    shows its contact's email and company, which may come from another job.
+    """
+    stats_job = "l.job_id = job_stats.job_id"
+    op.execute(
+        "UPDATE job_stats SET "
+        f"lead_count = (SELECT COUNT(*) FROM job_leads l WHERE {stats_job}), "
+        "with_email = (SELECT COUNT(*) FROM job_leads l JOIN contacts c ON c.id = l.contact_id "
+        f"WHERE {stats_job} AND c.email_domain IS NOT NULL), "
+        f"confidence_sum = (SELECT COALESCE(SUM(l.confidence), 0) FROM job_leads l WHERE {stats_job})"
+    )
+    op.execute(
+        "INSERT INTO job_stats (job_id, lead_count, with_email, confidence_sum, "
+        "pages_cached, pages_revalidated, pages_downloaded) "
+        "SELECT l.job_id, COUNT(*), COUNT(c.email_domain), SUM(l.confidence), 0, 0, 0 "
+        "FROM job_leads l JOIN contacts c ON c.id = l.contact_id "
+        "WHERE l.job_id NOT IN (SELECT job_id FROM job_stats) GROUP BY l.job_id"
+    )
+    op.execute("DELETE FROM job_stat_counts")
+    op.execute(
+        "INSERT INTO job_stat_counts (job_id, kind, value, count) "
+        "SELECT l.job_id, 'company', substr(trim(c.company), 1, 255), COUNT(*) "
+        "FROM job_leads l JOIN contacts c ON c.id = l.contact_id "
+        "WHERE trim(c.company) <> '' GROUP BY l.job_id, substr(trim(c.company), 1, 255)"
+    )
+    op.execute(
+        "INSERT INTO job_stat_counts (job_id, kind, value, count) "
+        "SELECT l.job_id, 'email_domain', substr(c.email_domain, 1, 255), COUNT(*) "
+        "FROM job_leads l JOIN contacts c ON c.id = l.contact_id "
+        "WHERE c.email_domain IS NOT NULL GROUP BY l.job_id, substr(c.email_domain, 1, 255)"
+    )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    repeated = _repeated_leads()
+    if repeated:
+        shown = ", ".join(str(lead_id) for lead_id in repeated[:20])
+        raise RuntimeError(
+            f"{len(repeated)} leads repeat a contact their job already lists (lead ids {shown}"
+            f"{', ...' if len(repeated) > 20 else ''}); job_leads keeps one row per job and contact, "
+            "so delete or merge these leads and run the upgrade again"
+        )
+
+    # Every contact and link is also a lead row, so both are rebuilt from the
+    # leads, with the contacts keyed by the current fingerprint
+    op.drop_index('ix_job_leads_contact_id', table_name='job_leads')
+    op.drop_table('job_leads')
+    op.execute("DELETE FROM contacts")
+    op.add_column('contacts', sa.Column('email_domain', sa.String(length=255), nullable=True))
+    op.create_table('job_leads',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('job_id', sa.Integer(), nullable=False),
+    sa.Column('contact_id', sa.Integer(), nullable=False),
+    sa.Column('confidence', sa.Float(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.ForeignKeyConstraint(['contact_id'], ['contacts.id'], ),
+    sa.ForeignKeyConstraint(['job_id'], ['jobs.id'], ),
+    sa.PrimaryKeyConstraint('id'),
+    sa.UniqueConstraint('job_id', 'contact_id', name='uq_job_leads_job_id_contact_id')
+    )
+    op.create_index('ix_job_leads_contact_id', 'job_leads', ['contact_id'], unique=False)
+    op.create_index('ix_job_leads_job_id_id', 'job_leads', ['job_id', 'id'], unique=False)
+    op.create_index('ix_job_leads_job_id_confidence_id', 'job_leads', ['job_id', 'confidence', 'id'], unique=False)
+    op.create_index('ix_job_leads_job_id_created_at_id', 'job_leads', ['job_id', 'created_at', 'id'], unique=False)
+    _backfill_job_leads()
+    _reset_sequence('job_leads')
+    _recompute_job_stats()
+
+    _drop_search('leads')
+    op.drop_index('ix_leads_job_id_lower_company_id', table_name='leads')
+    op.drop_index('ix_leads_job_id_email_domain_id', table_name='leads')
+    op.drop_index('ix_leads_job_id_created_at_id', table_name='leads')
+    op.drop_index('ix_leads_job_id_confidence_id', table_name='leads')
+    op.drop_index('ix_leads_job_id_id', table_name='leads')
+    op.drop_table('leads')
+    _create_search('contacts')
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.create_table('leads',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('job_id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=255), nullable=True),
+    sa.Column('email', sa.String(length=255), nullable=True),
+    sa.Column('company', sa.String(length=255), nullable=True),
+    sa.Column('title', sa.String(length=255), nullable=True),
+    sa.Column('source_url', sa.String(length=1024), nullable=True),
+    sa.Column('confidence', sa.Float(), nullable=False),
+    sa.Column('created_at', sa.DateTime(), nullable=False),
+    sa.Column('email_domain', sa.String(length=255), nullable=True),
+    sa.ForeignKeyConstraint(['job_id'], ['jobs.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.execute(
+        "INSERT INTO leads (id, job_id, name, email, email_domain, company, title, source_url, confidence, created_at) "
+        "SELECT l.id, l.job_id, c.name, c.email, c.email_domain, c.company, c.title, c.source_url, "
+        "l.confidence, l.created_at FROM job_leads l JOIN contacts c ON c.id = l.contact_id"
+    )
+    _reset_sequence('leads')
+    op.create_index('ix_leads_job_id_id', 'leads', ['job_id', 'id'], unique=False)
+    op.create_index('ix_leads_job_id_confidence_id', 'leads', ['job_id', 'confidence', 'id'], unique=False)
+    op.create_index('ix_leads_job_id_created_at_id', 'leads', ['job_id', 'created_at', 'id'], unique=False)
+    op.create_index('ix_leads_job_id_email_domain_id', 'leads', ['job_id', 'email_domain', 'id'], unique=False)
+    op.create_index(
+        'ix_leads_job_id_lower_company_id', 'leads',
+        ['job_id', sa.text('lower(company)'), 'id'], unique=False,
+    )
+    _create_search('leads')
+
+    _drop_search('contacts')
+    op.drop_index('ix_job_leads_job_id_created_at_id', table_name='job_leads')
+    op.drop_index('ix_job_leads_job_id_confidence_id', table_name='job_leads')
+    op.drop_index('ix_job_leads_job_id_id', table_name='job_leads')
+    op.drop_index('ix_job_leads_contact_id', table_name='job_leads')
+    pairs = [
+        {'job_id': job_id, 'contact_id': contact_id}
+        for job_id, contact_id in op.get_bind().execute(sa.select(job_leads.c.job_id, job_leads.c.contact_id))
+    ]
+    op.drop_table('job_leads')
+    op.create_table('job_leads',
+    sa.Column('job_id', sa.Integer(), nullable=False),
+    sa.Column('contact_id', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['contact_id'], ['contacts.id'], ),
+    sa.ForeignKeyConstraint(['job_id'], ['jobs.id'], ),
+    sa.PrimaryKeyConstraint('job_id', 'contact_id')
+    )
+    if pairs:
+        op.bulk_insert(sa.table('job_leads', sa.column('job_id', sa.Integer), sa.column('contact_id', sa.Integer)), pairs)
+    op.create_index('ix_job_leads_contact_id', 'job_leads', ['contact_id'], unique=False)
+    op.drop_column('contacts', 'email_domain')
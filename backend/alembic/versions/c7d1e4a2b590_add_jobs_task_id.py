@@ -0,0 +1,28 @@
+"""Add jobs.task_id
+
+Revision ID: c7d1e4a2b590
+Revises: 8b2e6f0a9c31
+Create Date: 2026-10-18 16:21:07.384215
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'c7d1e4a2b590'
+down_revision: Union[str, Sequence[str], None] = '8b2e6f0a9c31'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('jobs', sa.Column('task_id', sa.String(length=255), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('jobs', 'task_id')
@@ -0,0 +1,67 @@
+"""Add job_stats and job_stat_counts
+
+Revision ID: d3e8f1b6a072
+Revises: c7d1e4a2b590
+Create Date: 2026-10-18 17:02:44.915630
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd3e8f1b6a072'
+down_revision: Union[str, Sequence[str], None] = 'c7d1e4a2b590'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_table('job_stats',
+    sa.Column('job_id', sa.Integer(), nullable=False),
+    sa.Column('lead_count', sa.Integer(), nullable=False),
+    sa.Column('with_email', sa.Integer(), nullable=False),
+    sa.Column('confidence_sum', sa.Float(), nullable=False),
+    sa.ForeignKeyConstraint(['job_id'], ['jobs.id'], ),
+    sa.PrimaryKeyConstraint('job_id')
+    )
+    op.create_table('job_stat_counts',
+    sa.Column('job_id', sa.Integer(), nullable=False),
+    sa.Column('kind', sa.String(length=20), nullable=False),
+    sa.Column('value', sa.String(length=255), nullable=False),
+    sa.Column('count', sa.Integer(), nullable=False),
+    sa.ForeignKeyConstraint(['job_id'], ['jobs.id'], ),
+    sa.PrimaryKeyConstraint('job_id', 'kind', 'value')
+    )
+    op.create_index('ix_job_stat_counts_top', 'job_stat_counts', ['job_id', 'kind', 'count'], unique=False)
+
+    # Backfill the jobs ingested before the aggregates existed (one pass over leads)
+    if op.get_bind().dialect.name == 'postgresql':
+        domain = "trim(lower(split_part(email, '@', 2)))"
+    else:
+        domain = "trim(lower(substr(email, instr(email, '@') + 1)))"
+    op.execute(
+        "INSERT INTO job_stats (job_id, lead_count, with_email, confidence_sum) "
+        f"SELECT job_id, COUNT(*), COUNT(CASE WHEN email LIKE '%@%' AND {domain} <> '' THEN 1 END), SUM(confidence) "
+        "FROM leads GROUP BY job_id"
+    )
+    op.execute(
+        "INSERT INTO job_stat_counts (job_id, kind, value, count) "
+        "SELECT job_id, 'company', substr(trim(company), 1, 255), COUNT(*) FROM leads "
+        "WHERE trim(company) <> '' GROUP BY job_id, substr(trim(company), 1, 255)"
+    )
+    op.execute(
+        "INSERT INTO job_stat_counts (job_id, kind, value, count) "
+        f"SELECT job_id, 'email_domain', substr({domain}, 1, 255), COUNT(*) FROM leads "
+        f"WHERE email LIKE '%@%' AND {domain} <> '' GROUP BY job_id, substr({domain}, 1, 255)"
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_job_stat_counts_top', table_name='job_stat_counts')
+    op.drop_table('job_stat_counts')
+    op.drop_table('job_stats')
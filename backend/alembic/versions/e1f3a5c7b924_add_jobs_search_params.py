@@ -0,0 +1,28 @@
+"""Add jobs.search_params
+
+Revision ID: e1f3a5c7b924
+Revises: c2e4a6f8d913
+Create Date: 2026-10-18 23:14:52.407163
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e1f3a5c7b924'
+down_revision: Union[str, Sequence[str], None] = 'c2e4a6f8d913'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('jobs', sa.Column('search_params', sa.JSON(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('jobs', 'search_params')
@@ -0,0 +1,45 @@
+"""Add leads.email_domain and result filter / sort indexes
+
+Revision ID: e5a9c2d7f183
+Revises: d3e8f1b6a072
+Create Date: 2026-10-18 17:48:12.506113
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'e5a9c2d7f183'
+down_revision: Union[str, Sequence[str], None] = 'd3e8f1b6a072'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('leads', sa.Column('email_domain', sa.String(length=255), nullable=True))
+    if op.get_bind().dialect.name == 'postgresql':
+        domain = "trim(lower(split_part(email, '@', 2)))"
+    else:
+        domain = "trim(lower(substr(email, instr(email, '@') + 1)))"
+    op.execute(f"UPDATE leads SET email_domain = nullif({domain}, '') WHERE email LIKE '%@%'")
+
+    op.create_index('ix_leads_job_id_confidence_id', 'leads', ['job_id', 'confidence', 'id'], unique=False)
+    op.create_index('ix_leads_job_id_created_at_id', 'leads', ['job_id', 'created_at', 'id'], unique=False)
+    op.create_index('ix_leads_job_id_email_domain_id', 'leads', ['job_id', 'email_domain', 'id'], unique=False)
+    op.create_index(
+        'ix_leads_job_id_lower_company_id', 'leads',
+        ['job_id', sa.text('lower(company)'), 'id'], unique=False,
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_leads_job_id_lower_company_id', table_name='leads')
+    op.drop_index('ix_leads_job_id_email_domain_id', table_name='leads')
+    op.drop_index('ix_leads_job_id_created_at_id', table_name='leads')
+    op.drop_index('ix_leads_job_id_confidence_id', table_name='leads')
+    op.drop_column('leads', 'email_domain')
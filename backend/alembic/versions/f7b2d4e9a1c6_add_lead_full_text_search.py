@@ -0,0 +1,66 @@
+"""Add full-text search over leads
+
+Revision ID: f7b2d4e9a1c6
+Revises: e5a9c2d7f183
+Create Date: 2026-10-18 18:30:55.271948
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f7b2d4e9a1c6'
+down_revision: Union[str, Sequence[str], None] = 'e5a9c2d7f183'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+SEARCH_VECTOR = (
+    "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(company, '')), 'B') || "
+    "setweight(to_tsvector('simple', coalesce(name, '')), 'C')"
+)
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    if op.get_bind().dialect.name == 'postgresql':
+        # The generated column is computed for existing rows as the table is rewritten
+        op.execute(f"ALTER TABLE leads ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ({SEARCH_VECTOR}) STORED")
+        op.execute("CREATE INDEX ix_leads_search_vector ON leads USING gin (search_vector)")
+        return
+
+    op.execute(
+        "CREATE VIRTUAL TABLE leads_fts USING fts5("
+        "name, company, title, content='leads', content_rowid='id', tokenize='porter unicode61')"
+    )
+    op.execute(
+        "CREATE TRIGGER leads_fts_insert AFTER INSERT ON leads BEGIN "
+        "INSERT INTO leads_fts (rowid, name, company, title) VALUES (new.id, new.name, new.company, new.title); END"
+    )
+    op.execute(
+        "CREATE TRIGGER leads_fts_delete AFTER DELETE ON leads BEGIN "
+        "INSERT INTO leads_fts (leads_fts, rowid, name, company, title) "
+        "VALUES ('delete', old.id, old.name, old.company, old.title); END"
+    )
+    op.execute(
+        "CREATE TRIGGER leads_fts_update AFTER UPDATE OF name, company, title ON leads BEGIN "
+        "INSERT INTO leads_fts (leads_fts, rowid, name, company, title) "
+        "VALUES ('delete', old.id, old.name, old.company, old.title); "
+        "INSERT INTO leads_fts (rowid, name, company, title) VALUES (new.id, new.name, new.company, new.title); END"
+    )
+    op.execute("INSERT INTO leads_fts (leads_fts) VALUES ('rebuild')")
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name == 'postgresql':
+        op.drop_index('ix_leads_search_vector', table_name='leads')
+        op.drop_column('leads', 'search_vector')
+        return
+
+    for trigger in ('leads_fts_update', 'leads_fts_delete', 'leads_fts_insert'):
+        op.execute(f"DROP TRIGGER {trigger}")
+    op.execute("DROP TABLE leads_fts")
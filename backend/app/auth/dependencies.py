@@ -1,21 +1,25 @@
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 import jwt
-from sqlalchemy.orm import Session
-from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.auth.principal import cache_principal, get_cached_principal
 from app.config import settings
-from app.database import get_db
+from app.database import get_async_db
 from app.models.models import User
+from app.schemas.schemas import Principal
 
 # OAuth2PasswordBearer extracts the token from the standard Authorization header.
 # We set tokenUrl="/api/auth/login" so Swagger UI knows where to authenticate.
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/api/auth/login")
 
-def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)) -> User:
+async def get_current_user(token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)) -> Principal:
     """
-    Dependency that decodes the JWT access token and fetches the current user.
+    Dependency that decodes the JWT access token and resolves the current user.
     Raises 401 if the token is invalid, expired, or the user does not exist/is inactive.
+
+    The principal comes from the principal cache when warm; the database is
+    only queried on a miss (the session is never connected otherwise).
     """
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
@@ -32,11 +36,14 @@ def get_current_user(token: str = Depends(oauth2_scheme), db: Session = Depends(
     except jwt.InvalidTokenError:
         raise credentials_exception
         
-    user = db.get(User, user_id)
-    if user is None:
-        raise credentials_exception
-        
-    if not user.is_active:
+    principal = await get_cached_principal(user_id)
+    if principal is None:
+        user = await db.get(User, user_id)
+        if user is None:
+            raise credentials_exception
+        principal = await cache_principal(user)
+
+    if not principal.is_active:
         raise HTTPException(status_code=400, detail="Inactive user account")
-        
-    return user
+
+    return principal
@@ -0,0 +1,110 @@
+"""
+Principal cache — the (id, email, is_active) of authenticated users, kept in a
+two-tier cache so `get_current_user` does not query the database per request.
+
+Invalidation is automatic for ORM changes: when a User's email or is_active
+changes (or the user is deleted), the cached entry is dropped as soon as the
+transaction commits, from this process and from Redis. Other API processes
+pick the change up within PRINCIPAL_CACHE_LOCAL_TTL_SECONDS. Bulk
+`update(User)` statements bypass the ORM events; call `invalidate_principal`
+after them.
+"""
+
+import asyncio
+import logging
+from typing import Optional, Set
+
+from redis.exceptions import RedisError
+from sqlalchemy import event, inspect
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.models import User
+from app.redis import get_sync_redis
+from app.schemas.schemas import Principal
+from app.services.cache import TwoTierCache
+
+logger = logging.getLogger(__name__)
+
+# User columns that are part of the cached principal
+PRINCIPAL_FIELDS = ("email", "is_active")
+
+principal_cache = TwoTierCache(
+    "auth:principal",
+    maxsize=settings.PRINCIPAL_CACHE_MAX_ENTRIES,
+    ttl=settings.PRINCIPAL_CACHE_TTL_SECONDS,
+    local_ttl=settings.PRINCIPAL_CACHE_LOCAL_TTL_SECONDS,
+)
+
+_PENDING = "principal_invalidations"
+
+# Redis deletes scheduled from commits on the event loop, still running
+_redis_deletes: Set["asyncio.Task[None]"] = set()
+
+
+async def get_cached_principal(user_id: int) -> Optional[Principal]:
+    cached = await principal_cache.get(str(user_id))
+    return Principal.model_validate(cached) if cached is not None else None
+
+
+async def cache_principal(user: User) -> Principal:
+    principal = Principal.model_validate(user)
+    await principal_cache.set(str(user.id), principal.model_dump())
+    return principal
+
+
+def invalidate_principal(user_id: int) -> None:
+    """
+    Drop a user's cached principal from this process and from Redis.
+
+    On an event loop (e.g. an `AsyncSession` commit in a route) the local entry
+    goes at once and the Redis delete runs as a task, so the loop never blocks
+    on Redis; elsewhere it is deleted through the blocking client.
+    """
+    key = str(user_id)
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        principal_cache.delete_sync(key, get_sync_redis())
+        return
+    principal_cache.delete_local(key)
+    task = loop.create_task(principal_cache.delete(key))
+    # The loop only keeps weak references to tasks
+    _redis_deletes.add(task)
+    task.add_done_callback(_redis_deletes.discard)
+
+
+# ---------------------------------------------------------------------------
+# ORM hooks
+# ---------------------------------------------------------------------------
+def _mark_changed(target: User) -> None:
+    session = Session.object_session(target)
+    if session is not None:
+        session.info.setdefault(_PENDING, set()).add(target.id)
+
+
+@event.listens_for(User, "after_update")
+def _user_updated(mapper, connection, target: User) -> None:
+    state = inspect(target)
+    if any(state.attrs[field].history.has_changes() for field in PRINCIPAL_FIELDS):
+        _mark_changed(target)
+
+
+@event.listens_for(User, "after_delete")
+def _user_deleted(mapper, connection, target: User) -> None:
+    _mark_changed(target)
+
+
+@event.listens_for(Session, "after_commit")
+def _invalidate_committed(session: Session) -> None:
+    for user_id in session.info.pop(_PENDING, ()):
+        # The commit has already succeeded; a Redis outage must not surface from it
+        try:
+            invalidate_principal(user_id)
+        except RedisError as e:
+            logger.warning(f"Could not invalidate the cached principal of user {user_id}: {e}")
+
+
+@event.listens_for(Session, "after_soft_rollback")
+def _discard_rolled_back(session: Session, previous_transaction) -> None:
+    session.info.pop(_PENDING, None)
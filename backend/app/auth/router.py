@@ -1,34 +1,52 @@
 from datetime import timedelta
 from fastapi import APIRouter, Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordRequestForm
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select
 from sqlalchemy.exc import IntegrityError
 
-from app.database import get_db
+from app.database import get_async_db
 from app.models.models import User
-from app.schemas.schemas import UserCreate, UserResponse, TokenResponse
+from app.schemas.schemas import Principal, UserCreate, UserResponse, TokenResponse
 from app.config import settings
-from app.auth.security import get_password_hash, verify_password, create_access_token
+from app.auth.security import (
+    HashingPoolSaturated,
+    aget_password_hash,
+    averify_and_update_password,
+    create_access_token,
+)
 from app.auth.dependencies import get_current_user
 
 router = APIRouter()
 
+
+def hashing_busy() -> HTTPException:
+    """Fast rejection while the bcrypt pool is saturated, instead of queueing behind it."""
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Authentication is busy, please retry shortly.",
+        headers={"Retry-After": "1"},
+    )
+
+
 @router.post("/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
-def register(user_in: UserCreate, db: Session = Depends(get_db)):
+async def register(user_in: UserCreate, db: AsyncSession = Depends(get_async_db)):
     """
     Register a new user directly in the database.
     """
     # Check if a user with that email already exists
     stmt = select(User).where(User.email == user_in.email)
-    existing_user = db.execute(stmt).scalars().first()
+    existing_user = (await db.execute(stmt)).scalars().first()
     if existing_user:
         raise HTTPException(
             status_code=status.HTTP_409_CONFLICT,
             detail="Email already registered."
         )
         
-    hashed_password = get_password_hash(user_in.password)
+    try:
+        hashed_password = await aget_password_hash(user_in.password)
+    except HashingPoolSaturated:
+        raise hashing_busy()
     new_user = User(
         email=user_in.email,
         hashed_password=hashed_password,
@@ -37,26 +55,33 @@ def register(user_in: UserCreate, db: Session = Depends(get_db)):
     db.add(new_user)
     
     try:
-        db.commit()
-        db.refresh(new_user)
+        await db.commit()
+        await db.refresh(new_user)
     except IntegrityError:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Database integrity error.")
         
     return new_user
 
 
 @router.post("/login", response_model=TokenResponse)
-def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
+async def login(form_data: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_async_db)):
     """
     Authenticate user and issue a JWT token.
     OAuth2PasswordRequestForm accepts x-www-form-urlencoded data ('username' and 'password').
     Here 'username' maps to our 'email' field natively to support Swagger seamlessly.
     """
     stmt = select(User).where(User.email == form_data.username)
-    user = db.execute(stmt).scalars().first()
-    
-    if not user or not verify_password(form_data.password, user.hashed_password):
+    user = (await db.execute(stmt)).scalars().first()
+
+    verified, new_hash = False, None
+    if user:
+        try:
+            verified, new_hash = await averify_and_update_password(form_data.password, user.hashed_password)
+        except HashingPoolSaturated:
+            raise hashing_busy()
+
+    if not verified:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Incorrect email or password.",
@@ -69,6 +94,11 @@ def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depend
             detail="Inactive user."
         )
 
+    # The stored hash predates the current BCRYPT_ROUNDS: upgrade it while we have the password
+    if new_hash:
+        user.hashed_password = new_hash
+        await db.commit()
+
     # Generate the access token encoding the User ID securely
     access_token_expires = timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     access_token = create_access_token(
@@ -76,3 +106,9 @@ def login(form_data: OAuth2PasswordRequestForm = Depends(), db: Session = Depend
     )
     
     return {"access_token": access_token, "token_type": "bearer"}
+
+
+@router.get("/me", response_model=Principal)
+async def read_current_user(current_user: Principal = Depends(get_current_user)):
+    """Return the authenticated user's principal."""
+    return current_user
@@ -1,12 +1,25 @@
+import asyncio
+import threading
+from concurrent.futures import ProcessPoolExecutor
 from datetime import datetime, timedelta, timezone
-from typing import Any, Union
+from typing import Any, Optional, Tuple, Union
 
 import jwt
 from passlib.context import CryptContext
 
 from app.config import settings
 
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto", bcrypt__rounds=settings.BCRYPT_ROUNDS)
+
+# bcrypt is CPU-bound: it runs in its own small process pool instead of the
+# shared threadpool, with a cap on queued work so bursts fail fast.
+_hash_executor: Optional[ProcessPoolExecutor] = None
+_hash_executor_lock = threading.Lock()
+_hash_slots = threading.BoundedSemaphore(settings.PASSWORD_HASH_MAX_PENDING)
+
+
+class HashingPoolSaturated(Exception):
+    """Raised when PASSWORD_HASH_MAX_PENDING hash jobs are already queued or running."""
 
 
 def verify_password(plain_password: str, hashed_password: str) -> bool:
@@ -19,6 +32,50 @@ def get_password_hash(password: str) -> str:
     return pwd_context.hash(password)
 
 
+def verify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """Verify a password; also return a new hash if the stored one uses outdated settings."""
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
+def get_hash_executor() -> ProcessPoolExecutor:
+    global _hash_executor
+    with _hash_executor_lock:
+        if _hash_executor is None:
+            _hash_executor = ProcessPoolExecutor(max_workers=settings.PASSWORD_HASH_WORKERS)
+        return _hash_executor
+
+
+def shutdown_hash_executor() -> None:
+    global _hash_executor
+    with _hash_executor_lock:
+        if _hash_executor is not None:
+            _hash_executor.shutdown(wait=False, cancel_futures=True)
+            _hash_executor = None
+
+
+async def _run_in_hash_pool(fn, *args):
+    if not _hash_slots.acquire(blocking=False):
+        raise HashingPoolSaturated()
+    try:
+        future = get_hash_executor().submit(fn, *args)
+    except Exception:
+        _hash_slots.release()
+        raise
+    # Free the slot when the process finishes, even if the request went away first
+    future.add_done_callback(lambda _: _hash_slots.release())
+    return await asyncio.wrap_future(future)
+
+
+async def aget_password_hash(password: str) -> str:
+    """`get_password_hash` in the bcrypt pool. Raises HashingPoolSaturated."""
+    return await _run_in_hash_pool(get_password_hash, password)
+
+
+async def averify_and_update_password(plain_password: str, hashed_password: str) -> Tuple[bool, Optional[str]]:
+    """`verify_and_update_password` in the bcrypt pool. Raises HashingPoolSaturated."""
+    return await _run_in_hash_pool(verify_and_update_password, plain_password, hashed_password)
+
+
 def create_access_token(subject: Union[str, Any], expires_delta: timedelta = None) -> str:
     """
     Generate a JWT access token encoding the standard claims.
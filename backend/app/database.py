@@ -1,15 +1,22 @@
 """
-Database engine and session factory (SQLAlchemy).
+Database engines and session factories (SQLAlchemy).
+
+A blocking engine backs `get_db`, and an asyncio engine (asyncpg on PostgreSQL,
+aiosqlite on SQLite) backs `get_async_db` for `async def` routes so database
+round trips never stall the event loop.
 """
 
 import logging
-from typing import Generator
+from datetime import datetime, timezone
+from typing import Any, AsyncGenerator, Generator
 
-from sqlalchemy import create_engine, exc
+from sqlalchemy import create_engine, event, exc
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import DeclarativeBase, sessionmaker
 from sqlalchemy.orm import Session
-
 from app.config import settings
+from app.metrics import TimedAsyncAdaptedQueuePool, TimedQueuePool, instrument_engine
 
 logger = logging.getLogger(__name__)
 
@@ -18,6 +25,8 @@ try:
     engine = create_engine(
         settings.DATABASE_URL,
         echo=(settings.APP_ENV == "development"),
+        poolclass=TimedQueuePool,                    # QueuePool that reports checkout wait times
+        pool_logging_name="api",                     # Engine label in the pool metrics
         pool_size=settings.DB_POOL_SIZE,             # Configured pool size
         max_overflow=settings.DB_MAX_OVERFLOW,       # Configured max overflow
         pool_timeout=30,         # Timeout in seconds to wait for a connection
@@ -28,8 +37,68 @@ except Exception as e:
     logger.error(f"Failed to initialize database engine: {e}")
     raise
 
+instrument_engine(engine, "api")
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# asyncio driver for each sync backend we support
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+}
+
+
+def to_async_url(url: str) -> str:
+    """Rewrite a sync database URL to use the matching asyncio driver."""
+    parsed = make_url(url)
+    backend = parsed.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No asyncio driver configured for database backend '{backend}'.")
+    return parsed.set(drivername=ASYNC_DRIVERS[backend]).render_as_string(hide_password=False)
+
+
+try:
+    async_engine = create_async_engine(
+        to_async_url(settings.DATABASE_URL),
+        echo=(settings.APP_ENV == "development"),
+        poolclass=TimedAsyncAdaptedQueuePool,  # Explicit so file-backed aiosqlite gets the same pooling
+        pool_logging_name="api_async",
+        pool_size=settings.DB_POOL_SIZE,
+        max_overflow=settings.DB_MAX_OVERFLOW,
+        pool_timeout=30,
+        pool_recycle=1800,
+        pool_pre_ping=True,
+    )
+except Exception as e:
+    logger.error(f"Failed to initialize async database engine: {e}")
+    raise
+
+instrument_engine(async_engine.sync_engine, "api_async")
+
+
+def _naive_utc(value: Any) -> Any:
+    if isinstance(value, datetime) and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+@event.listens_for(Engine, "before_cursor_execute", retval=True)
+def _bind_naive_utc(conn, cursor, statement, parameters, context, executemany):
+    """
+    The models' `DateTime` columns are timestamps without time zone holding UTC,
+    and their defaults are aware UTC datetimes. psycopg2 and sqlite3 store those
+    as-is, but asyncpg rejects an aware value for a naive column, so drop the
+    offset here, for every asyncpg engine (including ones built by tests/scripts).
+    """
+    if conn.dialect.driver != "asyncpg" or not parameters:
+        return statement, parameters
+    if executemany:
+        return statement, [tuple(_naive_utc(value) for value in row) for row in parameters]
+    return statement, tuple(_naive_utc(value) for value in parameters)
+
+
+# expire_on_commit=False: attribute access after commit must not trigger implicit (sync) IO
+AsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
 
 class Base(DeclarativeBase):
     """Declarative base for all ORM models."""
@@ -54,3 +123,23 @@ def get_db() -> Generator[Session, None, None]:
         raise
     finally:
         db.close()
+
+
+async def get_async_db() -> AsyncGenerator[AsyncSession, None]:
+    """
+    FastAPI dependency that yields an AsyncSession.
+    Mirrors `get_db`'s error handling for `async def` routes.
+    """
+    db = AsyncSessionLocal()
+    try:
+        yield db
+    except exc.SQLAlchemyError as e:
+        logger.error(f"Database error occurred: {e}")
+        await db.rollback()
+        raise
+    except Exception as e:
+        logger.error(f"Unexpected error during database operation: {e}")
+        await db.rollback()
+        raise
+    finally:
+        await db.close()
@@ -0,0 +1,273 @@
+"""
+Prometheus metrics for the API and the Celery worker.
+
+  * HTTP: per-route latency histogram and in-flight gauge (`MetricsMiddleware`).
+  * SQLAlchemy: pool checkout wait histogram (pools built from
+    `TimedQueuePool` / `TimedAsyncAdaptedQueuePool`) and in-use connections per
+    engine (`instrument_engine`).
+  * Redis: connections in use / idle per connection pool, read at scrape time.
+  * Celery: task durations and outcomes from task signals (`instrument_celery`);
+    a worker also serves them itself on WORKER_METRICS_PORT when set. Jobs:
+    time from cancel request to the worker stopping.
+  * Scraper: page cache lookups by result (hit, revalidated, miss).
+  * Two-tier caches: lookups per cache by tier and result, and Redis errors.
+
+Everything is exposed by `render_latest()` (served at `/metrics`). When
+PROMETHEUS_MULTIPROC_DIR is set, values are shared through that directory so
+one scrape covers every Gunicorn/Uvicorn worker and every Celery child process
+on the host; collectors registered with `register_collector` (Redis pools,
+queue depths) are still read live by the scraping process.
+"""
+
+import os
+import time
+from typing import Dict, Iterable, List, Tuple
+
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Gauge,
+    Histogram,
+    generate_latest,
+    multiprocess,
+    start_http_server,
+)
+from prometheus_client.core import GaugeMetricFamily
+from prometheus_client.registry import Collector
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+from app.config import settings
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency, from receiving the request to the last body chunk.",
+    ["method", "route", "status"],
+)
+HTTP_REQUESTS_IN_FLIGHT = Gauge(
+    "http_requests_in_flight",
+    "HTTP requests currently being served.",
+    multiprocess_mode="livesum",
+)
+
+DB_POOL_CHECKOUT_SECONDS = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time spent waiting for a connection from the SQLAlchemy pool (including connecting).",
+    ["engine"],
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30),
+)
+DB_POOL_CHECKOUT_TIMEOUTS = Counter(
+    "db_pool_checkout_timeouts",
+    "Connection checkouts that failed because the pool was exhausted.",
+    ["engine"],
+)
+DB_POOL_IN_USE = Gauge(
+    "db_pool_connections_in_use",
+    "Connections currently checked out of the SQLAlchemy pool.",
+    ["engine"],
+    multiprocess_mode="livesum",
+)
+
+CELERY_TASK_SECONDS = Histogram(
+    "celery_task_duration_seconds",
+    "Celery task run time.",
+    ["task", "state"],
+    buckets=(0.1, 0.5, 1, 5, 10, 30, 60, 120, 300, 600, 1800, 3600),
+)
+CELERY_TASKS = Counter(
+    "celery_tasks",
+    "Celery tasks finished, by outcome (SUCCESS, FAILURE, RETRY, ...).",
+    ["task", "state"],
+)
+JOB_CANCEL_STOP_SECONDS = Histogram(
+    "job_cancel_stop_seconds",
+    "Time from a job's cancel request until its worker stopped working on it.",
+    buckets=(0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 300),
+)
+SCRAPER_PAGE_CACHE_LOOKUPS = Counter(
+    "scraper_page_cache_lookups",
+    "Scraper page cache lookups, by result (hit, revalidated, miss).",
+    ["result"],
+)
+CACHE_LOOKUPS = Counter(
+    "cache_lookups",
+    "Two-tier cache lookups, by cache, tier (local, redis) and result (hit, miss, error).",
+    ["cache", "tier", "result"],
+)
+CACHE_REDIS_ERRORS = Counter(
+    "cache_redis_errors",
+    "Two-tier cache Redis calls that failed, by cache and operation.",
+    ["cache", "operation"],
+)
+
+
+# ---------------------------------------------------------------------------
+# HTTP
+# ---------------------------------------------------------------------------
+class MetricsMiddleware:
+    """ASGI middleware timing every HTTP request, labelled by route template."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status = "500"
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = str(message["status"])
+            await send(message)
+
+        started = time.perf_counter()
+        HTTP_REQUESTS_IN_FLIGHT.inc()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            HTTP_REQUESTS_IN_FLIGHT.dec()
+            # The router stores the matched route in the scope; keep label cardinality bounded
+            route = scope.get("route")
+            HTTP_REQUEST_SECONDS.labels(
+                scope["method"], getattr(route, "path", "unmatched"), status
+            ).observe(time.perf_counter() - started)
+
+
+# ---------------------------------------------------------------------------
+# SQLAlchemy
+# ---------------------------------------------------------------------------
+class _TimedCheckout:
+    """
+    Pool mixin observing how long `_do_get` (wait + connect) takes, labelled
+    with the engine's `pool_logging_name`.
+    """
+
+    def _do_get(self):
+        started = time.perf_counter()
+        name = self._orig_logging_name or "default"
+        try:
+            return super()._do_get()
+        except PoolTimeoutError:
+            DB_POOL_CHECKOUT_TIMEOUTS.labels(name).inc()
+            raise
+        finally:
+            DB_POOL_CHECKOUT_SECONDS.labels(name).observe(time.perf_counter() - started)
+
+
+class TimedQueuePool(_TimedCheckout, QueuePool):
+    pass
+
+
+class TimedAsyncAdaptedQueuePool(_TimedCheckout, AsyncAdaptedQueuePool):
+    pass
+
+
+def instrument_engine(engine: Engine, name: str) -> None:
+    """Track checked-out connections of `engine` (survives `engine.dispose()`)."""
+    in_use = DB_POOL_IN_USE.labels(name)
+
+    @event.listens_for(engine, "checkout")
+    def _checkout(dbapi_connection, connection_record, connection_proxy):
+        in_use.inc()
+
+    @event.listens_for(engine, "checkin")
+    def _checkin(dbapi_connection, connection_record):
+        in_use.dec()
+
+
+# ---------------------------------------------------------------------------
+# Redis
+# ---------------------------------------------------------------------------
+class RedisPoolCollector(Collector):
+    """Reports connections in use and idle for each registered redis-py pool."""
+
+    def __init__(self):
+        self.pools: Dict[str, object] = {}
+
+    def register(self, name: str, pool) -> None:
+        self.pools[name] = pool
+
+    def collect(self) -> Iterable[GaugeMetricFamily]:
+        in_use = GaugeMetricFamily("redis_pool_connections_in_use", "Redis connections checked out.", labels=["pool"])
+        idle = GaugeMetricFamily("redis_pool_connections_idle", "Redis connections open and idle.", labels=["pool"])
+        limit = GaugeMetricFamily("redis_pool_max_connections", "Redis pool size limit.", labels=["pool"])
+        for name, pool in self.pools.items():
+            in_use.add_metric([name], len(pool._in_use_connections))
+            idle.add_metric([name], len(pool._available_connections))
+            limit.add_metric([name], pool.max_connections)
+        yield in_use
+        yield idle
+        yield limit
+
+
+# Collectors that read live state at scrape time (not shared in multiprocess mode)
+_live_collectors: List[Collector] = []
+
+
+def register_collector(collector: Collector) -> None:
+    REGISTRY.register(collector)
+    _live_collectors.append(collector)
+
+
+redis_pools = RedisPoolCollector()
+register_collector(redis_pools)
+
+
+# ---------------------------------------------------------------------------
+# Celery
+# ---------------------------------------------------------------------------
+def instrument_celery() -> None:
+    """Connect task signal handlers; call once where the Celery app is created."""
+    from celery import signals
+
+    started: Dict[str, Tuple[float, str]] = {}
+
+    @signals.task_prerun.connect(weak=False)
+    def _task_prerun(task_id=None, task=None, **kwargs):
+        started[task_id] = (time.perf_counter(), task.name)
+
+    @signals.task_postrun.connect(weak=False)
+    def _task_postrun(task_id=None, task=None, state=None, **kwargs):
+        entry = started.pop(task_id, None)
+        if entry is None:
+            return
+        began, name = entry
+        state = state or "UNKNOWN"
+        CELERY_TASK_SECONDS.labels(name, state).observe(time.perf_counter() - began)
+        CELERY_TASKS.labels(name, state).inc()
+
+    @signals.worker_init.connect(weak=False)
+    def _worker_init(**kwargs):
+        if settings.WORKER_METRICS_PORT:
+            registry = REGISTRY
+            if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+                registry = CollectorRegistry()
+                multiprocess.MultiProcessCollector(registry)
+            start_http_server(settings.WORKER_METRICS_PORT, registry=registry)
+
+    @signals.worker_process_shutdown.connect(weak=False)
+    def _worker_process_shutdown(pid=None, **kwargs):
+        if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+            multiprocess.mark_process_dead(pid or os.getpid())
+
+
+# ---------------------------------------------------------------------------
+# Exposition
+# ---------------------------------------------------------------------------
+def render_latest() -> Tuple[bytes, str]:
+    """(body, content type) of the current metrics in Prometheus text format."""
+    if "PROMETHEUS_MULTIPROC_DIR" in os.environ:
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        for collector in _live_collectors:
+            registry.register(collector)
+    else:
+        registry = REGISTRY
+    return generate_latest(registry), CONTENT_TYPE_LATEST
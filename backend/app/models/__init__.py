@@ -1,3 +1,3 @@
 # Lead Gen Tool — Models Package
 
-from .models import User, Job, Lead
+from .models import User, Job, Contact, JobLead, LeadFingerprint
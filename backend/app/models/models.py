@@ -3,9 +3,10 @@ SQLAlchemy database models for Users, Jobs, and Leads.
 """
 
 from datetime import datetime, timezone
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 
-from sqlalchemy import String, Integer, DateTime, ForeignKey, Float, Text, Boolean
+from sqlalchemy import DDL, JSON, String, Integer, DateTime, ForeignKey, Float, Text, Boolean, Index, UniqueConstraint, event
+from sqlalchemy.ext.associationproxy import association_proxy
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from app.database import Base
@@ -32,30 +33,143 @@ class Job(Base):
     user_id: Mapped[int] = mapped_column(ForeignKey("users.id"))
     intent: Mapped[str] = mapped_column(String(100)) # e.g. "career" or "growth"
     lead_count: Mapped[int] = mapped_column(Integer, default=100)
+    search_params: Mapped[Optional[Dict[str, Any]]] = mapped_column(JSON, nullable=True) # what the scrape searches for (SearchParams)
     status: Mapped[str] = mapped_column(String(50), default="pending") # pending, processing, completed, failed
     progress: Mapped[int] = mapped_column(Integer, default=0)
+    duplicates_dropped: Mapped[int] = mapped_column(Integer, default=0) # leads skipped as already known to the user
+    known_leads: Mapped[int] = mapped_column(Integer, default=0) # leads served from the contact store instead of scraped
     error_message: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
     started_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
     completed_at: Mapped[Optional[datetime]] = mapped_column(DateTime, nullable=True)
     result_url: Mapped[Optional[str]] = mapped_column(String(1024), nullable=True)
+    task_id: Mapped[Optional[str]] = mapped_column(String(255), nullable=True) # Celery task running the job, for revoke
     raw_resume_text: Mapped[Optional[str]] = mapped_column(Text, nullable=True) # Storing the input text for reference if needed
     created_at: Mapped[datetime] = mapped_column(DateTime, default=lambda: datetime.now(timezone.utc))
     
     user: Mapped["User"] = relationship(back_populates="jobs")
-    leads: Mapped[List["Lead"]] = relationship(back_populates="job", cascade="all, delete-orphan")
+    stats: Mapped[Optional["JobStats"]] = relationship(cascade="all, delete-orphan")
+    stat_counts: Mapped[List["JobStatCount"]] = relationship(cascade="all, delete-orphan")
+    job_leads: Mapped[List["JobLead"]] = relationship(back_populates="job", cascade="all, delete-orphan")
 
 
-class Lead(Base):
-    __tablename__ = "leads"
+class LeadFingerprint(Base):
+    """Exact record of every person (by fingerprint) a user has already received."""
+    __tablename__ = "lead_fingerprints"
+
+    user_id: Mapped[int] = mapped_column(ForeignKey("users.id"), primary_key=True)
+    fingerprint: Mapped[str] = mapped_column(String(40), primary_key=True) # sha1 hex of a normalized key
+
+
+class Contact(Base):
+    """One person ever found by any job, shared across jobs and users (app.services.contacts)."""
+    __tablename__ = "contacts"
+    __table_args__ = (
+        # Known-contact lookups walk the freshest contacts first: WHERE seen_at >= ? ORDER BY seen_at DESC
+        Index("ix_contacts_seen_at", "seen_at"),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
-    job_id: Mapped[int] = mapped_column(ForeignKey("jobs.id"))
+    fingerprint: Mapped[str] = mapped_column(String(40), unique=True) # strongest fingerprint of the person
     name: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
     email: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
+    email_domain: Mapped[Optional[str]] = mapped_column(String(255), nullable=True) # lower-cased part after "@"
     company: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
     title: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
     source_url: Mapped[Optional[str]] = mapped_column(String(1024), nullable=True)
-    confidence: Mapped[float] = mapped_column(Float, default=0.0)
+    confidence: Mapped[float] = mapped_column(Float, default=0.0) # of the latest scrape
+    seen_at: Mapped[datetime] = mapped_column(DateTime, default=lambda: datetime.now(timezone.utc)) # last scraped
+
+
+# Full-text search over name / company / title (app.services.search). Not mapped:
+# PostgreSQL keeps a generated, weighted tsvector with a GIN index; SQLite an
+# external-content FTS5 table synced by triggers. Alembic creates the same objects.
+CONTACTS_SEARCH_VECTOR = (
+    "setweight(to_tsvector('english', coalesce(title, '')), 'A') || "
+    "setweight(to_tsvector('english', coalesce(company, '')), 'B') || "
+    "setweight(to_tsvector('simple', coalesce(name, '')), 'C')"
+)
+CONTACTS_SEARCH_DDL = {
+    "postgresql": [
+        f"ALTER TABLE contacts ADD COLUMN search_vector tsvector GENERATED ALWAYS AS ({CONTACTS_SEARCH_VECTOR}) STORED",
+        "CREATE INDEX ix_contacts_search_vector ON contacts USING gin (search_vector)",
+    ],
+    "sqlite": [
+        "CREATE VIRTUAL TABLE contacts_fts USING fts5("
+        "name, company, title, content='contacts', content_rowid='id', tokenize='porter unicode61')",
+        "CREATE TRIGGER contacts_fts_insert AFTER INSERT ON contacts BEGIN "
+        "INSERT INTO contacts_fts (rowid, name, company, title) VALUES (new.id, new.name, new.company, new.title); END",
+        "CREATE TRIGGER contacts_fts_delete AFTER DELETE ON contacts BEGIN "
+        "INSERT INTO contacts_fts (contacts_fts, rowid, name, company, title) "
+        "VALUES ('delete', old.id, old.name, old.company, old.title); END",
+        "CREATE TRIGGER contacts_fts_update AFTER UPDATE OF name, company, title ON contacts BEGIN "
+        "INSERT INTO contacts_fts (contacts_fts, rowid, name, company, title) "
+        "VALUES ('delete', old.id, old.name, old.company, old.title); "
+        "INSERT INTO contacts_fts (rowid, name, company, title) VALUES (new.id, new.name, new.company, new.title); END",
+    ],
+}
+for _dialect, _statements in CONTACTS_SEARCH_DDL.items():
+    for _statement in _statements:
+        event.listen(Contact.__table__, "after_create", DDL(_statement).execute_if(dialect=_dialect))
+event.listen(Contact.__table__, "before_drop", DDL("DROP TABLE IF EXISTS contacts_fts").execute_if(dialect="sqlite"))
+
+
+class JobLead(Base):
+    """
+    A lead of a job: which contact the job delivered, with what this scrape
+    made of it. The person's details are only kept on the contact.
+    """
+    __tablename__ = "job_leads"
+    __table_args__ = (
+        UniqueConstraint("job_id", "contact_id", name="uq_job_leads_job_id_contact_id"),
+        # Keyset pagination over a job's results walks this index: WHERE job_id = ? AND id > ?
+        Index("ix_job_leads_job_id_id", "job_id", "id"),
+        # Sorted result pages: WHERE job_id = ? ORDER BY key, id (scanned either way)
+        Index("ix_job_leads_job_id_confidence_id", "job_id", "confidence", "id"),
+        Index("ix_job_leads_job_id_created_at_id", "job_id", "created_at", "id"),
+        # "Has this user already received the contact?": WHERE contact_id = ? AND job_id IN (user's jobs)
+        Index("ix_job_leads_contact_id", "contact_id"),
+    )
+
+    id: Mapped[int] = mapped_column(primary_key=True)
+    job_id: Mapped[int] = mapped_column(ForeignKey("jobs.id"))
+    contact_id: Mapped[int] = mapped_column(ForeignKey("contacts.id"))
+    confidence: Mapped[float] = mapped_column(Float, default=0.0) # as scraped for this job
     created_at: Mapped[datetime] = mapped_column(DateTime, default=lambda: datetime.now(timezone.utc))
 
-    job: Mapped["Job"] = relationship(back_populates="leads")
+    job: Mapped["Job"] = relationship(back_populates="job_leads")
+    contact: Mapped["Contact"] = relationship()
+
+    # The contact's details, read through the eagerly loaded `contact` (e.g. by `LeadResponse`)
+    name = association_proxy("contact", "name")
+    email = association_proxy("contact", "email")
+    company = association_proxy("contact", "company")
+    title = association_proxy("contact", "title")
+    source_url = association_proxy("contact", "source_url")
+
+
+class JobStats(Base):
+    """Running totals over a job's stored leads, updated with every ingested batch."""
+    __tablename__ = "job_stats"
+
+    job_id: Mapped[int] = mapped_column(ForeignKey("jobs.id"), primary_key=True)
+    lead_count: Mapped[int] = mapped_column(Integer, default=0)
+    with_email: Mapped[int] = mapped_column(Integer, default=0)
+    confidence_sum: Mapped[float] = mapped_column(Float, default=0.0)
+    # Scraper page cache lookups: served fresh, revalidated with a 304, downloaded
+    pages_cached: Mapped[int] = mapped_column(Integer, default=0)
+    pages_revalidated: Mapped[int] = mapped_column(Integer, default=0)
+    pages_downloaded: Mapped[int] = mapped_column(Integer, default=0)
+
+
+class JobStatCount(Base):
+    """Leads of a job per company / email domain, for top-N lists without scanning `job_leads`."""
+    __tablename__ = "job_stat_counts"
+    __table_args__ = (
+        # Top-N per job and kind reads this index backwards: WHERE job_id = ? AND kind = ? ORDER BY count DESC
+        Index("ix_job_stat_counts_top", "job_id", "kind", "count"),
+    )
+
+    job_id: Mapped[int] = mapped_column(ForeignKey("jobs.id"), primary_key=True)
+    kind: Mapped[str] = mapped_column(String(20), primary_key=True) # "company" or "email_domain"
+    value: Mapped[str] = mapped_column(String(255), primary_key=True)
+    count: Mapped[int] = mapped_column(Integer, default=0)
@@ -0,0 +1,195 @@
+"""
+SQL profiling — per-request and per-task query counts, DB time and N+1 hints.
+
+Engine-wide cursor events time every statement. While a request (through
+`SQLProfilingMiddleware`) or a Celery task (through `instrument_celery`) is
+running, its statements are added to a `QueryStats` held in a context var:
+
+  * responses carry `Server-Timing: db;dur=<ms>;desc="<n> queries"`
+  * the same statement shape (identical SQL text, any parameters) executed
+    SQL_N_PLUS_ONE_THRESHOLD times or more in one request/task is logged as a
+    likely N+1 pattern
+  * the slowest statements of the process are kept for `/api/debug/sql`
+"""
+
+import heapq
+import itertools
+import logging
+import threading
+import time
+from collections import Counter, deque
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+from typing import Any, Deque, Dict, List, Optional, Tuple
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+from app.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class QueryStats:
+    """Statements run on behalf of one request or task."""
+
+    label: str
+    count: int = 0
+    seconds: float = 0.0
+    shapes: Counter = field(default_factory=Counter)
+
+    def add(self, statement: str, elapsed: float) -> None:
+        self.count += 1
+        self.seconds += elapsed
+        self.shapes[statement] += 1
+
+    def repeated_shapes(self, threshold: int) -> List[Tuple[str, int]]:
+        return [(statement, n) for statement, n in self.shapes.most_common() if n >= threshold]
+
+    def server_timing(self) -> str:
+        return f'db;dur={self.seconds * 1000:.2f};desc="{self.count} queries"'
+
+
+_current: ContextVar[Optional[QueryStats]] = ContextVar("sql_query_stats", default=None)
+
+# Process-wide: the slowest statements seen (min-heap of (seconds, seq, entry))
+_slowest: List[Tuple[float, int, Dict[str, Any]]] = []
+_sequence = itertools.count()
+_slowest_lock = threading.Lock()
+# Most recent N+1 findings
+_n_plus_one: Deque[Dict[str, Any]] = deque(maxlen=50)
+
+
+def current_stats() -> Optional[QueryStats]:
+    return _current.get()
+
+
+def start(label: str) -> Tuple[QueryStats, Any]:
+    """Begin collecting for `label`; returns (stats, token for `finish`)."""
+    stats = QueryStats(label)
+    return stats, _current.set(stats)
+
+
+def finish(stats: QueryStats, token) -> None:
+    """Stop collecting and report likely N+1 patterns."""
+    _current.reset(token)
+    for statement, n in stats.repeated_shapes(settings.SQL_N_PLUS_ONE_THRESHOLD):
+        logger.warning(f"Possible N+1 in {stats.label}: statement ran {n} times: {statement[:200]}")
+        _n_plus_one.append({
+            "context": stats.label,
+            "executions": n,
+            "statement": statement,
+            "at": datetime.now(timezone.utc).isoformat(),
+        })
+
+
+def _record_slow(statement: str, elapsed: float) -> None:
+    limit = settings.SQL_SLOW_STATEMENTS_KEPT
+    if len(_slowest) >= limit and elapsed <= _slowest[0][0]:
+        return
+    stats = _current.get()
+    entry = {
+        "duration_ms": round(elapsed * 1000, 3),
+        "statement": statement,
+        "context": stats.label if stats else None,
+        "at": datetime.now(timezone.utc).isoformat(),
+    }
+    with _slowest_lock:
+        item = (elapsed, next(_sequence), entry)
+        if len(_slowest) >= limit:
+            heapq.heappushpop(_slowest, item)
+        else:
+            heapq.heappush(_slowest, item)
+
+
+def slowest_statements() -> List[Dict[str, Any]]:
+    with _slowest_lock:
+        return [entry for _, _, entry in sorted(_slowest, reverse=True)]
+
+
+def n_plus_one_findings() -> List[Dict[str, Any]]:
+    return list(reversed(_n_plus_one))
+
+
+def reset() -> None:
+    with _slowest_lock:
+        _slowest.clear()
+    _n_plus_one.clear()
+
+
+# ---------------------------------------------------------------------------
+# Engine events (every engine, sync and async)
+# ---------------------------------------------------------------------------
+@event.listens_for(Engine, "before_cursor_execute")
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+
+@event.listens_for(Engine, "after_cursor_execute")
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = conn.info["query_started"].pop()
+    elapsed = time.perf_counter() - started
+    stats = _current.get()
+    if stats is not None:
+        stats.add(statement, elapsed)
+    _record_slow(statement, elapsed)
+
+
+@event.listens_for(Engine, "handle_error")
+def _handle_error(exception_context):
+    conn = exception_context.connection
+    if conn is not None and conn.info.get("query_started"):
+        conn.info["query_started"].pop()
+
+
+# ---------------------------------------------------------------------------
+# Requests and tasks
+# ---------------------------------------------------------------------------
+class SQLProfilingMiddleware:
+    """ASGI middleware collecting per-request SQL stats into `Server-Timing`."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats, token = start(f"{scope['method']} {scope['path']}")
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start":
+                # Statements of a streamed body run after this point and are not included
+                message["headers"] = [*message.get("headers", []), (b"server-timing", stats.server_timing().encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            if route is not None:
+                stats.label = f"{scope['method']} {route.path}"
+            finish(stats, token)
+
+
+def instrument_celery() -> None:
+    """Collect SQL stats per task and log them when the task ends."""
+    from celery import signals
+
+    running: Dict[str, Tuple[QueryStats, Any]] = {}
+
+    @signals.task_prerun.connect(weak=False)
+    def _task_prerun(task_id=None, task=None, **kwargs):
+        running[task_id] = start(f"task {task.name}")
+
+    @signals.task_postrun.connect(weak=False)
+    def _task_postrun(task_id=None, task=None, **kwargs):
+        entry = running.pop(task_id, None)
+        if entry is None:
+            return
+        stats, token = entry
+        logger.info(f"Task {task.name}[{task_id}] ran {stats.count} queries in {stats.seconds * 1000:.1f}ms")
+        finish(stats, token)
@@ -5,10 +5,12 @@ Redis client connection and utilities.
 import logging
 from typing import AsyncGenerator
 
+import redis
 from redis import asyncio as aioredis
 from redis.exceptions import RedisError
 
 from app.config import settings
+from app.metrics import redis_pools
 
 logger = logging.getLogger(__name__)
 
@@ -19,6 +21,27 @@ redis_pool = aioredis.ConnectionPool.from_url(
     max_connections=settings.REDIS_MAX_CONNECTIONS,
 )
 
+# Blocking pool for Celery workers and other code running outside the event loop
+sync_redis_pool = redis.ConnectionPool.from_url(
+    settings.REDIS_URL,
+    decode_responses=True,
+    max_connections=settings.REDIS_MAX_CONNECTIONS,
+)
+
+redis_pools.register("async", redis_pool)
+redis_pools.register("sync", sync_redis_pool)
+
+
+def get_sync_redis() -> redis.Redis:
+    """Return a blocking Redis client backed by the shared worker pool."""
+    return redis.Redis(connection_pool=sync_redis_pool)
+
+
+def get_async_redis() -> aioredis.Redis:
+    """Return an asyncio Redis client on the shared pool, for use outside FastAPI dependencies."""
+    return aioredis.Redis(connection_pool=redis_pool)
+
+
 async def get_redis() -> AsyncGenerator[aioredis.Redis, None]:
     """
     FastAPI dependency that yields a Redis client from the connection pool.
@@ -0,0 +1,26 @@
+"""
+Debug routes — SQL profiling data of this API process.
+
+Only mounted when SQL_DEBUG_ENDPOINT is enabled.
+"""
+
+from fastapi import APIRouter, status
+
+from app import profiling
+
+router = APIRouter()
+
+
+@router.get("/sql")
+def sql_profile():
+    """Slowest statements since start (or the last reset) and recent likely N+1 patterns."""
+    return {
+        "slowest": profiling.slowest_statements(),
+        "n_plus_one": profiling.n_plus_one_findings(),
+    }
+
+
+@router.delete("/sql", status_code=status.HTTP_204_NO_CONTENT)
+def reset_sql_profile():
+    """Forget the collected statements, e.g. before a benchmark run."""
+    profiling.reset()
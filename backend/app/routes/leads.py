@@ -1,16 +1,52 @@
-import io
-import csv
-from typing import List
+import logging
+from typing import Literal, Optional
 
-from fastapi import APIRouter, HTTPException, status, Depends
-from fastapi.responses import StreamingResponse
-from sqlalchemy.orm import Session
+from celery.utils import uuid
+from fastapi import APIRouter, HTTPException, status, Depends, Query
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import Response, StreamingResponse
+from redis import asyncio as aioredis
+from redis.exceptions import RedisError
 from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.schemas.schemas import JobCreate, JobResponse, LeadResponse
-from app.models.models import Job, Lead, User
-from app.database import get_db
-from app.tasks.generate_leads import generate_leads_task
+from app.auth.dependencies import get_current_user
+from app.schemas.schemas import (
+    JobCreate,
+    JobResponse,
+    JobStatsResponse,
+    LeadPage,
+    LeadResponse,
+    LeadSearchHit,
+    LeadSearchPage,
+    Principal,
+)
+from app.models.models import Job, User
+from app.database import get_async_db
+from app.redis import get_redis
+from app.services.cancellation import request_cancel
+from app.services.export import (
+    MEDIA_TYPES,
+    RESULT_ORDERINGS,
+    close_after,
+    decode_cursor,
+    encode_cursor,
+    gzip_stream,
+    iter_csv_native,
+    iter_csv_orm,
+    iter_ndjson,
+    iter_parquet,
+    lead_page_stmt,
+    render_lead_page,
+)
+from app.services.job_stats import read_job_stats
+from app.services.search import decode_search_cursor, encode_search_cursor, search_leads
+from app.services.job_events import apublish_job_state, iter_job_events, job_snapshot, read_job_state
+from app.tasks.celery_app import celery_app
+from app.tasks.routing import enqueue_job
+from app.tasks.scrape_task import scrape_leads_task
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
@@ -18,14 +54,14 @@ router = APIRouter()
 @router.post("/generate", response_model=JobResponse, status_code=status.HTTP_202_ACCEPTED)
 async def generate_leads(
     job_in: JobCreate,
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     """Queue a new lead generation job."""
     # Normally we would retrieve the user from an auth dependency mechanism.
     # For now, we assume a preconfigured user with ID 1 exists.
     # In a real scenario, remove this block and inject current_user.
     user_stmt = select(User).where(User.id == 1)
-    user = db.execute(user_stmt).scalars().first()
+    user = (await db.execute(user_stmt)).scalars().first()
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -36,34 +72,116 @@ async def generate_leads(
         user_id=user.id,
         intent=job_in.intent,
         lead_count=job_in.lead_count,
-        status="pending"
+        search_params=job_in.search_params.model_dump(exclude_none=True),
+        status="pending",
+        # Known before enqueueing, so a cancel can always revoke the task
+        task_id=uuid(),
     )
     db.add(new_job)
-    db.commit()
-    db.refresh(new_job)
+    await db.commit()
+    await db.refresh(new_job)
     
-    # Process scraping jobs asynchronously via Celery
-    generate_leads_task.delay(new_job.id)
+    # Process scraping jobs asynchronously via Celery, on the queue tier for its size
+    enqueue_job(
+        scrape_leads_task, new_job, new_job.search_params, new_job.lead_count, task_id=new_job.task_id
+    )
 
     return new_job
 
 
 from datetime import datetime, timezone
 
+@router.get("/search", response_model=LeadSearchPage)
+async def search_user_leads(
+    q: str = Query(min_length=1, max_length=200, description="Words to find in name, company or title."),
+    cursor: Optional[str] = Query(default=None, description="`next_cursor` from the previous page."),
+    limit: int = Query(default=50, ge=1, le=200),
+    principal: Principal = Depends(get_current_user),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Ranked full-text search over the current user's leads across all jobs.
+
+    Pass the returned `next_cursor` back as `cursor` (with the same `q`) for
+    the next page; it is null on the last page.
+    """
+    after = None
+    if cursor is not None:
+        try:
+            after = decode_search_cursor(cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
+
+    hits = await search_leads(db, principal.id, q, limit + 1, after)
+    next_cursor = None
+    if len(hits) > limit:
+        lead, score = hits[limit - 1]
+        next_cursor = encode_search_cursor(score, lead.id)
+
+    items = [
+        LeadSearchHit(**LeadResponse.model_validate(lead).model_dump(), job_id=lead.job_id, score=score)
+        for lead, score in hits[:limit]
+    ]
+    return LeadSearchPage(items=items, next_cursor=next_cursor)
+
+
 @router.get("/jobs/{job_id}", response_model=JobResponse)
-async def get_job_status(job_id: int, db: Session = Depends(get_db)):
+async def get_job_status(job_id: int, db: AsyncSession = Depends(get_async_db)):
     """Poll the status of a lead-generation job."""
-    job = db.get(Job, job_id)
+    job = await db.get(Job, job_id)
     if not job:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
     
     return job
 
 
+@router.get("/jobs/{job_id}/events")
+async def stream_job_events(
+    job_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    redis_client: aioredis.Redis = Depends(get_redis),
+):
+    """
+    Server-Sent Events stream of a job's status and progress.
+
+    Emits the current state immediately, then one `job` event per change until the
+    job completes, fails or is cancelled. State is served from Redis; PostgreSQL is
+    only read when no snapshot has been published for the job yet, or when Redis
+    is unavailable.
+    """
+    try:
+        snapshot = await read_job_state(redis_client, job_id)
+    except RedisError as e:
+        logger.warning(f"Could not read state for job {job_id}, falling back to the database: {e}")
+        snapshot = None
+    if snapshot is None:
+        job = await db.get(Job, job_id)
+        if not job:
+            raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+        # Seed the snapshot so later subscribers skip the database entirely
+        await apublish_job_state(redis_client, job)
+        snapshot = job_snapshot(job)
+
+    return StreamingResponse(
+        iter_job_events(redis_client, job_id, snapshot),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
 @router.post("/jobs/{job_id}/cancel", response_model=JobResponse)
-async def cancel_job(job_id: int, db: Session = Depends(get_db)):
-    """Cancel a pending or processing job."""
-    job = db.get(Job, job_id)
+async def cancel_job(
+    job_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    redis_client: aioredis.Redis = Depends(get_redis),
+):
+    """
+    Cancel a pending or processing job.
+
+    A queued task is revoked; a running one sees the Redis cancellation flag
+    between pages / batches and stops within seconds.
+    """
+    job = await db.get(Job, job_id)
     
     if not job:
         raise HTTPException(
@@ -79,35 +197,122 @@ async def cancel_job(job_id: int, db: Session = Depends(get_db)):
         
     job.status = "cancelled"
     job.completed_at = datetime.now(timezone.utc)
-    db.commit()
-    db.refresh(job)
+    await db.commit()
+    await db.refresh(job)
+    await request_cancel(redis_client, job.id)
+    await apublish_job_state(redis_client, job)
+    if job.task_id:
+        await run_in_threadpool(_revoke_task, job.task_id)
     
     return job
 
 
-@router.get("/jobs/{job_id}/results", response_model=List[LeadResponse])
-async def get_job_results(job_id: int, skip: int = 0, limit: int = 100, db: Session = Depends(get_db)):
-    """Retrieve the scraped leads for a completed job."""
-    job = db.get(Job, job_id)
+def _revoke_task(task_id: str) -> None:
+    """Tell the workers to discard `task_id` if it has not started (best-effort)."""
+    try:
+        celery_app.control.revoke(task_id)
+    except Exception as e:
+        logger.warning(f"Could not revoke task {task_id}: {e}")
+
+
+@router.get("/jobs/{job_id}/results", response_model=LeadPage)
+async def get_job_results(
+    job_id: int,
+    cursor: Optional[str] = Query(default=None, description="`next_cursor` from the previous page."),
+    limit: int = Query(default=100, ge=1, le=1000),
+    order_by: Literal[RESULT_ORDERINGS] = Query(
+        default="id", description="Sort key; prefix with '-' for descending (e.g. '-confidence')."
+    ),
+    min_confidence: Optional[float] = Query(default=None, ge=0, le=1),
+    company: Optional[str] = Query(default=None, description="Exact company name, case-insensitive."),
+    email_domain: Optional[str] = Query(default=None, description="e.g. 'company.com'."),
+    engine: Literal["orm", "columns"] = Query(
+        default="orm",
+        description="'columns' selects only the response columns and writes them with orjson, "
+        "skipping per-row validation; the response is the same.",
+    ),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Retrieve the scraped leads for a completed job, optionally filtered and sorted.
+
+    Pages are keyset-paginated on (sort key, id): pass the returned `next_cursor`
+    back as `cursor`, with the same `order_by`, to fetch the following page.
+    `next_cursor` is null on the last page.
+    """
+    job = await db.get(Job, job_id)
     if not job:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
         
     if job.status != "completed":
-        return []
+        return LeadPage(items=[], next_cursor=None)
+
+    after = None
+    if cursor is not None:
+        try:
+            after = decode_cursor(order_by, cursor)
+        except ValueError as e:
+            raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(e))
         
-    stmt = select(Lead).where(Lead.job_id == job_id).offset(skip).limit(limit)
-    leads = db.execute(stmt).scalars().all()
+    # Fetch one extra row to know whether another page exists without a COUNT(*)
+    stmt = lead_page_stmt(
+        job_id, after, limit + 1,
+        order_by=order_by, min_confidence=min_confidence, company=company, email_domain=email_domain,
+        projected=engine == "columns",
+    )
+    if engine == "columns":
+        rows = (await db.execute(stmt)).all()
+        return Response(render_lead_page(rows, limit, order_by), media_type="application/json")
+
+    leads = (await db.execute(stmt)).scalars().all()
+    next_cursor = encode_cursor(order_by, leads[limit - 1]) if len(leads) > limit else None
     
-    return leads
+    return LeadPage(items=leads[:limit], next_cursor=next_cursor)
+
+
+@router.get("/jobs/{job_id}/stats", response_model=JobStatsResponse)
+async def get_job_stats(
+    job_id: int,
+    top: int = Query(default=10, ge=1, le=100, description="Length of the top company / domain lists."),
+    db: AsyncSession = Depends(get_async_db),
+):
+    """
+    Lead count, email coverage, average confidence and the most frequent
+    companies and email domains of a job.
+
+    Aggregates are maintained as leads are ingested, so this never scans the
+    job's leads and is available while the job is still running.
+    """
+    job = await db.get(Job, job_id)
+    if not job:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
+
+    stats = await read_job_stats(db, job_id, top)
+    return JobStatsResponse(job_id=job_id, status=job.status, **stats)
 
 
 @router.get("/jobs/{job_id}/export")
-async def export_job_results(job_id: int, db: Session = Depends(get_db)):
+async def export_job_results(
+    job_id: int,
+    format: Literal["csv", "ndjson", "parquet"] = Query(default="csv"),
+    engine: Literal["orm", "copy"] = Query(
+        default="orm",
+        description="CSV only: 'copy' streams straight from PostgreSQL COPY without building ORM objects.",
+    ),
+    gzip: bool = Query(default=False, description="Compress the stream with Content-Encoding: gzip."),
+    db: AsyncSession = Depends(get_async_db),
+):
     """
-    Stream the scraped leads for a completed job as a CSV file to the client directly
-    from PostgreSQL (bypassing the need for S3 cloud storage).
+    Stream the scraped leads for a completed job as a CSV, NDJSON or Parquet file to the
+    client directly from PostgreSQL (bypassing the need for S3 cloud storage).
     """
-    job = db.get(Job, job_id)
+    if engine == "copy" and format != "csv":
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="engine=copy is only available for format=csv.",
+        )
+
+    job = await db.get(Job, job_id)
     if not job:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Job not found")
     
@@ -115,42 +320,22 @@ async def export_job_results(job_id: int, db: Session = Depends(get_db)):
     # if job.status != "completed":
     #    raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Job is not completed yet.")
 
-    def iter_csv():
-        # Using a generator avoids loading all records into memory at once
-        output = io.StringIO()
-        writer = csv.writer(output)
-        
-        # Write header
-        writer.writerow(["ID", "Name", "Email", "Company", "Title", "Source URL", "Confidence%"])
-        yield output.getvalue()
-        output.seek(0)
-        output.truncate(0)
-
-        # Iterate over results chunks locally
-        chunk_size = 500
-        offset = 0
-        while True:
-            stmt = select(Lead).where(Lead.job_id == job_id).offset(offset).limit(chunk_size)
-            chunk = db.execute(stmt).scalars().all()
-            if not chunk:
-                break
-                
-            for lead in chunk:
-                writer.writerow([
-                    lead.id,
-                    lead.name or "",
-                    lead.email or "",
-                    lead.company or "",
-                    lead.title or "",
-                    lead.source_url or "",
-                    round((lead.confidence or 0.0) * 100, 2)
-                ])
-                
-            yield output.getvalue()
-            output.seek(0)
-            output.truncate(0)
-            offset += chunk_size
-            
-    response = StreamingResponse(iter_csv(), media_type="text/csv")
-    response.headers["Content-Disposition"] = f"attachment; filename=leads_job_{job_id}.csv"
-    return response
+    # Generators avoid loading all records into memory at once
+    if format == "ndjson":
+        chunks = iter_ndjson(db, job_id)
+    elif format == "parquet":
+        chunks = iter_parquet(db, job_id)
+    elif engine == "copy":
+        chunks = iter_csv_native(db, job_id)
+    else:
+        chunks = iter_csv_orm(db, job_id)
+
+    # The stream outlives this handler, so it takes over closing the session
+    chunks = close_after(db, chunks)
+
+    headers = {"Content-Disposition": f"attachment; filename=leads_job_{job_id}.{format}"}
+    if gzip:
+        chunks = gzip_stream(chunks)
+        headers["Content-Encoding"] = "gzip"
+
+    return StreamingResponse(chunks, media_type=MEDIA_TYPES[format], headers=headers)
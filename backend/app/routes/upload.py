@@ -4,19 +4,52 @@ File upload route (resume / business brief).
 
 from fastapi import APIRouter, UploadFile, File, HTTPException
 
+from app.services.ai_engine import parse_resume
+from app.uploads import (
+    ExtractionPoolSaturated,
+    UnreadableDocument,
+    stage_upload,
+    text_of_upload,
+)
+
 router = APIRouter()
 
 
 @router.post("/resume")
 async def upload_resume(file: UploadFile = File(...)):
-    """Accept a resume file and extract text for the AI context engine."""
+    """
+    Accept a resume file, extract its text and derive search parameters from it.
+
+    The body is capped at UPLOAD_MAX_BYTES (413, see `UploadSizeLimitMiddleware`);
+    text extraction runs in a process pool and is skipped for content seen before.
+    """
     if file.content_type not in ("application/pdf", "text/plain"):
         raise HTTPException(status_code=400, detail="Only PDF and TXT files are accepted.")
 
-    contents = await file.read()
-    # TODO: parse resume text, send to AI engine
+    staged = await stage_upload(file.file)
+    try:
+        text, cached = await text_of_upload(staged, file.content_type)
+    except ExtractionPoolSaturated:
+        raise HTTPException(
+            status_code=503,
+            detail="Too many uploads are being processed, try again shortly.",
+            headers={"Retry-After": "1"},
+        )
+    except UnreadableDocument as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    finally:
+        staged.discard()
+        await file.close()
+
+    if not text:
+        raise HTTPException(status_code=422, detail="No text could be extracted from the file.")
+
+    search_params = await parse_resume(text)
     return {
         "filename": file.filename,
-        "size_bytes": len(contents),
-        "message": "Resume uploaded successfully. Processing will begin shortly.",
+        "size_bytes": staged.size,
+        "content_sha256": staged.sha256,
+        "text_cached": cached,
+        "search_params": search_params,
+        "message": "Resume processed successfully.",
     }
@@ -3,9 +3,9 @@ Pydantic schemas for request / response validation.
 """
 
 from datetime import datetime
-from typing import Optional, Literal
+from typing import Any, Dict, List, Optional, Literal, Union
 
-from pydantic import BaseModel, EmailStr, Field, ConfigDict
+from pydantic import BaseModel, EmailStr, Field, ConfigDict, model_validator
 
 
 # ---------------------------------------------------------------------------
@@ -26,6 +26,15 @@ class UserResponse(BaseModel):
     model_config = ConfigDict(from_attributes=True)
 
 
+class Principal(BaseModel):
+    """The authenticated user as seen by protected routes (cached between requests)."""
+    id: int
+    email: str
+    is_active: bool
+
+    model_config = ConfigDict(from_attributes=True)
+
+
 class TokenResponse(BaseModel):
     access_token: str
     token_type: str = "bearer"
@@ -34,17 +43,37 @@ class TokenResponse(BaseModel):
 # ---------------------------------------------------------------------------
 # Job
 # ---------------------------------------------------------------------------
+class SearchParams(BaseModel):
+    """What a job searches for, as returned by `/api/upload/resume` (app.services.ai_engine)."""
+    keywords: List[str] = []
+    job_titles: List[str] = []
+    industries: List[str] = []
+    location: Optional[str] = None
+    experience_level: Optional[str] = None
+
+    @model_validator(mode="after")
+    def _has_query(self) -> "SearchParams":
+        # The scraper's queries are built from titles and keywords
+        if not any(value.strip() for value in self.job_titles + self.keywords):
+            raise ValueError("search_params needs at least one job title or keyword")
+        return self
+
+
 class JobCreate(BaseModel):
     intent: Literal["career", "growth", "sales"] = "career"
     lead_count: int = Field(default=100, ge=1, le=1000)
+    search_params: SearchParams
 
 
 class JobResponse(BaseModel):
     id: int
     intent: str
     lead_count: int
+    search_params: Optional[Dict[str, Any]] = None
     status: str
     progress: int
+    duplicates_dropped: int = 0
+    known_leads: int = 0
     error_message: Optional[str] = None
     started_at: Optional[datetime] = None
     completed_at: Optional[datetime] = None
@@ -67,3 +96,38 @@ class LeadResponse(BaseModel):
     confidence: float
 
     model_config = ConfigDict(from_attributes=True)
+
+
+class LeadPage(BaseModel):
+    items: List[LeadResponse]
+    # The last id when ordered by id, an opaque token for other orderings
+    next_cursor: Optional[Union[int, str]] = None
+
+
+class LeadSearchHit(LeadResponse):
+    job_id: int
+    score: float  # Lower ranks higher
+
+
+class LeadSearchPage(BaseModel):
+    items: List[LeadSearchHit]
+    next_cursor: Optional[str] = None
+
+
+class StatCount(BaseModel):
+    value: str
+    count: int
+
+
+class JobStatsResponse(BaseModel):
+    job_id: int
+    status: str
+    lead_count: int
+    with_email: int
+    average_confidence: Optional[float] = None
+    top_companies: List[StatCount]
+    top_email_domains: List[StatCount]
+    pages_cached: int = 0
+    pages_revalidated: int = 0
+    pages_downloaded: int = 0
+    page_cache_hit_rate: Optional[float] = None
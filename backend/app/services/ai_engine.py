@@ -1,16 +1,28 @@
 """
 AI Context Engine — Uses OpenAI GPT-4o to parse resumes and generate
 dynamic search queries for the scraper.
+
+Parsed results are cached in a two-tier cache (in-process LRU + Redis) keyed by
+a hash of the normalized input text, the prompt and the model, so re-running a
+job on the same resume or brief does not call the API again.
 """
 
+import asyncio
+import hashlib
+import json
+import re
+import unicodedata
 from typing import Any, Dict
 
 from openai import OpenAI
 
 from app.config import settings
+from app.services.cache import TwoTierCache
 
 client = OpenAI(api_key=settings.OPENAI_API_KEY)
 
+MODEL = "gpt-4o"
+
 SYSTEM_PROMPT = """You are the AI Context Engine for Lead Gen Tool.
 Given a user's resume or business brief, extract the following entities and
 return them as a JSON object:
@@ -21,11 +33,40 @@ return them as a JSON object:
 - experience_level: Junior, Mid, Senior, or Lead
 """
 
+resume_cache = TwoTierCache(
+    "ai:parse_resume",
+    maxsize=settings.AI_CACHE_MAX_ENTRIES,
+    ttl=settings.AI_CACHE_TTL_SECONDS,
+)
+
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_text(text: str) -> str:
+    """Canonical form used for cache keys: NFKC, collapsed whitespace, trimmed."""
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFKC", text)).strip()
+
+
+def cache_key(resume_text: str) -> str:
+    """Content address of a parse: changes whenever the input, prompt or model changes."""
+    digest = hashlib.sha256()
+    for part in (MODEL, SYSTEM_PROMPT, normalize_text(resume_text)):
+        digest.update(part.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
 
 async def parse_resume(resume_text: str) -> Dict[str, Any]:
     """Send resume text to GPT-4o and return structured search parameters."""
-    response = client.chat.completions.create(
-        model="gpt-4o",
+    key = cache_key(resume_text)
+    cached = await resume_cache.get(key)
+    if cached is not None:
+        return cached
+
+    # The OpenAI client is blocking; keep the call off the event loop
+    response = await asyncio.to_thread(
+        client.chat.completions.create,
+        model=MODEL,
         response_format={"type": "json_object"},
         messages=[
             {"role": "system", "content": SYSTEM_PROMPT},
@@ -33,5 +74,6 @@ async def parse_resume(resume_text: str) -> Dict[str, Any]:
         ],
     )
 
-    import json
-    return json.loads(response.choices[0].message.content)
+    search_params = json.loads(response.choices[0].message.content)
+    await resume_cache.set(key, search_params)
+    return search_params
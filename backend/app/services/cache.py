@@ -0,0 +1,164 @@
+"""
+Two-tier cache — a bounded in-process LRU in front of a shared Redis tier.
+
+Lookups hit the local LRU first, then Redis (promoting hits into the LRU), and
+report a miss otherwise. Both tiers honour the same TTL unless a shorter
+`local_ttl` is given, which bounds how long another process's deletes can go
+unnoticed here. Values must be JSON-serializable. Redis errors degrade to a
+miss instead of failing the caller.
+
+Every lookup and Redis error is counted in `cache_lookups` /
+`cache_redis_errors`, labelled with the namespace; `stats()` keeps the same
+numbers per instance.
+"""
+
+import json
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import redis
+from redis import asyncio as aioredis
+from redis.exceptions import RedisError
+
+from app.metrics import CACHE_LOOKUPS, CACHE_REDIS_ERRORS
+from app.redis import get_async_redis
+
+logger = logging.getLogger(__name__)
+
+
+class TwoTierCache:
+    """
+    Args:
+        namespace: Prefix for the Redis keys, e.g. "ai:parse_resume".
+        maxsize: Maximum entries kept in the in-process LRU.
+        ttl: Seconds an entry stays valid in either tier.
+        redis_factory: Returns the asyncio Redis client to use; pass None for a
+            local-only cache.
+        local_ttl: Seconds an entry stays in the in-process LRU (default: ttl).
+    """
+
+    def __init__(
+        self,
+        namespace: str,
+        maxsize: int,
+        ttl: int,
+        redis_factory: Optional[Callable[[], aioredis.Redis]] = get_async_redis,
+        local_ttl: Optional[int] = None,
+    ):
+        self.namespace = namespace
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.local_ttl = min(local_ttl, ttl) if local_ttl is not None else ttl
+        self.redis_factory = redis_factory
+        self._local: "OrderedDict[str, Tuple[float, Any]]" = OrderedDict()
+        self.local_hits = 0
+        self.redis_hits = 0
+        self.misses = 0
+        self.errors = 0
+        self._lookups = {
+            (tier, result): CACHE_LOOKUPS.labels(namespace, tier, result)
+            for tier, result in (("local", "hit"), ("local", "miss"), ("redis", "hit"), ("redis", "miss"), ("redis", "error"))
+        }
+
+    def _redis_key(self, key: str) -> str:
+        return f"cache:{self.namespace}:{key}"
+
+    def _redis_error(self, operation: str, error: RedisError) -> None:
+        self.errors += 1
+        CACHE_REDIS_ERRORS.labels(self.namespace, operation).inc()
+        logger.warning(f"Cache '{self.namespace}' Redis {operation} failed: {error}")
+
+    def _get_local(self, key: str) -> Optional[Any]:
+        entry = self._local.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            del self._local[key]
+            return None
+        self._local.move_to_end(key)
+        return value
+
+    def _set_local(self, key: str, value: Any, ttl: float) -> None:
+        self._local[key] = (time.monotonic() + ttl, value)
+        self._local.move_to_end(key)
+        while len(self._local) > self.maxsize:
+            self._local.popitem(last=False)
+
+    async def get(self, key: str) -> Optional[Any]:
+        value = self._get_local(key)
+        if value is not None:
+            self.local_hits += 1
+            self._lookups["local", "hit"].inc()
+            return value
+        self._lookups["local", "miss"].inc()
+
+        if self.redis_factory is not None:
+            try:
+                client = self.redis_factory()
+                pipe = client.pipeline(transaction=False)
+                pipe.get(self._redis_key(key))
+                pipe.ttl(self._redis_key(key))
+                raw, remaining = await pipe.execute()
+            except RedisError as e:
+                self._redis_error("read", e)
+                self._lookups["redis", "error"].inc()
+                raw = None
+            else:
+                self._lookups["redis", "hit" if raw is not None else "miss"].inc()
+            if raw is not None:
+                value = json.loads(raw)
+                # Don't let the local copy outlive the shared one
+                remaining = remaining if remaining and remaining > 0 else self.ttl
+                self._set_local(key, value, min(remaining, self.local_ttl))
+                self.redis_hits += 1
+                return value
+
+        self.misses += 1
+        return None
+
+    async def set(self, key: str, value: Any) -> None:
+        self._set_local(key, value, self.local_ttl)
+        if self.redis_factory is None:
+            return
+        try:
+            await self.redis_factory().set(self._redis_key(key), json.dumps(value), ex=self.ttl)
+        except RedisError as e:
+            self._redis_error("write", e)
+
+    async def delete(self, key: str) -> None:
+        self._local.pop(key, None)
+        if self.redis_factory is None:
+            return
+        try:
+            await self.redis_factory().delete(self._redis_key(key))
+        except RedisError as e:
+            self._redis_error("delete", e)
+
+    def delete_sync(self, key: str, client: Optional[redis.Redis]) -> None:
+        """`delete` for sync callers (e.g. ORM event hooks), through a sync Redis client."""
+        self._local.pop(key, None)
+        if self.redis_factory is None or client is None:
+            return
+        try:
+            client.delete(self._redis_key(key))
+        except RedisError as e:
+            self._redis_error("delete", e)
+
+    def delete_local(self, key: str) -> None:
+        self._local.pop(key, None)
+
+    def clear_local(self) -> None:
+        self._local.clear()
+
+    def stats(self) -> Dict[str, int]:
+        """Hit/miss counters since process start, plus the current LRU size."""
+        return {
+            "local_hits": self.local_hits,
+            "redis_hits": self.redis_hits,
+            "misses": self.misses,
+            "errors": self.errors,
+            "local_size": len(self._local),
+        }
@@ -0,0 +1,83 @@
+"""
+Job Cancellation — Lets a running job notice it was cancelled and stop early.
+
+`cancel_job` writes the cancellation time to a per-job Redis key next to the
+`cancelled` status in PostgreSQL. Workers hold a `CancellationToken` for the
+job they run: the scraping engine polls it between pages and `LeadIngestor`
+before every batch, at most once per CANCEL_CHECK_INTERVAL_SECONDS, so a check
+costs a Redis GET now and then rather than a database query. Once it fires,
+the worker drops the rest of the job and records how long it took from the
+cancel request to the stop.
+"""
+
+import logging
+import time
+from typing import Optional
+
+import redis
+from redis import asyncio as aioredis
+from redis.exceptions import RedisError
+
+from app.config import settings
+from app.metrics import JOB_CANCEL_STOP_SECONDS
+
+logger = logging.getLogger(__name__)
+
+
+class JobCancelled(Exception):
+    """Raised inside a worker when its job has been cancelled."""
+
+    def __init__(self, job_id: int):
+        super().__init__(f"Job {job_id} was cancelled")
+        self.job_id = job_id
+
+
+def cancel_key(job_id: int) -> str:
+    return f"jobs:{job_id}:cancel"
+
+
+async def request_cancel(client: aioredis.Redis, job_id: int) -> None:
+    """Flag the job as cancelled for its workers (best-effort, like job events)."""
+    try:
+        await client.set(cancel_key(job_id), repr(time.time()), ex=settings.JOB_STATE_TTL_SECONDS)
+    except RedisError as e:
+        logger.warning(f"Could not flag job {job_id} as cancelled: {e}")
+
+
+class CancellationToken:
+    """A worker's view of one job's cancellation flag."""
+
+    def __init__(self, client: redis.Redis, job_id: int, interval: Optional[float] = None):
+        self.client = client
+        self.job_id = job_id
+        self.key = cancel_key(job_id)
+        self.interval = settings.CANCEL_CHECK_INTERVAL_SECONDS if interval is None else interval
+        self.requested_at: Optional[float] = None
+        self._next_check = 0.0
+
+    def cancelled(self) -> bool:
+        if self.requested_at is not None:
+            return True
+        now = time.monotonic()
+        if now < self._next_check:
+            return False
+        self._next_check = now + self.interval
+        try:
+            value = self.client.get(self.key)
+        except RedisError:
+            return False
+        if value is not None:
+            self.requested_at = float(value)
+        return self.requested_at is not None
+
+    def raise_if_cancelled(self) -> None:
+        if self.cancelled():
+            raise JobCancelled(self.job_id)
+
+    def stopped(self) -> None:
+        """Record that the worker has let go of the cancelled job."""
+        if self.requested_at is None:
+            return
+        latency = max(0.0, time.time() - self.requested_at)
+        JOB_CANCEL_STOP_SECONDS.observe(latency)
+        logger.info(f"Job {self.job_id}: stopped {latency:.2f}s after it was cancelled")
@@ -0,0 +1,58 @@
+"""
+Scrape Checkpoints — Where an interrupted scrape picks up again.
+
+A scraping task saves its `CrawlState` (pages done, URLs still pending, leads
+collected) to Redis every SCRAPER_CHECKPOINT_PAGES pages. When the task is
+delivered again — a retry, or a redelivery after the worker was lost
+(`acks_late`) — it resumes from the last checkpoint instead of crawling the
+whole plan again.
+
+Leads are either stored in the database before each checkpoint is saved (the
+single-task path) or kept with the checkpoint (`save(..., leads)`, used by
+shards, whose leads are only stored by the merge step). Keys are scoped to one
+job and part (`main` or `shard-<n>`) and expire with the other job state.
+"""
+
+import json
+from typing import Any, Dict, List, Optional, Tuple
+
+import redis
+
+from app.config import settings
+from app.services.scraper import CrawlState
+
+
+def checkpoint_key(job_id: int, part: str = "main") -> str:
+    return f"jobs:{job_id}:checkpoint:{part}"
+
+
+class ScrapeCheckpoint:
+    """Last saved crawl state (and optionally its leads) of one job part."""
+
+    def __init__(self, client: redis.Redis, job_id: int, part: str = "main"):
+        self.client = client
+        self.key = checkpoint_key(job_id, part)
+        self.leads_key = f"{self.key}:leads"
+
+    def load(self) -> Tuple[Optional[CrawlState], List[Dict[str, Any]]]:
+        """(state, leads kept with the checkpoint); state is None if nothing was saved."""
+        pipe = self.client.pipeline()
+        pipe.get(self.key)
+        pipe.lrange(self.leads_key, 0, -1)
+        raw_state, raw_leads = pipe.execute()
+        if raw_state is None:
+            return None, []
+        return CrawlState.from_dict(json.loads(raw_state)), [json.loads(lead) for lead in raw_leads]
+
+    def save(self, state: CrawlState, leads: Optional[List[Dict[str, Any]]] = None) -> None:
+        """Store `state`, appending `leads` to the kept ones, in one transaction."""
+        ttl = settings.JOB_STATE_TTL_SECONDS
+        pipe = self.client.pipeline()
+        if leads:
+            pipe.rpush(self.leads_key, *(json.dumps(lead, default=str) for lead in leads))
+            pipe.expire(self.leads_key, ttl)
+        pipe.set(self.key, json.dumps(state.to_dict()), ex=ttl)
+        pipe.execute()
+
+    def clear(self) -> None:
+        self.client.delete(self.key, self.leads_key)
@@ -0,0 +1,212 @@
+"""
+Contact Store — One canonical row per person found by any job.
+
+A job's leads are `job_leads` rows pointing at `contacts`: the person's
+details are stored once, however many jobs find them. `LeadIngestor` calls
+`record_contacts` with every batch it writes, in the same transaction: each
+lead is upserted into `contacts` by `contact_fingerprint` (the email, else
+name, company and source URL together) and comes back as a `job_leads` row
+unless the job already has that contact.
+
+Before a job scrapes, `known_contacts` looks for contacts that already match
+its search parameters and that the user has not received yet, so the worker
+can serve part of `lead_count` from the store and scrape only the rest.
+"""
+
+import hashlib
+import re
+import unicodedata
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import and_, func, or_, select, tuple_
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.models import Contact, Job, JobLead
+from app.services.dedup import normalize_email, normalize_url, normalize_words
+
+CONTACT_FIELDS = ("name", "email", "email_domain", "company", "title", "source_url", "confidence")
+# Candidate contacts fetched per query while matching titles word by word
+KNOWN_CONTACTS_CHUNK = 200
+_WORD = re.compile(r"\w+")
+
+
+def contact_fingerprint(lead: Dict[str, Any]) -> str:
+    """
+    The fingerprint a contact is keyed by: the email, else name, company and
+    source URL together. Unlike de-duplication, which drops a lead on any
+    matching fingerprint, this must never merge two people, so a name or a URL
+    alone (several people can share a listing page) is not enough.
+    """
+    email = normalize_email(lead.get("email"))
+    parts = [lead.get("name") or "", lead.get("company") or "", lead.get("source_url") or ""]
+    if email:
+        key = f"email:{email}"
+    elif any(part.strip() for part in parts):
+        key = f"person:{normalize_words(parts[0])}|{normalize_words(parts[1])}|{normalize_url(parts[2]) or ''}"
+    else:
+        # Leads that identify nobody are still stored; identical ones share a contact
+        key = "lead:" + "|".join(str(lead.get(field) or "") for field in ("name", "email", "company", "title", "source_url"))
+    return hashlib.sha1(key.encode("utf-8")).hexdigest()
+
+
+def _dialect_insert(db: Session):
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        return None
+    return dialect_insert
+
+
+def record_contacts(
+    db: Session, job_id: int, rows: Iterable[Dict[str, Any]], refresh: bool = True
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Upsert a batch of lead rows into `contacts`, inside the caller's
+    transaction. With `refresh=False` (rows served from the store itself)
+    existing contacts are left as they are.
+
+    Returns the rows whose contact the job does not have yet (repeats within
+    the batch count once) and their `job_leads` rows, for the caller to insert.
+    """
+    now = datetime.now(timezone.utc)
+    keyed: List[Tuple[str, Dict[str, Any]]] = []
+    contacts: Dict[str, Dict[str, Any]] = {}
+    for row in rows:
+        fingerprint = contact_fingerprint(row)
+        keyed.append((fingerprint, row))
+        # One row per fingerprint: an upsert may not touch the same row twice
+        contacts.setdefault(fingerprint, {
+            "fingerprint": fingerprint,
+            **{field: row.get(field) for field in CONTACT_FIELDS},
+            "confidence": row.get("confidence") or 0.0,
+            "seen_at": now,
+        })
+    if not contacts:
+        return [], []
+
+    dialect_insert = _dialect_insert(db)
+    if dialect_insert is None:
+        _record_portable(db, contacts, refresh)
+    else:
+        stmt = dialect_insert(Contact)
+        if refresh:
+            # Keep what earlier scrapes knew when this one found less
+            stmt = stmt.on_conflict_do_update(
+                index_elements=[Contact.fingerprint],
+                set_={
+                    **{
+                        field: func.coalesce(stmt.excluded[field], getattr(Contact, field))
+                        for field in CONTACT_FIELDS if field != "confidence"
+                    },
+                    "confidence": stmt.excluded.confidence,
+                    "seen_at": stmt.excluded.seen_at,
+                },
+            )
+        else:
+            stmt = stmt.on_conflict_do_nothing(index_elements=[Contact.fingerprint])
+        db.execute(stmt, list(contacts.values()))
+
+    ids = dict(db.execute(
+        select(Contact.fingerprint, Contact.id).where(Contact.fingerprint.in_(list(contacts)))
+    ).all())
+    # One writer per job (the task or the merge step), so checking first is enough
+    linked = set(db.execute(
+        select(JobLead.contact_id).where(JobLead.job_id == job_id, JobLead.contact_id.in_(list(ids.values())))
+    ).scalars())
+    new_rows: List[Dict[str, Any]] = []
+    links: List[Dict[str, Any]] = []
+    for fingerprint, row in keyed:
+        contact_id = ids[fingerprint]
+        if contact_id in linked:
+            continue
+        linked.add(contact_id)
+        new_rows.append(row)
+        links.append({
+            "job_id": job_id,
+            "contact_id": contact_id,
+            "confidence": row.get("confidence") or 0.0,
+            "created_at": row.get("created_at") or now,
+        })
+    return new_rows, links
+
+
+def _record_portable(db: Session, contacts: Dict[str, Dict[str, Any]], refresh: bool) -> None:
+    existing = {
+        contact.fingerprint: contact
+        for contact in db.execute(select(Contact).where(Contact.fingerprint.in_(list(contacts)))).scalars()
+    }
+    for fingerprint, values in contacts.items():
+        contact = existing.get(fingerprint)
+        if contact is None:
+            db.add(Contact(**values))
+        elif refresh:
+            for field, value in values.items():
+                if value is not None:
+                    setattr(contact, field, value)
+    db.flush()
+
+
+def _title_words(title: Optional[str]) -> Tuple[str, ...]:
+    """The lower-cased words of a job title, punctuation dropped ("Head-of-Data" -> head, of, data)."""
+    return tuple(_WORD.findall(unicodedata.normalize("NFKC", title or "").lower()))
+
+
+def _has_words(words: Tuple[str, ...], wanted: Tuple[str, ...]) -> bool:
+    size = len(wanted)
+    return any(words[start:start + size] == wanted for start in range(len(words) - size + 1))
+
+
+def known_contacts(db: Session, user_id: int, search_params: Dict[str, Any], limit: int) -> List[Dict[str, Any]]:
+    """
+    Up to `limit` fresh contacts whose title matches one of the job titles in
+    `search_params` and that none of the user's jobs has delivered yet, as
+    lead dicts, most recently scraped first.
+
+    A title matches when it contains the job title's words as whole words, in
+    order ("Deputy Head of Data" matches "head of data"; "Director" does not
+    match "CTO"). The database narrows the candidates by substring, and the
+    word check runs here, walking the candidates in chunks until `limit` match.
+    Contacts carry no keyword or location data, so only the titles are matched.
+    """
+    wanted = {_title_words(title) for title in search_params.get("job_titles") or []}
+    wanted.discard(())
+    if not wanted or limit <= 0:
+        return []
+
+    cutoff = datetime.now(timezone.utc) - timedelta(days=settings.CONTACT_MAX_AGE_DAYS)
+    received = (
+        select(JobLead.contact_id)
+        .join(Job, Job.id == JobLead.job_id)
+        .where(JobLead.contact_id == Contact.id, Job.user_id == user_id)
+    )
+    # Every word occurring somewhere in the title is necessary for a whole-word match
+    lowered = func.lower(Contact.title)
+    stmt = (
+        select(Contact)
+        .where(
+            Contact.seen_at >= cutoff,
+            or_(*(and_(*(lowered.contains(word, autoescape=True) for word in words)) for words in wanted)),
+            ~received.exists(),
+        )
+        .order_by(Contact.seen_at.desc(), Contact.id.desc())
+    )
+    chunk = max(limit, KNOWN_CONTACTS_CHUNK)
+
+    found: List[Dict[str, Any]] = []
+    after = None
+    while len(found) < limit:
+        page = stmt if after is None else stmt.where(tuple_(Contact.seen_at, Contact.id) < tuple_(*after))
+        contacts = db.execute(page.limit(chunk)).scalars().all()
+        for contact in contacts:
+            words = _title_words(contact.title)
+            if any(_has_words(words, title) for title in wanted):
+                found.append({field: getattr(contact, field) for field in CONTACT_FIELDS})
+        if len(contacts) < chunk:
+            break
+        after = (contacts[-1].seen_at, contacts[-1].id)
+    return found[:limit]
@@ -0,0 +1,381 @@
+"""
+Lead De-duplication — Drops leads a user has already received in earlier jobs.
+
+Each lead is reduced to up to three fingerprints (normalized email, normalized
+source URL, name + company). A lead is a duplicate if any of its fingerprints
+has been seen before for the same user. `source_url` must be the lead's own
+profile URL: the extractor leaves it empty rather than filling in the listing
+page, which every lead on that page shares.
+
+Lookups go through a per-user scalable Bloom filter kept in Redis, so memory
+stays bounded no matter how many leads a user accumulates. Bloom negatives
+are trusted. Bloom positives are confirmed exactly against the
+`lead_fingerprints` table, which is also used to rebuild the filter if Redis
+loses it or misses an update. A rebuild is written under a temporary key and
+renamed into place once complete, by one job at a time per user.
+"""
+
+import hashlib
+import logging
+import math
+import re
+import time
+import unicodedata
+import uuid
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+import redis
+from redis.exceptions import RedisError, WatchError
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.models import LeadFingerprint
+
+logger = logging.getLogger(__name__)
+
+# A rebuild lock expires after this long (a rebuild still running then is discarded)
+REBUILD_LOCK_SECONDS = 300
+
+_WHITESPACE = re.compile(r"\s+")
+_TRACKING_PARAMS = ("utm_", "fbclid", "gclid", "trk", "ref")
+
+
+# ---------------------------------------------------------------------------
+# Fingerprints
+# ---------------------------------------------------------------------------
+def normalize_words(value: str) -> str:
+    return _WHITESPACE.sub(" ", unicodedata.normalize("NFKC", value)).strip().casefold()
+
+
+def normalize_email(email: Optional[str]) -> Optional[str]:
+    email = (email or "").strip().lower()
+    return email if "@" in email else None
+
+
+def normalize_url(url: Optional[str]) -> Optional[str]:
+    """Lower-case scheme/host, drop fragments, tracking params and trailing slashes, sort the query."""
+    url = (url or "").strip()
+    if not url:
+        return None
+    parts = urlsplit(url)
+    query = sorted(
+        (key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+        if not key.lower().startswith(_TRACKING_PARAMS)
+    )
+    host = parts.netloc.lower()
+    if host.startswith("www."):
+        host = host[4:]
+    return urlunsplit((parts.scheme.lower() or "https", host, parts.path.rstrip("/"), urlencode(query), ""))
+
+
+def lead_fingerprints(lead: Dict[str, Any]) -> List[str]:
+    """Hashed fingerprints identifying the person behind a lead (`source_url` being their profile URL)."""
+    keys = []
+    email = normalize_email(lead.get("email"))
+    if email:
+        keys.append(f"email:{email}")
+    url = normalize_url(lead.get("source_url"))
+    if url:
+        keys.append(f"url:{url}")
+    if lead.get("name") and lead.get("company"):
+        keys.append(f"person:{normalize_words(lead['name'])}|{normalize_words(lead['company'])}")
+    # Fixed-width digests keep the table and the filter input small
+    return [hashlib.sha1(key.encode("utf-8")).hexdigest() for key in keys]
+
+
+# ---------------------------------------------------------------------------
+# Scalable Bloom filter in Redis
+# ---------------------------------------------------------------------------
+class RedisScalableBloomFilter:
+    """
+    A scalable Bloom filter (Almeida et al.) stored as Redis bitmaps.
+
+    Layer i holds `capacity * growth**i` items at error rate
+    `error_rate * tightening**i`, so the compound false-positive rate stays
+    below `error_rate / (1 - tightening)` however many layers are added.
+
+    Keys: `<key>:meta` (hash with `layers` and `count` for the newest layer)
+    and `<key>:<i>` (bitmap of layer i).
+    """
+
+    def __init__(
+        self,
+        client: redis.Redis,
+        key: str,
+        capacity: int,
+        error_rate: float,
+        growth: int = 2,
+        tightening: float = 0.5,
+    ):
+        self.client = client
+        self.key = key
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.growth = growth
+        self.tightening = tightening
+
+    def _layer_shape(self, layer: int) -> Tuple[int, int, int]:
+        """(capacity, bits, hash count) for one layer."""
+        capacity = self.capacity * self.growth ** layer
+        error_rate = self.error_rate * self.tightening ** layer
+        bits = math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2)
+        hashes = max(1, round(bits / capacity * math.log(2)))
+        return capacity, bits, hashes
+
+    @staticmethod
+    def _offsets(item: str, bits: int, hashes: int) -> List[int]:
+        # Kirsch–Mitzenmacher double hashing from one 128-bit digest
+        digest = hashlib.blake2b(item.encode("utf-8"), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "big")
+        h2 = int.from_bytes(digest[8:], "big") | 1
+        return [(h1 + i * h2) % bits for i in range(hashes)]
+
+    def _meta(self) -> Tuple[int, int]:
+        meta = self.client.hgetall(f"{self.key}:meta")
+        return int(meta.get("layers", 0)), int(meta.get("count", 0))
+
+    def exists(self) -> bool:
+        return bool(self.client.exists(f"{self.key}:meta"))
+
+    def create(self) -> None:
+        """Start an empty filter (a no-op if one exists)."""
+        self.client.hsetnx(f"{self.key}:meta", "layers", 1)
+        self.client.hsetnx(f"{self.key}:meta", "count", 0)
+
+    def invalidate(self) -> None:
+        """Drop the metadata so the filter counts as missing and gets rebuilt."""
+        self.client.delete(f"{self.key}:meta")
+
+    def contains_many(self, items: Sequence[str]) -> List[bool]:
+        layers, _ = self._meta()
+        if not items or not layers:
+            return [False] * len(items)
+
+        pipe = self.client.pipeline(transaction=False)
+        for item in items:
+            for layer in range(layers):
+                _, bits, hashes = self._layer_shape(layer)
+                args = []
+                for offset in self._offsets(item, bits, hashes):
+                    args += ["GET", "u1", offset]
+                pipe.execute_command("BITFIELD", f"{self.key}:{layer}", *args)
+        replies = iter(pipe.execute())
+
+        found = []
+        for _ in items:
+            hit = False
+            for _ in range(layers):
+                hit = all(bit == 1 for bit in next(replies)) or hit
+            found.append(hit)
+        return found
+
+    def add_many(self, items: Sequence[str], create: bool = True) -> bool:
+        """Add `items`; with `create=False` a missing filter is left missing. Returns whether they were added."""
+        if not items:
+            return True
+        layers, count = self._meta()
+        if layers == 0:
+            if not create:
+                return False
+            layers = 1
+            self.client.hset(f"{self.key}:meta", mapping={"layers": 1, "count": 0})
+
+        pending = list(items)
+        while pending:
+            layer = layers - 1
+            capacity, bits, hashes = self._layer_shape(layer)
+            room = max(0, capacity - count)
+            batch, pending = pending[:room], pending[room:]
+
+            pipe = self.client.pipeline(transaction=False)
+            for item in batch:
+                args = []
+                for offset in self._offsets(item, bits, hashes):
+                    args += ["SET", "u1", offset, 1]
+                pipe.execute_command("BITFIELD", f"{self.key}:{layer}", *args)
+            pipe.hincrby(f"{self.key}:meta", "count", len(batch))
+            if pending or count + len(batch) >= capacity:
+                # Newest layer is full: open the next, larger one
+                layers += 1
+                count = 0
+                pipe.hset(f"{self.key}:meta", mapping={"layers": layers, "count": 0})
+            else:
+                count += len(batch)
+            pipe.execute()
+        return True
+
+    def replace(self, target: "RedisScalableBloomFilter", lock_key: str, token: str) -> bool:
+        """
+        Move this filter over `target` in one transaction, metadata last, if
+        `lock_key` still holds `token`. Returns whether it was moved.
+        """
+        layers, _ = self._meta()
+        built = [layer for layer in range(layers) if self.client.exists(f"{self.key}:{layer}")]
+        # Bitmaps of a filter that lost its metadata are not listed anywhere else
+        stale = list(self.client.scan_iter(match=f"{target.key}:[0-9]*"))
+        with self.client.pipeline(transaction=True) as pipe:
+            try:
+                pipe.watch(lock_key)
+                if pipe.get(lock_key) != token:
+                    return False
+                pipe.multi()
+                if stale:
+                    pipe.delete(*stale)
+                for layer in built:
+                    pipe.rename(f"{self.key}:{layer}", f"{target.key}:{layer}")
+                pipe.rename(f"{self.key}:meta", f"{target.key}:meta")
+                pipe.execute()
+            except WatchError:
+                return False
+        return True
+
+    def clear(self) -> None:
+        layers, _ = self._meta()
+        self.client.delete(f"{self.key}:meta", *(f"{self.key}:{layer}" for layer in range(layers)))
+
+
+# ---------------------------------------------------------------------------
+# De-duplication stage
+# ---------------------------------------------------------------------------
+class LeadDeduplicator:
+    """
+    Filters batches of lead rows for one user.
+
+    Per batch: `filter_batch` drops duplicates and returns the new fingerprints,
+    `record` writes them in the caller's transaction, and `remember` adds them
+    to the Bloom filter once that transaction has committed.
+    """
+
+    def __init__(self, db: Session, client: redis.Redis, user_id: int):
+        self.db = db
+        self.user_id = user_id
+        self.dropped = 0
+        self._seen_in_run: Set[str] = set()
+        self.bloom: Optional[RedisScalableBloomFilter] = RedisScalableBloomFilter(
+            client,
+            key=f"dedup:bloom:{user_id}",
+            capacity=settings.DEDUP_BLOOM_CAPACITY,
+            error_rate=settings.DEDUP_BLOOM_ERROR_RATE,
+        )
+        try:
+            if not self.bloom.exists() and not self._rebuild_bloom():
+                logger.warning(f"Dedup Bloom filter for user {user_id} is being rebuilt, using exact checks only")
+                self.bloom = None
+        except RedisError as e:
+            logger.warning(f"Dedup Bloom filter unavailable for user {user_id}, using exact checks only: {e}")
+            self.bloom = None
+
+    def _next_bloom(self) -> RedisScalableBloomFilter:
+        """The filter a rebuild is written to before it replaces the live one."""
+        bloom = self.bloom
+        return RedisScalableBloomFilter(bloom.client, f"{bloom.key}:next", bloom.capacity, bloom.error_rate)
+
+    def _rebuild_bloom(self) -> bool:
+        """
+        Reload the filter from the exact table (e.g. after a Redis flush).
+        Returns False if another job's rebuild did not finish in time.
+        """
+        client = self.bloom.client
+        lock_key, token = f"{self.bloom.key}:lock", uuid.uuid4().hex
+        deadline = time.monotonic() + settings.DEDUP_BLOOM_REBUILD_WAIT
+        while not client.set(lock_key, token, nx=True, ex=REBUILD_LOCK_SECONDS):
+            if time.monotonic() >= deadline:
+                return False
+            time.sleep(0.05)
+        try:
+            if self.bloom.exists():
+                # Rebuilt by the job we waited for
+                return True
+            building = self._next_bloom()
+            building.clear()
+            # Created before the scan, so `remember` can add what commits during it
+            building.create()
+            stmt = (
+                select(LeadFingerprint.fingerprint)
+                .where(LeadFingerprint.user_id == self.user_id)
+                .execution_options(yield_per=5000)
+            )
+            loaded = 0
+            for chunk in self.db.execute(stmt).scalars().partitions():
+                building.add_many(chunk)
+                loaded += len(chunk)
+            if not building.replace(self.bloom, lock_key, token):
+                # The lock expired and another job took over the rebuild
+                return False
+        finally:
+            if client.get(lock_key) == token:
+                client.delete(lock_key)
+        logger.info(f"Rebuilt dedup Bloom filter for user {self.user_id} from {loaded} fingerprints")
+        return True
+
+    def _maybe_known(self, fingerprints: List[str]) -> List[str]:
+        if self.bloom is None:
+            return fingerprints
+        try:
+            hits = self.bloom.contains_many(fingerprints)
+        except RedisError as e:
+            logger.warning(f"Dedup Bloom lookup failed, falling back to exact checks: {e}")
+            return fingerprints
+        return [fingerprint for fingerprint, hit in zip(fingerprints, hits) if hit]
+
+    def _known(self, fingerprints: List[str]) -> Set[str]:
+        if not fingerprints:
+            return set()
+        stmt = select(LeadFingerprint.fingerprint).where(
+            LeadFingerprint.user_id == self.user_id,
+            LeadFingerprint.fingerprint.in_(fingerprints),
+        )
+        return set(self.db.execute(stmt).scalars())
+
+    def filter_batch(self, rows: Iterable[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], List[str]]:
+        """Return (rows to keep, fingerprints of the kept rows)."""
+        rows = list(rows)
+        row_fingerprints = [lead_fingerprints(row) for row in rows]
+        candidates = sorted({fp for fps in row_fingerprints for fp in fps} - self._seen_in_run)
+        known = self._known(self._maybe_known(candidates))
+
+        kept, new_fingerprints = [], []
+        for row, fingerprints in zip(rows, row_fingerprints):
+            if any(fp in known or fp in self._seen_in_run for fp in fingerprints):
+                self.dropped += 1
+                continue
+            kept.append(row)
+            new_fingerprints.extend(fingerprints)
+            self._seen_in_run.update(fingerprints)
+        return kept, new_fingerprints
+
+    def record(self, fingerprints: List[str]) -> None:
+        """Insert fingerprints for the exact check, inside the caller's transaction."""
+        if not fingerprints:
+            return
+        rows = [{"user_id": self.user_id, "fingerprint": fp} for fp in dict.fromkeys(fingerprints)]
+        dialect = self.db.get_bind().dialect.name
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        elif dialect == "sqlite":
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        else:
+            self.db.execute(insert(LeadFingerprint), rows)
+            return
+        # A concurrent job of the same user may have recorded the same person
+        self.db.execute(dialect_insert(LeadFingerprint).on_conflict_do_nothing(), rows)
+
+    def remember(self, fingerprints: List[str]) -> None:
+        """Add committed fingerprints to the Bloom filter."""
+        if self.bloom is None or not fingerprints:
+            return
+        try:
+            # A missing filter is not started here: it would look complete. If a
+            # rebuild is scanning the table, it may have read past these already.
+            if not self.bloom.add_many(fingerprints, create=False):
+                self._next_bloom().add_many(fingerprints, create=False)
+        except RedisError as e:
+            logger.warning(f"Could not update dedup Bloom filter for user {self.user_id}, dropping it: {e}")
+            # A filter missing committed fingerprints would let their duplicates
+            # through; without metadata it is rebuilt from the exact table instead
+            try:
+                self.bloom.invalidate()
+            except RedisError:
+                logger.error(f"Could not drop the stale dedup Bloom filter of user {self.user_id}")
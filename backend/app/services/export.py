@@ -0,0 +1,446 @@
+"""
+Export Service — Streams a job's leads out of the database as CSV, NDJSON or Parquet.
+
+A job's leads are its `job_leads` rows joined to their `contacts`.
+
+Two CSV engines are available:
+  * "orm"  — streams the job's leads as ORM objects through a server-side cursor.
+  * "copy" — pipes PostgreSQL `COPY (SELECT ...) TO STDOUT WITH CSV` straight into
+             the response without building any per-row Python objects. On other
+             backends (e.g. SQLite in tests) it falls back to a column-projected
+             Core query streamed with `yield_per`.
+
+NDJSON and Parquet keep native types (`confidence` stays a 0–1 float) and are
+produced from the same projected query, one bounded batch / row group at a time,
+so memory stays flat regardless of the job size.
+
+All streams are async generators reading through `AsyncSession.stream*`, i.e.
+server-side cursors on PostgreSQL.
+"""
+
+import asyncio
+import base64
+import csv
+import io
+import json
+import logging
+import zlib
+from datetime import datetime
+from decimal import ROUND_HALF_UP, Decimal
+from typing import Any, AsyncIterable, AsyncIterator, List, Optional, Sequence, Tuple, Union
+
+import orjson
+from sqlalchemy import func, select, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import contains_eager
+
+from app.models.models import Contact, JobLead
+
+logger = logging.getLogger(__name__)
+
+CSV_HEADER = ["ID", "Name", "Email", "Company", "Title", "Source URL", "Confidence%"]
+# Field names for the typed formats, in projection order
+EXPORT_FIELDS = ["id", "name", "email", "company", "title", "source_url", "confidence", "created_at"]
+
+MEDIA_TYPES = {
+    "csv": "text/csv",
+    "ndjson": "application/x-ndjson",
+    "parquet": "application/vnd.apache.parquet",
+}
+
+# Rows fetched per round trip from the server-side cursor (and rows per Parquet row group)
+CHUNK_SIZE = 500
+# Bytes buffered from COPY before handing a chunk to the response
+COPY_FLUSH_BYTES = 64 * 1024
+# Chunks allowed in flight between the COPY and the response
+COPY_QUEUE_DEPTH = 8
+
+_CENTS = Decimal("0.01")
+
+_COPY_QUERY = """
+SELECT l.id AS "ID",
+       -- NULL rather than '': COPY quotes empty strings, `csv.writer` does not
+       NULLIF(c.name, '') AS "Name",
+       NULLIF(c.email, '') AS "Email",
+       NULLIF(c.company, '') AS "Company",
+       NULLIF(c.title, '') AS "Title",
+       NULLIF(c.source_url, '') AS "Source URL",
+       -- Same text as `_confidence_percent`: the shortest decimal form of the float
+       -- (PostgreSQL 12+), rounded half up to 2 places, trailing zeros dropped
+       regexp_replace(rtrim(ROUND((COALESCE(l.confidence, 0) * 100)::text::numeric, 2)::text, '0'), '[.]$', '.0')
+           AS "Confidence%"
+FROM job_leads l
+JOIN contacts c ON c.id = l.contact_id
+WHERE l.job_id = $1
+ORDER BY l.id
+"""
+
+# Lead fields and the columns holding them: the person on the contact, the rest on the job's row
+_FIELD_COLUMNS = {
+    "id": JobLead.id,
+    "name": Contact.name,
+    "email": Contact.email,
+    "company": Contact.company,
+    "title": Contact.title,
+    "source_url": Contact.source_url,
+    "confidence": JobLead.confidence,
+    "created_at": JobLead.created_at,
+}
+
+
+# Result page orderings: a column name, "-" for descending; ties are broken by id
+RESULT_ORDERINGS = ("id", "confidence", "-confidence", "created_at", "-created_at")
+# `LeadResponse` fields, in order: the columns of a projected results page
+RESULT_FIELDS = ("id", "name", "email", "company", "title", "source_url", "confidence")
+
+ResultCursor = Union[int, Tuple[Any, int]]
+
+
+def lead_page_stmt(
+    job_id: int,
+    after: Optional[ResultCursor],
+    limit: int,
+    order_by: str = "id",
+    min_confidence: Optional[float] = None,
+    company: Optional[str] = None,
+    email_domain: Optional[str] = None,
+    projected: bool = False,
+):
+    """
+    Keyset page of the leads of `job_id`, after the cursor `after`.
+
+    Every ordering has a matching (job_id, key, id) index on `job_leads`:
+    ordering by id walks ix_job_leads_job_id_id (`after` is the last id);
+    other orderings seek past the last (key, id) pair with a row-value
+    comparison. The company and email domain filters are on the contact, so
+    they are checked on the rows walked along that index.
+
+    With `projected`, rows are plain tuples of `RESULT_FIELDS` (plus the sort
+    key when it is not one of them) instead of `JobLead` objects.
+    """
+    if projected:
+        columns = [_FIELD_COLUMNS[field] for field in RESULT_FIELDS]
+        if order_by.lstrip("-") not in RESULT_FIELDS:
+            columns.append(_FIELD_COLUMNS[order_by.lstrip("-")])
+        stmt = select(*columns).select_from(JobLead).join(JobLead.contact)
+    else:
+        stmt = select(JobLead).join(JobLead.contact).options(contains_eager(JobLead.contact))
+    stmt = stmt.where(JobLead.job_id == job_id)
+    if min_confidence is not None:
+        stmt = stmt.where(JobLead.confidence >= min_confidence)
+    if company:
+        stmt = stmt.where(func.lower(Contact.company) == company.strip().lower())
+    if email_domain:
+        stmt = stmt.where(Contact.email_domain == email_domain.strip().lstrip("@").lower())
+
+    if order_by == "id":
+        if after is not None:
+            stmt = stmt.where(JobLead.id > after)
+        return stmt.order_by(JobLead.id).limit(limit)
+
+    descending = order_by.startswith("-")
+    column = _FIELD_COLUMNS[order_by.lstrip("-")]
+    if after is not None:
+        key, bound = tuple_(column, JobLead.id), tuple_(*after)
+        stmt = stmt.where(key < bound if descending else key > bound)
+    if descending:
+        return stmt.order_by(column.desc(), JobLead.id.desc()).limit(limit)
+    return stmt.order_by(column, JobLead.id).limit(limit)
+
+
+def encode_cursor(order_by: str, lead: Any) -> Union[int, str]:
+    """Cursor continuing after `lead` (a `JobLead` or a projected row): its id for the id order, else an opaque token."""
+    if order_by == "id":
+        return lead.id
+    value = getattr(lead, order_by.lstrip("-"))
+    if isinstance(value, datetime):
+        value = value.isoformat()
+    return base64.urlsafe_b64encode(json.dumps([value, lead.id]).encode()).decode().rstrip("=")
+
+
+def render_lead_page(rows: Sequence[Any], limit: int, order_by: str) -> bytes:
+    """
+    `LeadPage` JSON for projected rows, straight to bytes with orjson: the
+    columns are already the response's types, so no per-row validation is done.
+    As for the ORM path, a row beyond `limit` means there is a next page.
+    """
+    next_cursor = encode_cursor(order_by, rows[limit - 1]) if len(rows) > limit else None
+    # zip stops at RESULT_FIELDS, leaving out a trailing sort key
+    items = [dict(zip(RESULT_FIELDS, row)) for row in rows[:limit]]
+    return orjson.dumps({"items": items, "next_cursor": next_cursor})
+
+
+def decode_cursor(order_by: str, raw: str) -> ResultCursor:
+    """Inverse of `encode_cursor`. Raises ValueError for a malformed cursor."""
+    try:
+        if order_by == "id":
+            return int(raw)
+        value, lead_id = json.loads(base64.urlsafe_b64decode(raw + "=" * (-len(raw) % 4)))
+        if order_by.lstrip("-") == "created_at":
+            return datetime.fromisoformat(value), int(lead_id)
+        return float(value), int(lead_id)
+    except (TypeError, ValueError) as e:
+        # binascii.Error and JSONDecodeError are ValueErrors too
+        raise ValueError(f"Malformed cursor for order_by={order_by}") from e
+
+
+async def close_after(db: AsyncSession, chunks: AsyncIterable) -> AsyncIterator:
+    """
+    Hand ownership of `db` to a streaming body.
+
+    Request-scoped sessions are closed before the response body is sent, so a
+    stream that keeps reading re-opens the session; close it again once the
+    stream is exhausted or the client disconnects.
+    """
+    try:
+        async for chunk in chunks:
+            yield chunk
+    finally:
+        await db.close()
+
+
+def _confidence_percent(confidence: Optional[float]) -> str:
+    """
+    `confidence` as a percentage with at most 2 decimals ("95.0", "88.12"): the
+    float's shortest decimal form rounded half up, as `_COPY_QUERY` does, so
+    both CSV engines write the same text.
+    """
+    text = format(Decimal(repr((confidence or 0.0) * 100)).quantize(_CENTS, ROUND_HALF_UP), "f").rstrip("0")
+    return text + "0" if text.endswith(".") else text
+
+
+def _csv_row(lead_id, name, email, company, title, source_url, confidence) -> list:
+    return [
+        lead_id,
+        name or "",
+        email or "",
+        company or "",
+        title or "",
+        source_url or "",
+        _confidence_percent(confidence),
+    ]
+
+
+def _crlf_records(data: bytes, quoted: bool) -> Tuple[bytes, bool]:
+    """
+    COPY ends CSV records with "\n" where `csv.writer` writes "\r\n": rewrite the
+    record terminators, leaving newlines inside quoted fields alone. `quoted` is
+    whether `data` starts inside a quoted field; the state at its end is returned.
+    """
+    parts = data.split(b'"')
+    for index in range(1 if quoted else 0, len(parts), 2):
+        parts[index] = parts[index].replace(b"\n", b"\r\n")
+    return b'"'.join(parts), quoted != (len(parts) % 2 == 0)
+
+
+async def iter_csv_orm(db: AsyncSession, job_id: int, chunk_size: int = CHUNK_SIZE) -> AsyncIterator[str]:
+    """Stream CSV by hydrating `JobLead` objects (with their contacts) one cursor partition at a time."""
+    output = io.StringIO()
+    writer = csv.writer(output)
+
+    writer.writerow(CSV_HEADER)
+    yield output.getvalue()
+    output.seek(0)
+    output.truncate(0)
+
+    # One ordered query over the (job_id, id) index, fetched chunk_size rows per round
+    # trip from a server-side cursor, so the total work stays linear in the lead count.
+    stmt = (
+        select(JobLead)
+        .join(JobLead.contact)
+        .options(contains_eager(JobLead.contact))
+        .where(JobLead.job_id == job_id)
+        .order_by(JobLead.id)
+        .execution_options(yield_per=chunk_size)
+    )
+    result = await db.stream_scalars(stmt)
+    try:
+        async for chunk in result.partitions():
+            for lead in chunk:
+                writer.writerow(_csv_row(
+                    lead.id, lead.name, lead.email, lead.company,
+                    lead.title, lead.source_url, lead.confidence,
+                ))
+                # Streamed ORM objects would otherwise pile up in the identity map
+                db.expunge(lead.contact)
+                db.expunge(lead)
+
+            yield output.getvalue()
+            output.seek(0)
+            output.truncate(0)
+    finally:
+        await result.close()
+
+
+def iter_csv_native(db: AsyncSession, job_id: int, chunk_size: int = CHUNK_SIZE) -> AsyncIterator[bytes]:
+    """Stream CSV via COPY on PostgreSQL, or a projected Core query elsewhere."""
+    if db.bind.dialect.name == "postgresql":
+        return _iter_csv_copy(db, job_id)
+    return _iter_csv_projected(db, job_id, chunk_size)
+
+
+async def _iter_lead_rows(db: AsyncSession, job_id: int, chunk_size: int) -> AsyncIterator[Sequence[tuple]]:
+    """Yield the job's leads as batches of plain tuples in `EXPORT_FIELDS` order."""
+    stmt = (
+        select(*(_FIELD_COLUMNS[field] for field in EXPORT_FIELDS))
+        .select_from(JobLead)
+        .join(JobLead.contact)
+        .where(JobLead.job_id == job_id)
+        .order_by(JobLead.id)
+        .execution_options(yield_per=chunk_size)
+    )
+    result = await db.stream(stmt)
+    try:
+        async for rows in result.partitions():
+            yield rows
+    finally:
+        await result.close()
+
+
+async def _iter_csv_projected(db: AsyncSession, job_id: int, chunk_size: int) -> AsyncIterator[bytes]:
+    """Fallback for non-PostgreSQL backends: plain row tuples, no ORM identity map."""
+    output = io.StringIO()
+    writer = csv.writer(output)
+    writer.writerow(CSV_HEADER)
+
+    async for rows in _iter_lead_rows(db, job_id, chunk_size):
+        writer.writerows(_csv_row(*row[:7]) for row in rows)
+        yield output.getvalue().encode("utf-8")
+        output.seek(0)
+        output.truncate(0)
+
+    # Header-only export for an empty job
+    if output.tell():
+        yield output.getvalue().encode("utf-8")
+
+
+_DONE = object()
+
+
+async def _iter_csv_copy(db: AsyncSession, job_id: int) -> AsyncIterator[bytes]:
+    connection = await db.connection()
+    raw_connection = await connection.get_raw_connection()
+    asyncpg_connection = raw_connection.driver_connection
+
+    chunks: asyncio.Queue = asyncio.Queue(maxsize=COPY_QUEUE_DEPTH)
+    buffer = bytearray()
+    quoted = False
+
+    async def sink(data: bytes) -> None:
+        # asyncpg hands over COPY data as it arrives; coalesce it into larger chunks
+        # and let the bounded queue push back on the COPY when the client is slow.
+        nonlocal buffer, quoted
+        data, quoted = _crlf_records(data, quoted)
+        buffer += data
+        if len(buffer) >= COPY_FLUSH_BYTES:
+            chunk, buffer = bytes(buffer), bytearray()
+            await chunks.put(chunk)
+
+    async def run_copy() -> None:
+        try:
+            await asyncpg_connection.copy_from_query(
+                _COPY_QUERY, job_id, output=sink, format="csv", header=True,
+            )
+            if buffer:
+                await chunks.put(bytes(buffer))
+            await chunks.put(_DONE)
+        except Exception as e:  # surfaced to the consumer below
+            await chunks.put(e)
+
+    producer = asyncio.create_task(run_copy())
+    try:
+        while True:
+            item = await chunks.get()
+            if item is _DONE:
+                break
+            if isinstance(item, Exception):
+                logger.error(f"COPY export for job {job_id} failed: {item}")
+                raise item
+            yield item
+    finally:
+        if not producer.done():
+            # Client went away mid-stream: cancelling aborts the COPY on the server
+            producer.cancel()
+            try:
+                await producer
+            except asyncio.CancelledError:
+                pass
+
+
+async def iter_ndjson(db: AsyncSession, job_id: int, chunk_size: int = CHUNK_SIZE) -> AsyncIterator[bytes]:
+    """Stream one JSON object per lead, one batch of lines per chunk."""
+    async for rows in _iter_lead_rows(db, job_id, chunk_size):
+        lines: List[str] = []
+        for row in rows:
+            record = dict(zip(EXPORT_FIELDS, row))
+            record["confidence"] = record["confidence"] or 0.0
+            if record["created_at"] is not None:
+                record["created_at"] = record["created_at"].isoformat()
+            lines.append(json.dumps(record, ensure_ascii=False))
+        yield ("\n".join(lines) + "\n").encode("utf-8")
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only file object that lets the Parquet writer's output be drained incrementally."""
+
+    def __init__(self):
+        self._buffer = bytearray()
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        self._buffer += data
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        chunk, self._buffer = bytes(self._buffer), bytearray()
+        return chunk
+
+
+async def iter_parquet(db: AsyncSession, job_id: int, chunk_size: int = CHUNK_SIZE) -> AsyncIterator[bytes]:
+    """Stream a Parquet file, writing one row group per batch of leads."""
+    # pyarrow is heavy; only pay for the import when Parquet is actually requested
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    schema = pa.schema([
+        ("id", pa.int64()),
+        ("name", pa.string()),
+        ("email", pa.string()),
+        ("company", pa.string()),
+        ("title", pa.string()),
+        ("source_url", pa.string()),
+        ("confidence", pa.float64()),
+        ("created_at", pa.timestamp("us")),
+    ])
+
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema, compression="snappy")
+    try:
+        async for rows in _iter_lead_rows(db, job_id, chunk_size):
+            columns = list(zip(*rows))
+            writer.write_table(pa.Table.from_arrays(
+                [pa.array(column, type=field.type) for column, field in zip(columns, schema)],
+                schema=schema,
+            ))
+            yield sink.drain()
+    finally:
+        # Closing writes the footer, which is what makes the file readable
+        writer.close()
+    yield sink.drain()
+
+
+async def gzip_stream(chunks: AsyncIterable[Union[bytes, str]]) -> AsyncIterator[bytes]:
+    """Gzip-compress a stream of chunks incrementally for `Content-Encoding: gzip`."""
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+    async for chunk in chunks:
+        data = compressor.compress(chunk.encode("utf-8") if isinstance(chunk, str) else chunk)
+        if data:
+            yield data
+    yield compressor.flush()
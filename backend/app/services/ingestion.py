@@ -0,0 +1,183 @@
+"""
+Lead Ingestion — Persists scraped leads from the worker in multi-row batches.
+
+Leads are buffered and written `INGEST_BATCH_SIZE` at a time. The person's
+details go to the shared contact store (`app.services.contacts`); the job's
+`job_leads` rows are written with `COPY ... FROM STDIN` on PostgreSQL, and a
+multi-row `INSERT` (executemany / insertmanyvalues) everywhere else. Each batch
+is committed in a single transaction together with the job's progress and its
+running statistics (`app.services.job_stats`).
+
+With a `LeadDeduplicator`, each batch is first filtered against the leads the
+user already has. Dropped duplicates, and contacts the job already has, are
+counted on `Job.duplicates_dropped`.
+"""
+
+import csv
+import io
+import logging
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from app.config import settings
+from app.models.models import Job, JobLead
+from app.services.cancellation import CancellationToken
+from app.services.contacts import record_contacts
+from app.services.dedup import LeadDeduplicator
+from app.services.job_stats import email_domain, record_batch
+
+logger = logging.getLogger(__name__)
+
+# Lead fields kept per buffered row (email_domain is derived from email)
+LEAD_COLUMNS = ["name", "email", "email_domain", "company", "title", "source_url", "confidence", "created_at"]
+# `job_leads` columns, in COPY column order
+JOB_LEAD_COLUMNS = ["job_id", "contact_id", "confidence", "created_at"]
+
+
+class LeadIngestor:
+    """
+    Buffers lead dicts for one job and flushes them in batches.
+
+    Usage:
+        with LeadIngestor(db, job) as ingestor:
+            ingestor.extend(scraper.scrape(...))
+
+    Leaving the block normally flushes the remaining buffer; batches already
+    flushed stay committed even if the block raises. `on_flush` is called with
+    the job after every committed batch (e.g. to publish progress). Progress
+    runs from `progress_start` (when earlier stages already reported some);
+    `persisted` counts leads of the job stored by an earlier, interrupted run.
+    With a `CancellationToken`, every flush first raises `JobCancelled` if the
+    job has been cancelled. `from_contacts` marks leads served from the contact
+    store, which are linked to the job without refreshing their contacts.
+    """
+
+    def __init__(
+        self,
+        db: Session,
+        job: Job,
+        batch_size: Optional[int] = None,
+        on_flush: Optional[Callable[[Job], None]] = None,
+        dedup: Optional[LeadDeduplicator] = None,
+        progress_start: int = 0,
+        persisted: int = 0,
+        cancel: Optional[CancellationToken] = None,
+        from_contacts: bool = False,
+    ):
+        self.db = db
+        self.job = job
+        self.batch_size = batch_size or settings.INGEST_BATCH_SIZE
+        self.on_flush = on_flush
+        self.dedup = dedup
+        self.progress_start = progress_start
+        self.cancel = cancel
+        self.from_contacts = from_contacts
+        self.persisted = persisted
+        self.batches = 0
+        self._buffer: List[Dict[str, Any]] = []
+        self._started = time.perf_counter()
+        self._use_copy = db.get_bind().dialect.name == "postgresql"
+
+    def __enter__(self) -> "LeadIngestor":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        if exc_type is None:
+            self.flush()
+        self._log_throughput()
+
+    def add(self, lead: Dict[str, Any]) -> None:
+        """Queue a single scraped lead, flushing when the batch is full."""
+        row = {column: lead.get(column) for column in LEAD_COLUMNS}
+        row["email_domain"] = email_domain(row["email"])
+        if row["confidence"] is None:
+            row["confidence"] = 0.0
+        if row["created_at"] is None:
+            row["created_at"] = datetime.now(timezone.utc)
+        self._buffer.append(row)
+
+        if len(self._buffer) >= self.batch_size:
+            self.flush()
+
+    def extend(self, leads: Iterable[Dict[str, Any]]) -> None:
+        for lead in leads:
+            self.add(lead)
+
+    def flush(self) -> int:
+        """Write the buffered leads and the job's progress in one transaction."""
+        if self.cancel is not None:
+            self.cancel.raise_if_cancelled()
+        if not self._buffer:
+            return 0
+
+        rows, self._buffer = self._buffer, []
+        received = len(rows)
+        fingerprints: List[str] = []
+        try:
+            if self.dedup is not None:
+                rows, fingerprints = self.dedup.filter_batch(rows)
+                self.dedup.record(fingerprints)
+
+            rows, links = record_contacts(self.db, self.job.id, rows, refresh=not self.from_contacts)
+            self.job.duplicates_dropped = (self.job.duplicates_dropped or 0) + received - len(rows)
+            if links and self._use_copy:
+                self._copy_links(links)
+            elif links:
+                self.db.execute(insert(JobLead), links)
+            record_batch(self.db, self.job.id, rows)
+
+            self.persisted += len(rows)
+            self.batches += 1
+            if self.job.lead_count:
+                # 100% is reserved for the task marking the job completed
+                span = 100 - self.progress_start
+                self.job.progress = min(99, self.progress_start + self.persisted * span // self.job.lead_count)
+            self.db.commit()
+        except Exception:
+            self.db.rollback()
+            raise
+
+        if self.dedup is not None:
+            self.dedup.remember(fingerprints)
+
+        logger.debug(
+            f"Job {self.job.id}: batch {self.batches} wrote {len(rows)} leads "
+            f"({self.persisted} total, progress {self.job.progress}%)"
+        )
+        if self.on_flush is not None:
+            self.on_flush(self.job)
+        return len(rows)
+
+    def _copy_links(self, links: List[Dict[str, Any]]) -> None:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        for link in links:
+            writer.writerow([
+                link["created_at"].isoformat() if column == "created_at" else link[column]
+                for column in JOB_LEAD_COLUMNS
+            ])
+        buffer.seek(0)
+
+        # COPY runs on the session's own connection, so it shares the batch transaction
+        raw_connection = self.db.connection().connection.dbapi_connection
+        with raw_connection.cursor() as cursor:
+            cursor.copy_expert(
+                f"COPY job_leads ({', '.join(JOB_LEAD_COLUMNS)}) FROM STDIN WITH (FORMAT csv)",
+                buffer,
+            )
+
+    @property
+    def rows_per_second(self) -> float:
+        elapsed = time.perf_counter() - self._started
+        return self.persisted / elapsed if elapsed > 0 else 0.0
+
+    def _log_throughput(self) -> None:
+        elapsed = time.perf_counter() - self._started
+        logger.info(
+            f"Job {self.job.id}: ingested {self.persisted} leads in {self.batches} batches "
+            f"over {elapsed:.2f}s ({self.rows_per_second:.0f} rows/s)"
+        )
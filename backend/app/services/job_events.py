@@ -0,0 +1,125 @@
+"""
+Job Events — Pushes job status/progress changes through Redis.
+
+Every state change is written to a per-job Redis hash (the latest snapshot) and
+published on a per-job channel in the same pipeline. The SSE endpoint reads the
+snapshot once and then relays channel messages, so clients watching a job never
+poll PostgreSQL.
+
+Publishing is best-effort: PostgreSQL remains the source of truth and a Redis
+outage must never fail a job.
+"""
+
+import json
+import logging
+from typing import Any, AsyncIterator, Dict, Optional
+
+import redis
+from redis import asyncio as aioredis
+from redis.exceptions import RedisError
+
+from app.config import settings
+from app.models.models import Job
+from app.schemas.schemas import JobResponse
+
+logger = logging.getLogger(__name__)
+
+TERMINAL_STATUSES = {"completed", "failed", "cancelled"}
+
+
+def job_channel(job_id: int) -> str:
+    return f"jobs:{job_id}:events"
+
+
+def job_state_key(job_id: int) -> str:
+    return f"jobs:{job_id}:state"
+
+
+def job_snapshot(job: Job) -> Dict[str, Any]:
+    """JSON-safe snapshot of a job, shaped like `JobResponse`."""
+    return JobResponse.model_validate(job).model_dump(mode="json")
+
+
+def _queue_state(pipe, snapshot: Dict[str, Any]) -> None:
+    # Hash fields hold JSON values so types (ints, nulls) survive the round trip
+    key = job_state_key(snapshot["id"])
+    pipe.hset(key, mapping={field: json.dumps(value) for field, value in snapshot.items()})
+    pipe.expire(key, settings.JOB_STATE_TTL_SECONDS)
+    pipe.publish(job_channel(snapshot["id"]), json.dumps(snapshot))
+
+
+def publish_job_state(client: redis.Redis, job: Job) -> None:
+    """Store and broadcast the job's current state (blocking client, for workers)."""
+    snapshot = job_snapshot(job)
+    try:
+        pipe = client.pipeline(transaction=True)
+        _queue_state(pipe, snapshot)
+        pipe.execute()
+    except RedisError as e:
+        logger.warning(f"Could not publish state for job {job.id}: {e}")
+
+
+async def apublish_job_state(client: aioredis.Redis, job: Job) -> None:
+    """Store and broadcast the job's current state (asyncio client, for routes)."""
+    snapshot = job_snapshot(job)
+    try:
+        pipe = client.pipeline(transaction=True)
+        _queue_state(pipe, snapshot)
+        await pipe.execute()
+    except RedisError as e:
+        logger.warning(f"Could not publish state for job {job.id}: {e}")
+
+
+async def read_job_state(client: aioredis.Redis, job_id: int) -> Optional[Dict[str, Any]]:
+    """Return the latest stored snapshot, or None if nothing has been published yet."""
+    fields = await client.hgetall(job_state_key(job_id))
+    if not fields:
+        return None
+    return {field: json.loads(value) for field, value in fields.items()}
+
+
+def format_sse(snapshot: Dict[str, Any]) -> str:
+    return f"event: job\ndata: {json.dumps(snapshot)}\n\n"
+
+
+async def iter_job_events(
+    client: aioredis.Redis,
+    job_id: int,
+    snapshot: Dict[str, Any],
+    keepalive: Optional[float] = None,
+) -> AsyncIterator[str]:
+    """
+    Yield Server-Sent Events for a job: `snapshot` first, then every published
+    change until the job reaches a terminal status. Without Redis only the
+    snapshot is sent; the client reconnects for the next one.
+    """
+    keepalive = keepalive or settings.JOB_EVENTS_KEEPALIVE_SECONDS
+    pubsub = client.pubsub()
+    try:
+        # Subscribe before emitting the snapshot so no change can slip in between
+        await pubsub.subscribe(job_channel(job_id))
+    except RedisError as e:
+        logger.warning(f"Could not subscribe to events of job {job_id}: {e}")
+        await pubsub.aclose()
+        yield format_sse(snapshot)
+        return
+    try:
+        latest = await read_job_state(client, job_id) or snapshot
+        yield format_sse(latest)
+        if latest["status"] in TERMINAL_STATUSES:
+            return
+
+        while True:
+            message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=keepalive)
+            if message is None:
+                # Comment lines keep proxies from closing an idle stream
+                yield ": keep-alive\n\n"
+                continue
+
+            latest = json.loads(message["data"])
+            yield format_sse(latest)
+            if latest["status"] in TERMINAL_STATUSES:
+                return
+    finally:
+        await pubsub.unsubscribe(job_channel(job_id))
+        await pubsub.aclose()
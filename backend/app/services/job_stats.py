@@ -0,0 +1,153 @@
+"""
+Job Statistics — Aggregates of a job's leads, maintained as they are stored.
+
+`LeadIngestor` calls `record_batch` with every batch it writes, in the same
+transaction: totals go to `job_stats`, per-company and per-email-domain counts
+to `job_stat_counts` (both upserted with `count = count + excluded.count`).
+Scraping tasks add their page cache lookups with `record_page_cache`.
+Reading a job's stats is then one primary-key lookup plus a top-N index range
+scan per list, however many leads the job has.
+"""
+
+from collections import Counter
+from typing import Any, Dict, Iterable, List, Optional
+
+from sqlalchemy import insert, select, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session
+
+from app.models.models import JobStatCount, JobStats
+from app.services.page_cache import PageCacheStats
+
+COMPANY = "company"
+EMAIL_DOMAIN = "email_domain"
+STAT_KINDS = (COMPANY, EMAIL_DOMAIN)
+
+
+def email_domain(email: Optional[str]) -> Optional[str]:
+    if not email or "@" not in email:
+        return None
+    domain = email.rsplit("@", 1)[1].strip().lower()
+    return domain or None
+
+
+def _dialect_insert(db: Session):
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        return None
+    return dialect_insert
+
+
+def record_batch(db: Session, job_id: int, rows: Iterable[Dict[str, Any]]) -> None:
+    """Add a batch of lead rows to the job's aggregates, inside the caller's transaction."""
+    totals = {"lead_count": 0, "with_email": 0, "confidence_sum": 0.0}
+    counts: Counter = Counter()
+    for row in rows:
+        totals["lead_count"] += 1
+        totals["confidence_sum"] += row.get("confidence") or 0.0
+        domain = email_domain(row.get("email"))
+        if domain:
+            totals["with_email"] += 1
+            counts[(EMAIL_DOMAIN, domain[:255])] += 1
+        company = (row.get("company") or "").strip()
+        if company:
+            counts[(COMPANY, company[:255])] += 1
+    if not totals["lead_count"]:
+        return
+
+    count_rows = [
+        {"job_id": job_id, "kind": kind, "value": value, "count": n}
+        for (kind, value), n in counts.items()
+    ]
+    _add_totals(db, job_id, totals)
+    if not count_rows:
+        return
+    dialect_insert = _dialect_insert(db)
+    if dialect_insert is None:
+        _add_counts_portable(db, count_rows)
+        return
+    stmt = dialect_insert(JobStatCount)
+    db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[JobStatCount.job_id, JobStatCount.kind, JobStatCount.value],
+            set_={"count": JobStatCount.count + stmt.excluded["count"]},
+        ),
+        count_rows,
+    )
+
+
+def record_page_cache(db: Session, job_id: int, stats: PageCacheStats) -> None:
+    """Add one scrape's page cache lookups to the job's aggregates, inside the caller's transaction."""
+    if not stats.lookups:
+        return
+    _add_totals(db, job_id, {
+        "pages_cached": stats.hits,
+        "pages_revalidated": stats.revalidated,
+        "pages_downloaded": stats.misses,
+    })
+
+
+def _add_totals(db: Session, job_id: int, totals: Dict[str, Any]) -> None:
+    dialect_insert = _dialect_insert(db)
+    if dialect_insert is None:
+        # Dialects without ON CONFLICT: update, insert what did not exist yet
+        updated = db.execute(
+            update(JobStats)
+            .where(JobStats.job_id == job_id)
+            .values({column: getattr(JobStats, column) + value for column, value in totals.items()})
+        ).rowcount
+        if not updated:
+            db.execute(insert(JobStats).values(job_id=job_id, **totals))
+        return
+
+    stmt = dialect_insert(JobStats).values(job_id=job_id, **totals)
+    db.execute(stmt.on_conflict_do_update(
+        index_elements=[JobStats.job_id],
+        set_={column: getattr(JobStats, column) + getattr(stmt.excluded, column) for column in totals},
+    ))
+
+
+def _add_counts_portable(db: Session, count_rows: List[Dict[str, Any]]) -> None:
+    for row in count_rows:
+        updated = db.execute(
+            update(JobStatCount)
+            .where(
+                JobStatCount.job_id == row["job_id"],
+                JobStatCount.kind == row["kind"],
+                JobStatCount.value == row["value"],
+            )
+            .values(count=JobStatCount.count + row["count"])
+        ).rowcount
+        if not updated:
+            db.execute(insert(JobStatCount).values(**row))
+
+
+async def read_job_stats(db: AsyncSession, job_id: int, top: int = 10) -> Dict[str, Any]:
+    """The job's totals and its `top` companies and email domains by lead count."""
+    totals = await db.get(JobStats, job_id)
+    lead_count = totals.lead_count if totals else 0
+    stats: Dict[str, Any] = {
+        "lead_count": lead_count,
+        "with_email": totals.with_email if totals else 0,
+        "average_confidence": totals.confidence_sum / lead_count if lead_count else None,
+    }
+    pages = {
+        field: getattr(totals, field) if totals else 0
+        for field in ("pages_cached", "pages_revalidated", "pages_downloaded")
+    }
+    lookups = sum(pages.values())
+    stats.update(pages)
+    stats["page_cache_hit_rate"] = (pages["pages_cached"] + pages["pages_revalidated"]) / lookups if lookups else None
+    for kind, field in ((COMPANY, "top_companies"), (EMAIL_DOMAIN, "top_email_domains")):
+        result = await db.execute(
+            select(JobStatCount.value, JobStatCount.count)
+            .where(JobStatCount.job_id == job_id, JobStatCount.kind == kind)
+            .order_by(JobStatCount.count.desc())
+            .limit(top)
+        )
+        stats[field] = [{"value": value, "count": count} for value, count in result]
+    return stats
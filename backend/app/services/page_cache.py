@@ -0,0 +1,250 @@
+"""
+Page Cache — Fetched pages kept on local disk in front of the scraper's fetcher pools.
+
+Entries are keyed by normalized URL (`app.services.dedup.normalize_url`), so
+tracking parameters, fragments and query order do not split the cache. Bodies
+are stored zlib-compressed under the SHA-256 of their content
+(`<root>/objects/ab/abcdef...`): a page reached through several URLs is kept
+once. An SQLite index next to them records, per URL, the body digest, the
+validators (ETag / Last-Modified) and when the entry was fetched and last used.
+It is shared by every worker process on the host.
+
+An entry younger than its domain's TTL is fresh and served as is. A stale entry
+is revalidated by the caller with If-None-Match / If-Modified-Since (see
+`app.services.scraper.CachingFetcherPool`); a 304 makes it fresh again. Once the
+stored bodies exceed `max_bytes`, least recently used entries are evicted.
+"""
+
+import hashlib
+import os
+import sqlite3
+import tempfile
+import time
+import zlib
+from contextlib import closing
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Dict, List, Optional
+from urllib.parse import urlsplit
+
+from app.config import settings
+from app.metrics import SCRAPER_PAGE_CACHE_LOOKUPS
+from app.services.dedup import normalize_url
+
+HIT = "hit"
+REVALIDATED = "revalidated"
+MISS = "miss"
+
+# Entries evicted per round while the cache is over its size cap
+_EVICT_BATCH = 32
+
+_SCHEMA = (
+    "CREATE TABLE IF NOT EXISTS objects (digest TEXT PRIMARY KEY, size INTEGER NOT NULL)",
+    "CREATE TABLE IF NOT EXISTS pages ("
+    "url TEXT PRIMARY KEY, digest TEXT NOT NULL, etag TEXT, last_modified TEXT, "
+    "fetched_at REAL NOT NULL, used_at REAL NOT NULL)",
+    "CREATE INDEX IF NOT EXISTS ix_pages_used_at ON pages (used_at)",
+    "CREATE INDEX IF NOT EXISTS ix_pages_digest ON pages (digest)",
+)
+
+
+@dataclass
+class CachedPage:
+    body: str
+    etag: Optional[str]
+    last_modified: Optional[str]
+    fresh: bool
+
+
+@dataclass
+class PageCacheStats:
+    """Lookups of one scrape (a job or a shard), by result."""
+
+    hits: int = 0
+    revalidated: int = 0
+    misses: int = 0
+
+    def record(self, result: str) -> None:
+        if result == HIT:
+            self.hits += 1
+        elif result == REVALIDATED:
+            self.revalidated += 1
+        else:
+            self.misses += 1
+        SCRAPER_PAGE_CACHE_LOOKUPS.labels(result).inc()
+
+    @property
+    def lookups(self) -> int:
+        return self.hits + self.revalidated + self.misses
+
+    @property
+    def hit_rate(self) -> float:
+        """Share of pages served without downloading the body again."""
+        return (self.hits + self.revalidated) / self.lookups if self.lookups else 0.0
+
+
+class PageCache:
+    """
+    Args:
+        root: Directory holding the index and the objects (created if missing).
+        max_bytes: Cap on the compressed bodies kept.
+        ttl: Seconds an entry stays fresh.
+        domain_ttls: Per-domain TTL overrides; a domain also covers its subdomains.
+    """
+
+    def __init__(self, root: str, max_bytes: int, ttl: int, domain_ttls: Optional[Dict[str, int]] = None):
+        self.root = Path(root)
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.domain_ttls = {domain.lower().lstrip("."): seconds for domain, seconds in (domain_ttls or {}).items()}
+        self._objects = self.root / "objects"
+        self._objects.mkdir(parents=True, exist_ok=True)
+        self._index = self.root / "index.sqlite3"
+        with closing(self._connect()) as conn:
+            conn.execute("PRAGMA journal_mode=WAL")
+            for statement in _SCHEMA:
+                conn.execute(statement)
+
+    def _connect(self) -> sqlite3.Connection:
+        # One connection per call: lookups run on executor threads, several processes share the file
+        return sqlite3.connect(self._index, timeout=30, isolation_level=None)
+
+    def _object_path(self, digest: str) -> Path:
+        return self._objects / digest[:2] / digest
+
+    def ttl_for(self, url: str) -> int:
+        host = (urlsplit(url).hostname or "").lower()
+        while host:
+            if host in self.domain_ttls:
+                return self.domain_ttls[host]
+            host = host.partition(".")[2]
+        return self.ttl
+
+    def lookup(self, url: str) -> Optional[CachedPage]:
+        """The cached page for `url` (fresh or stale), or None."""
+        key = normalize_url(url)
+        if key is None:
+            return None
+        now = time.time()
+        with closing(self._connect()) as conn:
+            row = conn.execute(
+                "SELECT digest, etag, last_modified, fetched_at FROM pages WHERE url = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            digest, etag, last_modified, fetched_at = row
+            try:
+                body = zlib.decompress(self._object_path(digest).read_bytes()).decode("utf-8")
+            except (OSError, zlib.error):
+                # Evicted by another process in the meantime, or damaged
+                conn.execute("DELETE FROM pages WHERE url = ?", (key,))
+                return None
+            conn.execute("UPDATE pages SET used_at = ? WHERE url = ?", (now, key))
+        return CachedPage(body, etag, last_modified, fresh=now - fetched_at < self.ttl_for(url))
+
+    def store(self, url: str, body: str, etag: Optional[str] = None, last_modified: Optional[str] = None) -> None:
+        """Cache a freshly downloaded page, then evict down to the size cap."""
+        key = normalize_url(url)
+        if key is None:
+            return
+        data = body.encode("utf-8")
+        digest = hashlib.sha256(data).hexdigest()
+        path = self._object_path(digest)
+        if not path.exists():
+            compressed = zlib.compress(data)
+            path.parent.mkdir(exist_ok=True)
+            # Write-then-rename: readers never see a partial object
+            fd, tmp = tempfile.mkstemp(dir=path.parent)
+            with os.fdopen(fd, "wb") as f:
+                f.write(compressed)
+            os.replace(tmp, path)
+        size = path.stat().st_size
+
+        now = time.time()
+        with closing(self._connect()) as conn:
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                previous = conn.execute("SELECT digest FROM pages WHERE url = ?", (key,)).fetchone()
+                conn.execute("INSERT OR IGNORE INTO objects (digest, size) VALUES (?, ?)", (digest, size))
+                conn.execute(
+                    "INSERT OR REPLACE INTO pages (url, digest, etag, last_modified, fetched_at, used_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?)",
+                    (key, digest, etag, last_modified, now, now),
+                )
+                orphans = []
+                if previous and previous[0] != digest:
+                    orphans = list(self._drop_unreferenced(conn, [previous[0]]))
+                orphans += self._evict(conn)
+                conn.execute("COMMIT")
+            except BaseException:
+                conn.execute("ROLLBACK")
+                raise
+        for orphan in orphans:
+            self._object_path(orphan).unlink(missing_ok=True)
+
+    def refresh(self, url: str, etag: Optional[str] = None, last_modified: Optional[str] = None) -> None:
+        """Mark an entry fresh again after the server answered 304 Not Modified."""
+        key = normalize_url(url)
+        if key is None:
+            return
+        now = time.time()
+        with closing(self._connect()) as conn:
+            conn.execute(
+                "UPDATE pages SET fetched_at = ?, used_at = ?, "
+                "etag = coalesce(?, etag), last_modified = coalesce(?, last_modified) WHERE url = ?",
+                (now, now, etag, last_modified, key),
+            )
+
+    def size(self) -> int:
+        """Bytes of compressed bodies currently kept."""
+        with closing(self._connect()) as conn:
+            return conn.execute("SELECT coalesce(sum(size), 0) FROM objects").fetchone()[0]
+
+    def _evict(self, conn: sqlite3.Connection) -> List[str]:
+        """Drop least recently used entries until under the cap; returns the digests no longer kept."""
+        digests: List[str] = []
+        excess = conn.execute("SELECT coalesce(sum(size), 0) FROM objects").fetchone()[0] - self.max_bytes
+        while excess > 0:
+            victims = conn.execute(
+                "SELECT url, digest FROM pages ORDER BY used_at LIMIT ?", (_EVICT_BATCH,)
+            ).fetchall()
+            if not victims:
+                break
+            for url, digest in victims:
+                conn.execute("DELETE FROM pages WHERE url = ?", (url,))
+                for dropped, size in self._drop_unreferenced(conn, [digest]).items():
+                    digests.append(dropped)
+                    excess -= size
+                if excess <= 0:
+                    break
+        return digests
+
+    @staticmethod
+    def _drop_unreferenced(conn: sqlite3.Connection, digests: List[str]) -> Dict[str, int]:
+        """Forget the objects no entry points to any more; returns their sizes by digest."""
+        dropped = {}
+        for digest in dict.fromkeys(digests):
+            if conn.execute("SELECT 1 FROM pages WHERE digest = ? LIMIT 1", (digest,)).fetchone() is None:
+                row = conn.execute("SELECT size FROM objects WHERE digest = ?", (digest,)).fetchone()
+                if row is not None:
+                    conn.execute("DELETE FROM objects WHERE digest = ?", (digest,))
+                    dropped[digest] = row[0]
+        return dropped
+
+
+_page_cache: Optional[PageCache] = None
+
+
+def get_page_cache() -> Optional[PageCache]:
+    """The process-wide cache in SCRAPER_CACHE_DIR, or None when caching is off."""
+    global _page_cache
+    if not settings.SCRAPER_CACHE_DIR:
+        return None
+    if _page_cache is None or _page_cache.root != Path(settings.SCRAPER_CACHE_DIR):
+        _page_cache = PageCache(
+            settings.SCRAPER_CACHE_DIR,
+            max_bytes=settings.SCRAPER_CACHE_MAX_BYTES,
+            ttl=settings.SCRAPER_CACHE_TTL_SECONDS,
+            domain_ttls=settings.SCRAPER_CACHE_DOMAIN_TTLS,
+        )
+    return _page_cache
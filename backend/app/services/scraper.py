@@ -1,19 +1,546 @@
 """
 Scraper Service — Uses Playwright to extract lead data from target platforms.
 
-TODO — Contributors, implement the following:
-  1. Use Playwright (with stealth plugin) in headless mode
-  2. Navigate to target sites based on search_params
-  3. Handle pagination to collect the requested lead_count
-  4. Parse DOM elements and extract lead data into dicts
-  5. Add rate limiting and respect robots.txt
-  6. Handle errors gracefully (timeouts, CAPTCHAs, etc.)
+The engine runs a bounded number of concurrent page loads over a pool of
+reusable browser contexts, throttles each target domain with a token bucket,
+and stops as soon as `lead_count` leads have been collected.
+
+Pieces:
+  * `build_query_plan` turns AI search parameters into an ordered list of queries.
+  * `PlaywrightFetcherPool` renders pages in a few long-lived browser contexts;
+    `HttpxFetcherPool` fetches static pages without a browser.
+  * `CachingFetcherPool` puts the on-disk page cache (`app.services.page_cache`)
+    in front of either when SCRAPER_CACHE_DIR is set.
+  * `DomainRateLimiter` hands out per-domain tokens.
+  * `extract_leads` parses the listing markup into lead dicts.
+  * `ScrapeEngine` ties them together with an asyncio work queue.
+
+TODO — Contributors:
+  1. Site-specific extractors for the real target platforms
+  2. Stealth plugin and robots.txt handling
+  3. CAPTCHA detection
 """
 
-from typing import Any, Dict, List
+import asyncio
+import itertools
+import logging
+import sqlite3
+import time
+from dataclasses import dataclass, field
+from html.parser import HTMLParser
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import quote_plus, urljoin, urlsplit
+
+import httpx
+
+from app.config import settings
+from app.services.page_cache import HIT, MISS, REVALIDATED, PageCache, PageCacheStats, get_page_cache
+
+logger = logging.getLogger(__name__)
+
+# (leads, follow-up URLs) found on one page
+Extraction = Tuple[List[Dict[str, Any]], List[str]]
+LeadExtractor = Callable[[str, str], Extraction]
+
+
+# ---------------------------------------------------------------------------
+# Query plan
+# ---------------------------------------------------------------------------
+def build_query_plan(search_params: Dict[str, Any]) -> List[str]:
+    """
+    Expand AI search parameters into an ordered, de-duplicated list of search
+    queries: every job title crossed with every keyword, scoped to the location.
+    """
+    titles = search_params.get("job_titles") or [""]
+    keywords = search_params.get("keywords") or [""]
+    location = search_params.get("location") or ""
+
+    queries: List[str] = []
+    for title, keyword in itertools.product(titles, keywords):
+        query = " ".join(part for part in (title, keyword, location) if part)
+        if query and query not in queries:
+            queries.append(query)
+    return queries
+
+
+def build_seed_urls(queries: Sequence[str]) -> List[str]:
+    """Search result URLs for each query, from SCRAPER_SEARCH_URL_TEMPLATE."""
+    template = settings.SCRAPER_SEARCH_URL_TEMPLATE
+    if not template:
+        raise NotImplementedError("No scraper target configured — set SCRAPER_SEARCH_URL_TEMPLATE.")
+    return [template.format(query=quote_plus(query)) for query in queries]
+
+
+# ---------------------------------------------------------------------------
+# Rate limiting
+# ---------------------------------------------------------------------------
+class TokenBucket:
+    """Classic token bucket: `rate` tokens per second, bursting up to `capacity`."""
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+class DomainRateLimiter:
+    """One token bucket per target host, created on first use."""
+
+    def __init__(self, rate: float, burst: float):
+        self.rate = rate
+        self.burst = burst
+        self._buckets: Dict[str, TokenBucket] = {}
+
+    async def acquire(self, url: str) -> None:
+        domain = urlsplit(url).netloc.lower()
+        bucket = self._buckets.get(domain)
+        if bucket is None:
+            bucket = self._buckets[domain] = TokenBucket(self.rate, self.burst)
+        await bucket.acquire()
+
+
+# ---------------------------------------------------------------------------
+# Fetcher pools
+# ---------------------------------------------------------------------------
+@dataclass
+class FetchResult:
+    body: Optional[str]  # None when the server answered 304 Not Modified
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+
+
+class PlaywrightFetcherPool:
+    """
+    Renders pages in a fixed pool of reusable headless browser contexts.
+
+    Contexts are handed out round-robin and shared by concurrent pages, so
+    cookies and caches are reused instead of paying for a new context per page.
+
+    Usage:
+        async with PlaywrightFetcherPool(size=2) as pool:
+            html = await pool.fetch(url)
+    """
+
+    def __init__(self, size: int, headless: bool = True, timeout_ms: Optional[int] = None):
+        self.size = size
+        self.headless = headless
+        self.timeout_ms = timeout_ms or settings.SCRAPER_PAGE_TIMEOUT_MS
+        self._playwright = None
+        self._browser = None
+        self._contexts: list = []
+        self._next = None
+
+    async def __aenter__(self) -> "PlaywrightFetcherPool":
+        from playwright.async_api import async_playwright
+
+        self._playwright = await async_playwright().start()
+        try:
+            self._browser = await self._playwright.chromium.launch(headless=self.headless)
+            self._contexts = [await self._browser.new_context() for _ in range(self.size)]
+        except Exception:
+            await self.__aexit__(None, None, None)
+            raise
+        self._next = itertools.cycle(self._contexts)
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        for context in self._contexts:
+            await context.close()
+        if self._browser is not None:
+            await self._browser.close()
+        if self._playwright is not None:
+            await self._playwright.stop()
+
+    async def fetch(self, url: str) -> str:
+        return (await self.fetch_page(url)).body
+
+    async def fetch_page(self, url: str, etag: Optional[str] = None, last_modified: Optional[str] = None) -> FetchResult:
+        """Render `url`. Navigations are never conditional, so the validators are not sent."""
+        page = await next(self._next).new_page()
+        try:
+            response = await page.goto(url, timeout=self.timeout_ms, wait_until="domcontentloaded")
+            headers = response.headers if response is not None else {}
+            return FetchResult(await page.content(), headers.get("etag"), headers.get("last-modified"))
+        finally:
+            await page.close()
+
+
+class HttpxFetcherPool:
+    """Browser-less pool for static pages: one pooled HTTP client, same interface."""
+
+    def __init__(self, size: int, timeout_ms: Optional[int] = None):
+        self.size = size
+        self.timeout = (timeout_ms or settings.SCRAPER_PAGE_TIMEOUT_MS) / 1000
+        self._client: Optional[httpx.AsyncClient] = None
+
+    async def __aenter__(self) -> "HttpxFetcherPool":
+        self._client = httpx.AsyncClient(
+            timeout=self.timeout,
+            follow_redirects=True,
+            limits=httpx.Limits(max_connections=self.size * 4),
+        )
+        return self
 
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self._client.aclose()
 
-async def scrape_leads(search_params: Dict[str, Any], lead_count: int = 100) -> List[Dict[str, Any]]:
+    async def fetch(self, url: str) -> str:
+        return (await self.fetch_page(url)).body
+
+    async def fetch_page(self, url: str, etag: Optional[str] = None, last_modified: Optional[str] = None) -> FetchResult:
+        """GET `url`, conditionally when validators of a cached copy are given."""
+        headers = {}
+        if etag:
+            headers["If-None-Match"] = etag
+        if last_modified:
+            headers["If-Modified-Since"] = last_modified
+        response = await self._client.get(url, headers=headers)
+        if response.status_code == 304 and headers:
+            return FetchResult(None, response.headers.get("etag"), response.headers.get("last-modified"))
+        response.raise_for_status()
+        return FetchResult(response.text, response.headers.get("etag"), response.headers.get("last-modified"))
+
+
+class CachingFetcherPool:
+    """
+    Wraps a fetcher pool with a `PageCache`: fresh pages are served from disk,
+    stale ones revalidated with their ETag / Last-Modified, and everything
+    else downloaded and cached. Only requests that reach the network wait on
+    `rate_limiter`. Lookups are counted in `stats`.
+
+    Cache errors (e.g. a full disk) fall back to plain fetching.
+    """
+
+    def __init__(
+        self,
+        pool: Any,
+        cache: PageCache,
+        rate_limiter: Optional[DomainRateLimiter] = None,
+        stats: Optional[PageCacheStats] = None,
+    ):
+        self.pool = pool
+        self.cache = cache
+        self.rate_limiter = rate_limiter
+        self.stats = stats if stats is not None else PageCacheStats()
+
+    async def __aenter__(self) -> "CachingFetcherPool":
+        await self.pool.__aenter__()
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb) -> None:
+        await self.pool.__aexit__(exc_type, exc, tb)
+
+    async def fetch(self, url: str) -> str:
+        cached = await self._cache_call(self.cache.lookup, url)
+        if cached is not None and cached.fresh:
+            self.stats.record(HIT)
+            return cached.body
+
+        if self.rate_limiter is not None:
+            await self.rate_limiter.acquire(url)
+        if cached is not None:
+            result = await self.pool.fetch_page(url, cached.etag, cached.last_modified)
+        else:
+            result = await self.pool.fetch_page(url)
+        if result.body is None:
+            self.stats.record(REVALIDATED)
+            await self._cache_call(self.cache.refresh, url, result.etag, result.last_modified)
+            return cached.body
+        self.stats.record(MISS)
+        await self._cache_call(self.cache.store, url, result.body, result.etag, result.last_modified)
+        return result.body
+
+    @staticmethod
+    async def _cache_call(method, *args):
+        # Disk and SQLite work stays off the event loop
+        try:
+            return await asyncio.to_thread(method, *args)
+        except (OSError, sqlite3.Error) as e:
+            logger.warning(f"Page cache unavailable, fetching directly: {e}")
+            return None
+
+
+# ---------------------------------------------------------------------------
+# Extraction
+# ---------------------------------------------------------------------------
+class _LeadMarkupParser(HTMLParser):
+    """
+    Reads the listing markup the default extractor understands:
+
+        <div data-lead data-name="..." data-email="..." data-company="..."
+             data-title="..." data-source-url="..."></div>
+        <a rel="next" href="?page=2">Next</a>
+    """
+
+    FIELDS = {
+        "data-name": "name",
+        "data-email": "email",
+        "data-company": "company",
+        "data-title": "title",
+        "data-source-url": "source_url",
+    }
+
+    def __init__(self):
+        super().__init__()
+        self.leads: List[Dict[str, Any]] = []
+        self.links: List[str] = []
+
+    def handle_starttag(self, tag, attrs):
+        attributes = dict(attrs)
+        if "data-lead" in attributes:
+            self.leads.append({
+                key: attributes[attr] for attr, key in self.FIELDS.items() if attributes.get(attr)
+            })
+        if tag == "a" and "next" in (attributes.get("rel") or "").split() and attributes.get("href"):
+            self.links.append(attributes["href"])
+
+
+def extract_leads(html: str, url: str) -> Extraction:
+    """
+    Default extractor: `data-lead` elements plus `rel="next"` pagination links.
+
+    `source_url` is the lead's own URL (resolved against the page) or absent;
+    it is never the listing page itself, which would make every lead on the
+    page look like the same person to de-duplication.
+    """
+    parser = _LeadMarkupParser()
+    parser.feed(html)
+    for lead in parser.leads:
+        if "source_url" in lead:
+            lead["source_url"] = urljoin(url, lead["source_url"])
+    return parser.leads, [urljoin(url, link) for link in parser.links]
+
+
+# ---------------------------------------------------------------------------
+# Engine
+# ---------------------------------------------------------------------------
+@dataclass
+class ScrapeStats:
+    pages: int = 0
+    errors: int = 0
+    elapsed: float = 0.0
+    leads: int = 0
+
+    @property
+    def pages_per_second(self) -> float:
+        return self.pages / self.elapsed if self.elapsed else 0.0
+
+
+@dataclass
+class CrawlState:
+    """
+    Resumable position of a crawl: pages fully processed, URLs discovered but
+    not yet processed (in discovery order) and the leads collected so far.
+    """
+
+    done: List[str] = field(default_factory=list)
+    pending: List[str] = field(default_factory=list)
+    leads: int = 0
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"done": self.done, "pending": self.pending, "leads": self.leads}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "CrawlState":
+        return cls(done=list(data.get("done", [])), pending=list(data.get("pending", [])), leads=int(data.get("leads", 0)))
+
+
+# Called with the crawl state and the leads collected since the previous checkpoint
+CheckpointHandler = Callable[[CrawlState, List[Dict[str, Any]]], None]
+
+
+@dataclass
+class ScrapeEngine:
+    """
+    Crawls from the seed URLs with `concurrency` workers until `lead_count`
+    leads are collected or there is nothing left to visit.
+
+    With `on_checkpoint`, the engine hands over its `CrawlState` and the new
+    leads every `checkpoint_every` pages and once more when it finishes; a
+    later `run(..., resume=state)` continues from such a state. When
+    `should_stop` returns true (checked before each page load), the engine
+    stops like it does on reaching `lead_count` and sets `stopped`.
+
+    The callbacks are blocking (database and Redis calls), so they run in a
+    worker thread; `on_progress` and `on_checkpoint` run one at a time, in
+    order, as they may share a database session.
+    """
+
+    pool: Any
+    lead_count: int
+    concurrency: int = 4
+    rate_limiter: Optional[DomainRateLimiter] = None
+    extractor: LeadExtractor = extract_leads
+    max_pages: Optional[int] = None
+    on_progress: Optional[Callable[[int], None]] = None  # Called with the lead total after each page
+    on_checkpoint: Optional[CheckpointHandler] = None
+    checkpoint_every: int = 10  # Pages between checkpoints
+    should_stop: Optional[Callable[[], bool]] = None
+    stats: ScrapeStats = field(default_factory=ScrapeStats)
+    stopped: bool = field(default=False, init=False)
+
+    async def run(self, seed_urls: Sequence[str], resume: Optional[CrawlState] = None) -> List[Dict[str, Any]]:
+        """Crawl and return the leads collected by this run (not those of `resume`)."""
+        self._leads: List[Dict[str, Any]] = []
+        self._unsaved: List[Dict[str, Any]] = []
+        self._resumed_leads = 0
+        # Discovered URLs in discovery order -> processed yet
+        self._seen: Dict[str, bool] = {}
+        self._queue: asyncio.Queue = asyncio.Queue()
+        self._done = asyncio.Event()
+        self._pages_since_checkpoint = 0
+        self._callback_lock = asyncio.Lock()
+        self._callback: Optional[asyncio.Future] = None
+
+        if resume is not None:
+            self._resumed_leads = resume.leads
+            self._seen.update((url, True) for url in resume.done)
+            frontier = resume.pending
+        else:
+            frontier = seed_urls
+        for url in frontier:
+            if url not in self._seen:
+                self._seen[url] = False
+                self._queue.put_nowait(url)
+        if self._resumed_leads >= self.lead_count:
+            self._done.set()
+
+        started = time.perf_counter()
+        workers = [asyncio.create_task(self._worker()) for _ in range(self.concurrency)]
+        drained = asyncio.create_task(self._queue.join())
+        reached = asyncio.create_task(self._done.wait())
+        try:
+            finished, _ = await asyncio.wait({drained, reached, *workers}, return_when=asyncio.FIRST_COMPLETED)
+            for task in finished:
+                if task in workers:
+                    # Workers only stop on an error outside page handling (e.g. a failed checkpoint)
+                    task.result()
+        finally:
+            # Enough leads (or no more pages): abandon in-flight loads right away
+            for task in (*workers, drained, reached):
+                task.cancel()
+            await asyncio.gather(*workers, drained, reached, return_exceptions=True)
+            if self._callback is not None:
+                # A cancelled worker leaves its callback running in the thread
+                await asyncio.wait({self._callback})
+            self.stats.elapsed = time.perf_counter() - started
+            self.stats.leads = len(self._leads)
+
+        if self._callback is not None:
+            self._callback.result()
+        if self.on_checkpoint is not None:
+            await self._checkpoint()
+        logger.info(
+            f"Scraped {self.stats.leads} leads from {self.stats.pages} pages in "
+            f"{self.stats.elapsed:.2f}s ({self.stats.pages_per_second:.1f} pages/s, "
+            f"concurrency {self.concurrency}, {self.stats.errors} errors)"
+        )
+        return self._leads
+
+    def state(self) -> CrawlState:
+        """Current position; pages in flight count as pending and are loaded again on resume."""
+        done = [url for url, processed in self._seen.items() if processed]
+        pending = [url for url, processed in self._seen.items() if not processed]
+        return CrawlState(done=done, pending=pending, leads=self._resumed_leads + len(self._leads))
+
+    async def _call(self, callback: Callable[..., None], *args: Any) -> None:
+        """Run `callback` in a thread, after any callback still running."""
+        async with self._callback_lock:
+            self._callback = asyncio.ensure_future(asyncio.to_thread(callback, *args))
+            await asyncio.shield(self._callback)
+
+    async def _checkpoint(self) -> None:
+        leads, self._unsaved = self._unsaved, []
+        self._pages_since_checkpoint = 0
+        await self._call(self.on_checkpoint, self.state(), leads)
+
+    async def _worker(self) -> None:
+        while True:
+            url = await self._queue.get()
+            try:
+                if self.max_pages is not None and self.stats.pages >= self.max_pages:
+                    continue
+                if self.rate_limiter is not None:
+                    await self.rate_limiter.acquire(url)
+                if self.should_stop is not None and await asyncio.to_thread(self.should_stop):
+                    self.stopped = True
+                    self._done.set()
+                    continue
+                html = await self.pool.fetch(url)
+                self.stats.pages += 1
+                leads, links = self.extractor(html, url)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                self.stats.errors += 1
+                logger.warning(f"Failed to scrape {url}: {e}")
+                continue
+            else:
+                self._seen[url] = True
+                await self._collect(leads)
+                for link in links:
+                    if link not in self._seen:
+                        self._seen[link] = False
+                        self._queue.put_nowait(link)
+            finally:
+                self._queue.task_done()
+
+            self._pages_since_checkpoint += 1
+            if self.on_checkpoint is not None and self._pages_since_checkpoint >= self.checkpoint_every:
+                await self._checkpoint()
+
+    async def _collect(self, leads: List[Dict[str, Any]]) -> None:
+        remaining = self.lead_count - self._resumed_leads - len(self._leads)
+        kept = leads[:max(remaining, 0)]
+        self._leads.extend(kept)
+        self._unsaved.extend(kept)
+        if self._resumed_leads + len(self._leads) >= self.lead_count:
+            self._done.set()
+        if self.on_progress is not None and leads:
+            await self._call(self.on_progress, self._resumed_leads + len(self._leads))
+
+
+def make_fetcher_pool():
+    """The fetcher pool selected by SCRAPER_FETCHER."""
+    if settings.SCRAPER_FETCHER == "httpx":
+        return HttpxFetcherPool(size=settings.SCRAPER_CONCURRENCY)
+    return PlaywrightFetcherPool(size=settings.SCRAPER_CONTEXTS)
+
+
+def make_cached_fetcher_pool(rate_limiter: DomainRateLimiter, stats: Optional[PageCacheStats] = None):
+    """
+    `make_fetcher_pool()` behind the page cache, which then does the rate
+    limiting, or None when SCRAPER_CACHE_DIR is not set.
+    """
+    cache = get_page_cache()
+    if cache is None:
+        return None
+    return CachingFetcherPool(make_fetcher_pool(), cache, rate_limiter=rate_limiter, stats=stats)
+
+
+async def scrape_leads(
+    search_params: Dict[str, Any],
+    lead_count: int = 100,
+    queries: Optional[Sequence[str]] = None,
+    on_progress: Optional[Callable[[int], None]] = None,
+    resume: Optional[CrawlState] = None,
+    on_checkpoint: Optional[CheckpointHandler] = None,
+    should_stop: Optional[Callable[[], bool]] = None,
+    cache_stats: Optional[PageCacheStats] = None,
+) -> List[Dict[str, Any]]:
     """
     Launch a headless browser with Playwright, navigate to target sites based
     on search_params, and extract lead data.
@@ -21,8 +548,40 @@ async def scrape_leads(search_params: Dict[str, Any], lead_count: int = 100) ->
     Args:
         search_params: Structured JSON from the AI Context Engine.
         lead_count: Number of leads to extract.
+        queries: Run only these queries instead of the whole query plan
+            (e.g. one shard's slice of it).
+        on_progress: Called with the number of leads collected so far.
+        resume: Continue an earlier crawl from its last checkpoint.
+        on_checkpoint: Receives the crawl state and the new leads every
+            SCRAPER_CHECKPOINT_PAGES pages (see `ScrapeEngine`).
+        should_stop: Polled between pages; the scrape ends early once it
+            returns true (e.g. the job was cancelled).
+        cache_stats: Counts the page cache lookups of this scrape.
 
     Returns:
         A list of lead dictionaries.
     """
-    raise NotImplementedError("Scraper not yet implemented — see ISSUES.txt #18")
+    if queries is None:
+        queries = build_query_plan(search_params)
+    seed_urls = build_seed_urls(queries)
+    rate_limiter = DomainRateLimiter(settings.SCRAPER_DOMAIN_RATE, settings.SCRAPER_DOMAIN_BURST)
+
+    pool = make_cached_fetcher_pool(rate_limiter, cache_stats)
+    if pool is not None:
+        # Cache hits are not throttled: the caching pool limits only real requests
+        rate_limiter = None
+    else:
+        pool = make_fetcher_pool()
+
+    async with pool:
+        engine = ScrapeEngine(
+            pool=pool,
+            lead_count=lead_count,
+            concurrency=settings.SCRAPER_CONCURRENCY,
+            rate_limiter=rate_limiter,
+            on_progress=on_progress,
+            on_checkpoint=on_checkpoint,
+            checkpoint_every=settings.SCRAPER_CHECKPOINT_PAGES,
+            should_stop=should_stop,
+        )
+        return await engine.run(seed_urls, resume=resume)
@@ -0,0 +1,94 @@
+"""
+Lead Search — Ranked full-text search over a user's leads (name, company, title).
+
+The person's details live on the shared contacts, so the index is on
+`contacts` and matches are narrowed to the user's jobs through `job_leads`.
+PostgreSQL matches `websearch_to_tsquery('english', q)` against the generated
+`contacts.search_vector` column through its GIN index and ranks with
+`ts_rank_cd` (title weighs most, then company, then name). SQLite — the test
+backend — uses the `contacts_fts` FTS5 table and `bm25` with the same column
+weights. Both schemas are created with the `contacts` table (see
+`CONTACTS_SEARCH_DDL`).
+
+Pages are keyset-paginated on (score, id), with lower scores ranking first,
+so a page costs the same however deep the client has paged. Scores depend
+only on the query and the matching rows, so a cursor stays valid while the
+user's leads do not change.
+"""
+
+import base64
+import json
+import re
+from typing import List, Optional, Tuple
+
+from sqlalchemy import column, func, literal_column, select, table, tuple_
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import contains_eager
+
+from app.models.models import Contact, Job, JobLead
+
+SearchCursor = Tuple[float, int]
+
+# bm25 weights of the FTS5 columns (name, company, title)
+FTS5_WEIGHTS = (1.0, 2.0, 4.0)
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+contacts_fts = table("contacts_fts", column("rowid"))
+
+
+def fts5_query(q: str) -> Optional[str]:
+    """The words of `q` as quoted FTS5 terms, all required; None if there are none."""
+    words = _WORD.findall(q)
+    return " ".join(f'"{word}"' for word in words) if words else None
+
+
+def encode_search_cursor(score: float, lead_id: int) -> str:
+    return base64.urlsafe_b64encode(json.dumps([score, lead_id]).encode()).decode().rstrip("=")
+
+
+def decode_search_cursor(raw: str) -> SearchCursor:
+    """Inverse of `encode_search_cursor`. Raises ValueError for a malformed cursor."""
+    try:
+        score, lead_id = json.loads(base64.urlsafe_b64decode(raw + "=" * (-len(raw) % 4)))
+        return float(score), int(lead_id)
+    except (TypeError, ValueError) as e:
+        raise ValueError("Malformed cursor") from e
+
+
+async def search_leads(
+    db: AsyncSession,
+    user_id: int,
+    q: str,
+    limit: int,
+    after: Optional[SearchCursor] = None,
+) -> List[Tuple[JobLead, float]]:
+    """Up to `limit` (lead, score) pairs of `user_id`'s leads matching `q`, best first."""
+    if db.get_bind().dialect.name == "postgresql":
+        query = func.websearch_to_tsquery("english", q)
+        vector = literal_column("contacts.search_vector")
+        # Negated so that, as with bm25, lower is better
+        score = -func.ts_rank_cd(vector, query)
+        stmt = select(JobLead, score.label("score")).select_from(Contact).where(vector.op("@@")(query))
+    else:
+        match = fts5_query(q)
+        if match is None:
+            return []
+        score = func.bm25(literal_column("contacts_fts"), *FTS5_WEIGHTS)
+        stmt = (
+            select(JobLead, score.label("score"))
+            .select_from(contacts_fts)
+            .join(Contact, Contact.id == contacts_fts.c.rowid)
+            .where(literal_column("contacts_fts").op("MATCH")(match))
+        )
+
+    stmt = (
+        stmt.join(JobLead, JobLead.contact_id == Contact.id)
+        .join(Job, Job.id == JobLead.job_id)
+        .where(Job.user_id == user_id)
+        .options(contains_eager(JobLead.contact))
+    )
+    if after is not None:
+        stmt = stmt.where(tuple_(score, JobLead.id) > tuple_(*after))
+    result = await db.execute(stmt.order_by(score, JobLead.id).limit(limit))
+    return [(lead, float(rank)) for lead, rank in result]
@@ -0,0 +1,79 @@
+"""
+Job Sharding — Splits a large scrape job into independent shards.
+
+Each shard covers a slice of the search query plan and a share of the job's
+lead quota, so N workers can scrape one job in parallel. Shards report how
+many leads they have collected to a Redis hash; the sum drives Job.progress
+through the scraping phase (0..SCRAPE_PROGRESS_SHARE), and the merge step
+fills in the rest while it de-duplicates and stores the leads.
+"""
+
+import math
+from dataclasses import dataclass
+from typing import List, Optional, Sequence
+
+import redis
+
+from app.config import settings
+
+# Share of Job.progress covered by the scraping shards; merging + storing does the rest
+SCRAPE_PROGRESS_SHARE = 90
+
+
+@dataclass
+class Shard:
+    index: int
+    queries: List[str]
+    lead_quota: int
+
+
+def plan_shards(queries: Sequence[str], lead_count: int) -> List[Shard]:
+    """
+    Split the query plan into up to SCRAPE_MAX_SHARDS shards of about
+    SCRAPE_LEADS_PER_SHARD leads. Small jobs (or single-query plans) get one shard.
+    """
+    count = 1
+    if lead_count >= settings.SCRAPE_SHARD_MIN_LEADS:
+        count = min(
+            settings.SCRAPE_MAX_SHARDS,
+            len(queries),
+            math.ceil(lead_count / settings.SCRAPE_LEADS_PER_SHARD),
+        )
+    count = max(count, 1)
+
+    # Queries are dealt round-robin so every shard gets a mix of the plan
+    slices = [list(queries[i::count]) for i in range(count)]
+    quota, extra = divmod(lead_count, count)
+    return [Shard(i, slices[i], quota + (1 if i < extra else 0)) for i in range(count)]
+
+
+def shard_progress_key(job_id: int) -> str:
+    return f"jobs:{job_id}:shards"
+
+
+class ShardProgress:
+    """Aggregates per-shard lead counts of one job into a progress percentage."""
+
+    def __init__(self, client: redis.Redis, job_id: int, lead_count: int):
+        self.client = client
+        self.key = shard_progress_key(job_id)
+        self.lead_count = lead_count
+        self._last: Optional[int] = None
+
+    def report(self, shard_index: int, collected: int) -> Optional[int]:
+        """Record a shard's lead count; return the job's progress if it changed."""
+        pipe = self.client.pipeline()
+        pipe.hset(self.key, str(shard_index), collected)
+        pipe.expire(self.key, settings.JOB_STATE_TTL_SECONDS)
+        pipe.hvals(self.key)
+        _, _, counts = pipe.execute()
+
+        total = min(self.lead_count, sum(int(count) for count in counts))
+        progress = total * SCRAPE_PROGRESS_SHARE // max(self.lead_count, 1)
+        if progress == self._last:
+            return None
+        self._last = progress
+        return progress
+
+    def clear(self) -> None:
+        self.client.delete(self.key)
@@ -3,14 +3,23 @@ Celery application instance.
 """
 
 from celery import Celery
+from kombu import Queue
 
 from app.config import settings
+from app import metrics, profiling
+from app.tasks.routing import (
+    JOB_QUEUES,
+    PRIORITY_STEPS,
+    QUEUE_PRIORITY_SEP,
+    QueueDepthCollector,
+    route_job_task,
+)
 
 celery_app = Celery(
     "lead_gen_tool",
     broker=settings.CELERY_BROKER_URL,
     backend=settings.CELERY_RESULT_BACKEND,
-    include=["app.tasks.generate_leads"]
+    include=["app.tasks.generate_leads", "app.tasks.scrape_task"]
 )
 
 celery_app.conf.update(
@@ -21,4 +30,22 @@ celery_app.conf.update(
     enable_utc=True,
     task_track_started=True,
     broker_connection_retry_on_startup=True,
+    # Tier queues by job size, priority by intent (see app.tasks.routing)
+    task_queues=[Queue("celery"), *(Queue(name) for name in JOB_QUEUES)],
+    task_default_queue="celery",
+    task_routes=(route_job_task,),
+    broker_transport_options={
+        "priority_steps": PRIORITY_STEPS,
+        "sep": QUEUE_PRIORITY_SEP,
+        "queue_order_strategy": "priority",
+        # Scraping tasks are acked late; must exceed the longest scrape or it is started twice
+        "visibility_timeout": settings.CELERY_VISIBILITY_TIMEOUT_SECONDS,
+    },
+    # Reserve one job at a time so a queued high-priority job is not stuck behind prefetched ones
+    worker_prefetch_multiplier=1,
 )
+
+# Task durations, outcomes and queue depths for /metrics, SQL stats per task
+metrics.instrument_celery()
+metrics.register_collector(QueueDepthCollector())
+profiling.instrument_celery()
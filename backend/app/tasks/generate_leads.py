@@ -1,94 +1,56 @@
 import logging
-import traceback
 from datetime import datetime, timezone
-import uuid
 
 from sqlalchemy import create_engine
 from sqlalchemy.orm import sessionmaker
 
 from app.config import settings
+from app.metrics import TimedQueuePool, instrument_engine
 from app.tasks.celery_app import celery_app
-from app.models.models import Job, Lead
+from app.models.models import Job
+from app.redis import get_sync_redis
+from app.services.job_events import publish_job_state
+from app.tasks.routing import enqueue_job
 
 logger = logging.getLogger(__name__)
 
 # Basic synchronous engine and session factory for the Celery worker
-engine = create_engine(settings.DATABASE_URL, pool_pre_ping=True)
+engine = create_engine(
+    settings.DATABASE_URL, pool_pre_ping=True, poolclass=TimedQueuePool, pool_logging_name="worker"
+)
+instrument_engine(engine, "worker")
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
-class BaseLeadScraper:
-    """
-    Placeholder base class for the actual scraper implementation.
-    The real scraper will be plugged in later behind this interface.
-    """
-    def scrape(self, intent: str, lead_count: int, job_id: int):
-        # NOTE: Playwright/scraping logic intentionally omitted per requirements.
-        raise NotImplementedError("Real scraper logic is not implemented yet.")
 
-
-@celery_app.task(bind=True, name="app.tasks.generate_leads")
-def generate_leads_task(self, job_id: int):
+@celery_app.task(name="app.tasks.generate_leads")
+def generate_leads_task(job_id: int):
     """
-    Celery task that manages the lifecycle of a lead generation job (QUEUED -> PROCESSING -> COMPLETED/FAILED).
+    Hand a job queued under this task (before the API enqueued
+    `scrape_leads_task` directly) over to `scrape_leads_task`, which
+    checkpoints the scrape and resumes it when redelivered.
+
+    Only pending jobs are handed over, and the message is acknowledged on
+    receipt rather than late: a redelivery after the hand-over would start a
+    second scrape of the same job.
     """
+    from app.tasks.scrape_task import scrape_leads_task
+
     db = SessionLocal()
     try:
-        # 1. Fetch Job from DB
         job = db.get(Job, job_id)
         if not job:
             logger.error(f"Job {job_id} not found in database.")
             return
-
-        # Idempotency Guard: Do not re-process terminated or already processed jobs 
-        if job.status in ["completed", "failed", "cancelled"]:
+        if job.status != "pending":
             logger.warning(f"Job {job_id} is already in state '{job.status}'. Exiting to prevent duplicate execution.")
             return
-            
-        # 2. Transition job -> PROCESSING
-        job.status = "processing"
-        job.started_at = datetime.now(timezone.utc)
-        job.progress = 0
-        db.commit()
-
-        # Cancellation Guard: Check if the job was cancelled just before processing began
-        db.refresh(job)
-        if job.status == "cancelled":
-            logger.info(f"Job {job_id} was cancelled. Halting execution.")
-            return
-
-        # 3. Call placeholder scraper
-        try:
-            scraper = BaseLeadScraper()
-            scraper.scrape(intent=job.intent, lead_count=job.lead_count, job_id=job.id)
-
-            # If the scraper doesn't raise, we update to 100%
-            job.progress = 100
-            job.status = "completed"
-            
-            # (In a real implementation, we might insert the returned Leads here)
-            # Insert dummy leads on success:
-            # db.add(Lead(job_id=job.id, name="Dummy Lead", confidence=0.9))
-
-        except NotImplementedError as e:
-            # Trap the NotImplementedError and fail the job gracefully exactly as requested
-            logger.warning(f"Job {job_id} failed intentionally: {str(e)}")
-            job.status = "failed"
-            job.error_message = str(e)
-            
-        except Exception as e:
-            # Catch all generic exceptions
-            logger.error(f"Job {job_id} failed with error: {str(e)}")
-            logger.debug(traceback.format_exc())
+        if not job.search_params:
             job.status = "failed"
-            job.error_message = str(e)
-
-        # 4. Set completed_at and persist transitions
-        job.completed_at = datetime.now(timezone.utc)
-        db.commit()
-
-    except Exception as exc:
-        logger.error(f"Critical error in task {self.request.id}: {exc}")
-        db.rollback()
-        raise exc
+            job.error_message = "Job has no search parameters to scrape with."
+            job.completed_at = datetime.now(timezone.utc)
+            db.commit()
+            publish_job_state(get_sync_redis(), job)
+            return
+        enqueue_job(scrape_leads_task, job, job.search_params, job.lead_count, task_id=job.task_id)
     finally:
         db.close()
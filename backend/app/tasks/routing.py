@@ -0,0 +1,109 @@
+"""
+Job queue tiers — which Celery queue and priority a lead job goes to.
+
+Jobs are split by size so a large job never sits in front of a small one:
+
+    jobs.small   lead_count <= QUEUE_SMALL_MAX_LEADS
+    jobs.medium  lead_count <= QUEUE_MEDIUM_MAX_LEADS
+    jobs.large   everything bigger
+
+Within a queue, the job's intent sets the broker priority. With the Redis
+broker, 0 is served first (priority steps 0/3/6/9), so interactive "career"
+jobs go ahead of "sales" and bulk "growth" jobs.
+
+`enqueue_job` puts the routing inputs (lead_count, intent) in the message
+headers; `route_job_task`, installed as `task_routes` in celery_app, turns
+them into a queue and priority. Run one worker per queue to give each tier
+its own concurrency (see `app.tasks.workers`).
+"""
+
+from typing import Any, Dict, Iterable, List, Optional
+
+import redis
+from celery import Task
+from prometheus_client.core import GaugeMetricFamily
+from prometheus_client.registry import Collector
+
+from app.config import settings
+
+SMALL, MEDIUM, LARGE = "jobs.small", "jobs.medium", "jobs.large"
+JOB_QUEUES = (SMALL, MEDIUM, LARGE)
+
+# Redis broker priorities: lower runs first
+PRIORITY_STEPS = [0, 3, 6, 9]
+INTENT_PRIORITY = {"career": 0, "sales": 3, "growth": 6}
+DEFAULT_PRIORITY = 6
+
+# Separator between a queue name and its priority step in the broker's Redis keys
+QUEUE_PRIORITY_SEP = ":"
+
+# Tasks that take a job and are routed by tier
+JOB_TASKS = {"app.tasks.generate_leads", "scrape_leads_task", "scrape_shard_task", "merge_shards_task"}
+
+
+def queue_for(lead_count: int) -> str:
+    if lead_count <= settings.QUEUE_SMALL_MAX_LEADS:
+        return SMALL
+    if lead_count <= settings.QUEUE_MEDIUM_MAX_LEADS:
+        return MEDIUM
+    return LARGE
+
+
+def priority_for(intent: Optional[str]) -> int:
+    return INTENT_PRIORITY.get(intent, DEFAULT_PRIORITY)
+
+
+def route_job_task(name, args, kwargs, options, task=None, **kw) -> Optional[Dict[str, Any]]:
+    """Celery router: tier queue + intent priority from the `enqueue_job` headers."""
+    if name not in JOB_TASKS:
+        return None
+    headers = options.get("headers") or {}
+    if "lead_count" not in headers:
+        return None
+    return {"queue": queue_for(int(headers["lead_count"])), "priority": priority_for(headers.get("intent"))}
+
+
+def enqueue_job(task: Task, job, *args, **options):
+    """`task.apply_async((job.id, *args))` routed by the job's size and intent."""
+    headers = {**options.pop("headers", {}), "lead_count": job.lead_count, "intent": job.intent}
+    return task.apply_async((job.id, *args), headers=headers, **options)
+
+
+# ---------------------------------------------------------------------------
+# Queue depth
+# ---------------------------------------------------------------------------
+def broker_queue_keys(queue: str) -> List[str]:
+    """Redis list keys holding `queue`'s messages, one per priority step."""
+    return [queue if step == 0 else f"{queue}{QUEUE_PRIORITY_SEP}{step}" for step in PRIORITY_STEPS]
+
+
+class QueueDepthCollector(Collector):
+    """Reports waiting messages per job queue, read from the Redis broker at scrape time."""
+
+    def __init__(self, queues: Iterable[str] = JOB_QUEUES, client: Optional[redis.Redis] = None):
+        self.queues = list(queues)
+        self._client = client
+
+    def _broker(self) -> Optional[redis.Redis]:
+        if self._client is None and settings.CELERY_BROKER_URL.startswith(("redis://", "rediss://")):
+            self._client = redis.Redis.from_url(settings.CELERY_BROKER_URL, socket_timeout=1)
+        return self._client
+
+    def collect(self) -> Iterable[GaugeMetricFamily]:
+        depth = GaugeMetricFamily(
+            "celery_queue_depth", "Messages waiting in a Celery job queue.", labels=["queue", "priority"]
+        )
+        client = self._broker()
+        if client is not None:
+            try:
+                pipe = client.pipeline(transaction=False)
+                for queue in self.queues:
+                    for key in broker_queue_keys(queue):
+                        pipe.llen(key)
+                lengths = iter(pipe.execute())
+                for queue in self.queues:
+                    for step in PRIORITY_STEPS:
+                        depth.add_metric([queue, str(step)], next(lengths))
+            except redis.RedisError:
+                pass
+        yield depth
@@ -1,11 +1,93 @@
 """
 Celery task: execute a scraping job in the background.
+
+Small jobs are scraped and stored by `scrape_leads_task` itself. Large jobs
+are fanned out as a chord: one `scrape_shard_task` per slice of the query
+plan (run in parallel on any free worker), followed by `merge_shards_task`,
+which de-duplicates and stores the leads of all shards and completes the job.
+
+Scraping tasks checkpoint their crawl (see `app.services.checkpoint`) and are
+acknowledged late: if a worker dies mid-scrape the message is delivered again,
+and a failed scrape is retried; either way the task resumes from its last
+checkpoint rather than starting over. A cancelled job stops between pages or
+batches (see `app.services.cancellation`).
+
+Before scraping, part of the job is served from the contact store: known
+contacts matching the search parameters (see `app.services.contacts`) are
+stored first, and only the rest of `lead_count` is scraped.
 """
 
+import asyncio
+import logging
+import traceback
+from datetime import datetime, timezone
+from functools import partial
+from typing import Any, Dict, List
+
+from celery import chord
+from celery.exceptions import Retry
+from sqlalchemy import func, select, update
+
+from app.config import settings
+from app.models.models import Job, JobLead
+from app.redis import get_sync_redis
+from app.services.cancellation import CancellationToken, JobCancelled
+from app.services.checkpoint import ScrapeCheckpoint
+from app.services.contacts import known_contacts
+from app.services.dedup import LeadDeduplicator
+from app.services.ingestion import LeadIngestor
+from app.services.job_events import publish_job_state
+from app.services.job_stats import record_page_cache
+from app.services.page_cache import PageCacheStats
+from app.services.scraper import CrawlState, build_query_plan, scrape_leads
+from app.services.sharding import SCRAPE_PROGRESS_SHARE, ShardProgress, plan_shards
 from app.tasks.celery_app import celery_app
+from app.tasks.generate_leads import SessionLocal
+
+logger = logging.getLogger(__name__)
+
+
+def _store_leads(db, job: Job, leads: List[Dict[str, Any]], redis_client, publish, progress_start: int = 0) -> None:
+    """De-duplicate against the user's earlier leads and save in batches."""
+    dedup = LeadDeduplicator(db, redis_client, job.user_id)
+    with LeadIngestor(
+        db, job, on_flush=publish, dedup=dedup, progress_start=progress_start, persisted=job.known_leads or 0
+    ) as ingestor:
+        ingestor.extend(leads)
+
+
+def _store_known_contacts(db, job: Job, search_params: dict, lead_count: int, redis_client, publish) -> None:
+    """Serve up to CONTACT_PREFILL_SHARE of the job from the contact store; counted on `Job.known_leads`."""
+    contacts = known_contacts(db, job.user_id, search_params, int(lead_count * settings.CONTACT_PREFILL_SHARE))
+    if not contacts:
+        return
+    dedup = LeadDeduplicator(db, redis_client, job.user_id)
+    with LeadIngestor(db, job, on_flush=publish, dedup=dedup, from_contacts=True) as ingestor:
+        ingestor.extend(contacts)
+    job.known_leads = ingestor.persisted
+    db.commit()
+    logger.info(f"Job {job.id}: {job.known_leads} of {lead_count} leads served from known contacts")
 
 
-@celery_app.task(bind=True, name="scrape_leads_task")
+def _clear_shard_state(redis_client, job: Job, shard_results: List[Dict[str, Any]]) -> None:
+    ShardProgress(redis_client, job.id, job.lead_count).clear()
+    for result in shard_results:
+        ScrapeCheckpoint(redis_client, job.id, f"shard-{result['shard']}").clear()
+
+
+def _log_page_cache(job_id: int, stats: PageCacheStats, part: str = "") -> None:
+    if stats.lookups:
+        logger.info(
+            f"Job {job_id}{part}: page cache hit rate {stats.hit_rate:.0%} ({stats.hits} fresh, "
+            f"{stats.revalidated} revalidated, {stats.misses} downloaded)"
+        )
+
+
+def _retry_countdown(retries: int) -> int:
+    return settings.SCRAPE_RETRY_BACKOFF_SECONDS * 2 ** retries
+
+
+@celery_app.task(bind=True, name="scrape_leads_task", acks_late=True, reject_on_worker_lost=True)
 def scrape_leads_task(self, job_id: int, search_params: dict, lead_count: int):
     """
     Background task that runs the scraper and updates job status.
@@ -16,10 +98,225 @@ def scrape_leads_task(self, job_id: int, search_params: dict, lead_count: int):
         lead_count: Number of leads to scrape.
     """
     # TODO:
-    # 1. Update job status to PROCESSING
-    # 2. Call scraper.scrape_leads(search_params, lead_count)
-    # 3. De-duplicate results
-    # 4. Save leads to DB
     # 5. Generate CSV, upload to S3
-    # 6. Update job status to COMPLETED with result_url
-    pass
+    db = SessionLocal()
+    redis_client = get_sync_redis()
+    publish = partial(publish_job_state, redis_client)
+    try:
+        job = db.get(Job, job_id)
+        if not job:
+            logger.error(f"Job {job_id} not found in database.")
+            return
+        if job.status in ["completed", "failed", "cancelled"]:
+            logger.warning(f"Job {job_id} is already in state '{job.status}'. Exiting to prevent duplicate execution.")
+            return
+
+        checkpoint = ScrapeCheckpoint(redis_client, job_id)
+        state, _ = checkpoint.load()
+        # Redelivered after a lost worker, or retried: keep what earlier runs stored
+        resumed = job.status == "processing"
+        if resumed and state is not None:
+            logger.info(
+                f"Job {job_id}: resuming from checkpoint ({len(state.done)} pages done, "
+                f"{len(state.pending)} pending, {state.leads} leads)"
+            )
+        elif resumed:
+            logger.info(f"Job {job_id}: run again before its first checkpoint; crawling from the start")
+        else:
+            state = None
+            # 1. Update job status to PROCESSING
+            job.status = "processing"
+            job.started_at = datetime.now(timezone.utc)
+            job.progress = 0
+            db.commit()
+            publish(job)
+            _store_known_contacts(db, job, search_params, lead_count, redis_client, publish)
+
+        # Leads still to scrape; fixed for the job once the known contacts are stored
+        scrape_count = lead_count - (job.known_leads or 0)
+        shards = plan_shards(build_query_plan(search_params), scrape_count)
+        if len(shards) > 1:
+            # Large job: scrape the plan slices in parallel, merge_shards_task completes the job
+            headers = {"intent": job.intent}
+            chord([
+                scrape_shard_task.s(job_id, shard.index, shard.queries, shard.lead_quota).set(
+                    headers={**headers, "lead_count": shard.lead_quota}
+                )
+                for shard in shards
+            ])(merge_shards_task.s(job_id).set(headers={**headers, "lead_count": lead_count}))
+            logger.info(f"Job {job_id}: fanned out into {len(shards)} shards")
+            return
+
+        try:
+            # 2 + 3 + 4. Run the concurrent scraping engine; at every checkpoint the new
+            # leads are de-duplicated and saved before the crawl position is checkpointed
+            stored = job.known_leads or 0
+            if resumed:
+                stored = db.scalar(select(func.count()).select_from(JobLead).where(JobLead.job_id == job_id))
+            dedup = LeadDeduplicator(db, redis_client, job.user_id)
+            cancel = CancellationToken(redis_client, job_id)
+            cache_stats = PageCacheStats()
+            with LeadIngestor(
+                db, job, on_flush=publish, dedup=dedup, persisted=stored, cancel=cancel
+            ) as ingestor:
+
+                def save_checkpoint(crawl: CrawlState, leads: List[Dict[str, Any]]) -> None:
+                    ingestor.extend(leads)
+                    ingestor.flush()
+                    checkpoint.save(crawl)
+
+                if scrape_count > 0:
+                    asyncio.run(scrape_leads(
+                        search_params, scrape_count, resume=state, on_checkpoint=save_checkpoint,
+                        should_stop=cancel.cancelled, cache_stats=cache_stats,
+                    ))
+            _log_page_cache(job_id, cache_stats)
+            record_page_cache(db, job_id, cache_stats)
+
+            # 6. Mark the job completed
+            job.progress = 100
+            job.status = "completed"
+        except JobCancelled:
+            # cancel_job already recorded the final state
+            db.rollback()
+            checkpoint.clear()
+            cancel.stopped()
+            return
+        except Exception as e:
+            if self.request.retries < settings.SCRAPE_MAX_RETRIES:
+                db.rollback()
+                logger.warning(f"Job {job_id} failed with error: {e}; retrying from the last checkpoint")
+                raise self.retry(exc=e, countdown=_retry_countdown(self.request.retries))
+            logger.error(f"Job {job_id} failed with error: {str(e)}")
+            logger.debug(traceback.format_exc())
+            job.status = "failed"
+            job.error_message = str(e)
+
+        job.completed_at = datetime.now(timezone.utc)
+        db.commit()
+        publish(job)
+        checkpoint.clear()
+
+    except Retry:
+        raise
+    except Exception as exc:
+        logger.error(f"Critical error in task {self.request.id}: {exc}")
+        db.rollback()
+        raise exc
+    finally:
+        db.close()
+
+
+@celery_app.task(bind=True, name="scrape_shard_task", acks_late=True, reject_on_worker_lost=True)
+def scrape_shard_task(self, job_id: int, shard_index: int, queries: List[str], lead_quota: int) -> Dict[str, Any]:
+    """
+    Scrape one shard of a job and return its leads for `merge_shards_task`.
+
+    The shard's leads are kept with its checkpoint until the merge step has
+    stored them. Errors are retried, then returned rather than raised, so one
+    failed shard does not discard the leads of the others.
+    """
+    db = SessionLocal()
+    redis_client = get_sync_redis()
+    try:
+        job = db.get(Job, job_id)
+        if job is None or job.status != "processing":
+            return {"shard": shard_index, "leads": [], "error": "job is no longer processing"}
+        progress = ShardProgress(redis_client, job_id, job.lead_count)
+        cancel = CancellationToken(redis_client, job_id)
+        checkpoint = ScrapeCheckpoint(redis_client, job_id, f"shard-{shard_index}")
+        state, kept = checkpoint.load()
+        if state is not None:
+            logger.info(f"Job {job_id} shard {shard_index}: resuming with {len(kept)} leads")
+
+        def report(collected: int) -> None:
+            percent = progress.report(shard_index, collected)
+            if percent is None:
+                return
+            # Conditional update: shards report concurrently and progress must not go backwards
+            advanced = db.execute(
+                update(Job)
+                .where(Job.id == job_id, Job.status == "processing", Job.progress < percent)
+                .values(progress=percent)
+            ).rowcount
+            db.commit()
+            if advanced:
+                db.refresh(job)
+                publish_job_state(redis_client, job)
+
+        cache_stats = PageCacheStats()
+        try:
+            leads = asyncio.run(scrape_leads(
+                {}, lead_quota, queries=queries, on_progress=report,
+                resume=state, on_checkpoint=checkpoint.save, should_stop=cancel.cancelled,
+                cache_stats=cache_stats,
+            ))
+        except Exception as e:
+            if self.request.retries < settings.SCRAPE_MAX_RETRIES:
+                logger.warning(f"Job {job_id} shard {shard_index} failed: {e}; retrying from the last checkpoint")
+                raise self.retry(exc=e, countdown=_retry_countdown(self.request.retries))
+            logger.error(f"Job {job_id} shard {shard_index} failed: {e}")
+            logger.debug(traceback.format_exc())
+            # Hand over what the attempts checkpointed: the merge stores it before clearing the checkpoint
+            _, kept = checkpoint.load()
+            return {"shard": shard_index, "leads": kept, "error": str(e)}
+        if cancel.cancelled():
+            checkpoint.clear()
+            cancel.stopped()
+            return {"shard": shard_index, "leads": [], "error": "job was cancelled"}
+        _log_page_cache(job_id, cache_stats, f" shard {shard_index}")
+        record_page_cache(db, job_id, cache_stats)
+        db.commit()
+        return {"shard": shard_index, "leads": kept + leads, "error": None}
+    finally:
+        db.close()
+
+
+@celery_app.task(bind=True, name="merge_shards_task")
+def merge_shards_task(self, shard_results: List[Dict[str, Any]], job_id: int):
+    """Chord callback: de-duplicate and store all shards' leads, then complete the job."""
+    db = SessionLocal()
+    redis_client = get_sync_redis()
+    publish = partial(publish_job_state, redis_client)
+    try:
+        job = db.get(Job, job_id)
+        if not job:
+            logger.error(f"Job {job_id} not found in database.")
+            return
+        if job.status != "processing":
+            logger.warning(f"Job {job_id} is in state '{job.status}'; discarding shard results.")
+            _clear_shard_state(redis_client, job, shard_results)
+            return
+
+        shard_results = sorted(shard_results, key=lambda result: result["shard"])
+        errors = [f"shard {result['shard']}: {result['error']}" for result in shard_results if result["error"]]
+        try:
+            if len(errors) == len(shard_results) and not any(result["leads"] for result in shard_results):
+                raise RuntimeError("; ".join(errors))
+
+            leads = [lead for result in shard_results for lead in result["leads"]]
+            job.progress = max(job.progress, SCRAPE_PROGRESS_SHARE)
+            _store_leads(db, job, leads, redis_client, publish, progress_start=SCRAPE_PROGRESS_SHARE)
+
+            job.progress = 100
+            job.status = "completed"
+            if errors:
+                # Partial result: keep what the healthy shards, and failed ones up to their checkpoints, found
+                job.error_message = "; ".join(errors)
+        except Exception as e:
+            logger.error(f"Job {job_id} failed with error: {str(e)}")
+            logger.debug(traceback.format_exc())
+            job.status = "failed"
+            job.error_message = str(e)
+
+        job.completed_at = datetime.now(timezone.utc)
+        db.commit()
+        publish(job)
+        _clear_shard_state(redis_client, job, shard_results)
+
+    except Exception as exc:
+        logger.error(f"Critical error in task {self.request.id}: {exc}")
+        db.rollback()
+        raise exc
+    finally:
+        db.close()
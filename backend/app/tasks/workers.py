@@ -0,0 +1,41 @@
+"""
+Start a Celery worker dedicated to one job queue tier.
+
+    python -m app.tasks.workers small            # jobs.small, WORKER_CONCURRENCY_SMALL processes
+    python -m app.tasks.workers large --loglevel=info
+
+Each tier gets its own worker (and concurrency), so small jobs keep their
+latency no matter how many large jobs are queued. Extra arguments are passed
+to `celery worker` unchanged.
+"""
+
+import os
+import sys
+from typing import List
+
+from app.config import settings
+from app.tasks.routing import LARGE, MEDIUM, SMALL
+
+TIERS = {
+    "small": (SMALL, lambda: settings.WORKER_CONCURRENCY_SMALL),
+    "medium": (MEDIUM, lambda: settings.WORKER_CONCURRENCY_MEDIUM),
+    "large": (LARGE, lambda: settings.WORKER_CONCURRENCY_LARGE),
+}
+
+
+def worker_argv(tier: str, extra: List[str] = ()) -> List[str]:
+    queue, concurrency = TIERS[tier]
+    return [
+        "celery", "-A", "app.tasks.celery_app", "worker",
+        "-Q", queue,
+        "-c", str(concurrency()),
+        "-n", f"{tier}@%h",
+        *extra,
+    ]
+
+
+if __name__ == "__main__":
+    if len(sys.argv) < 2 or sys.argv[1] not in TIERS:
+        sys.exit(f"usage: python -m app.tasks.workers {{{','.join(TIERS)}}} [celery worker options]")
+    argv = worker_argv(sys.argv[1], sys.argv[2:])
+    os.execvp(argv[0], argv)
@@ -0,0 +1,208 @@
+"""
+Upload handling — size-capped, streamed resume uploads and off-loop text extraction.
+
+  * `UploadSizeLimitMiddleware` rejects bodies over UPLOAD_MAX_BYTES with 413:
+    up front from Content-Length, or as soon as a streamed body passes the cap,
+    so an oversized upload is never read to the end.
+  * Multipart parsing spools the file (in memory up to 1 MiB, then on disk);
+    `stage_upload` copies it to a named temp file in chunks on a worker thread,
+    hashing the content on the way.
+  * `extract_text` runs in a small process pool (PDF parsing is CPU-bound), with
+    a cap on queued work like the bcrypt pool.
+  * Extracted text is cached by content hash, so the same file uploaded again
+    skips extraction.
+"""
+
+import asyncio
+import hashlib
+import os
+import tempfile
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import BinaryIO, Optional, Tuple
+
+from starlette.concurrency import run_in_threadpool
+from starlette.responses import JSONResponse
+
+from app.config import settings
+from app.services.cache import TwoTierCache
+
+CHUNK_SIZE = 64 * 1024
+
+text_cache = TwoTierCache(
+    "upload:text",
+    maxsize=settings.UPLOAD_TEXT_CACHE_MAX_ENTRIES,
+    ttl=settings.UPLOAD_TEXT_CACHE_TTL_SECONDS,
+)
+
+_extract_executor: Optional[ProcessPoolExecutor] = None
+_extract_executor_lock = threading.Lock()
+_extract_slots = threading.BoundedSemaphore(settings.TEXT_EXTRACT_MAX_PENDING)
+
+
+class ExtractionPoolSaturated(Exception):
+    """Raised when TEXT_EXTRACT_MAX_PENDING extractions are already queued or running."""
+
+
+class UnreadableDocument(Exception):
+    """The upload could not be parsed as the declared file type."""
+
+
+# ---------------------------------------------------------------------------
+# Size cap
+# ---------------------------------------------------------------------------
+class _BodyTooLarge(Exception):
+    pass
+
+
+class UploadSizeLimitMiddleware:
+    """ASGI middleware capping request bodies under `path_prefix` at `max_bytes`."""
+
+    def __init__(self, app, path_prefix: str, max_bytes: Optional[int] = None):
+        self.app = app
+        self.path_prefix = path_prefix
+        self.max_bytes = max_bytes
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not scope["path"].startswith(self.path_prefix):
+            await self.app(scope, receive, send)
+            return
+
+        limit = self.max_bytes if self.max_bytes is not None else settings.UPLOAD_MAX_BYTES
+        declared = dict(scope["headers"]).get(b"content-length")
+        if declared is not None and declared.isdigit() and int(declared) > limit:
+            await self._reject(scope, receive, send, limit)
+            return
+
+        received = 0
+        exceeded = started = False
+
+        async def receive_wrapper():
+            nonlocal received, exceeded
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > limit:
+                    exceeded = True
+                    raise _BodyTooLarge()
+            return message
+
+        async def send_wrapper(message):
+            nonlocal started
+            # Body parsing errors become a 400 downstream; the 413 replaces it
+            if not exceeded:
+                started = started or message["type"] == "http.response.start"
+                await send(message)
+
+        try:
+            await self.app(scope, receive_wrapper, send_wrapper)
+        except _BodyTooLarge:
+            pass
+        if exceeded and not started:
+            await self._reject(scope, receive, send, limit)
+
+    @staticmethod
+    async def _reject(scope, receive, send, limit: int) -> None:
+        response = JSONResponse(
+            {"detail": f"Upload exceeds the {limit // (1024 * 1024)} MiB limit."},
+            status_code=413,
+            headers={"Connection": "close"},
+        )
+        await response(scope, receive, send)
+
+
+# ---------------------------------------------------------------------------
+# Staging
+# ---------------------------------------------------------------------------
+@dataclass
+class StagedUpload:
+    path: str
+    sha256: str
+    size: int
+
+    def discard(self) -> None:
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+
+def _copy_and_hash(source: BinaryIO) -> StagedUpload:
+    source.seek(0)
+    digest = hashlib.sha256()
+    size = 0
+    with tempfile.NamedTemporaryFile(prefix="upload-", delete=False) as target:
+        try:
+            while chunk := source.read(CHUNK_SIZE):
+                digest.update(chunk)
+                size += len(chunk)
+                target.write(chunk)
+        except BaseException:
+            os.unlink(target.name)
+            raise
+    return StagedUpload(target.name, digest.hexdigest(), size)
+
+
+async def stage_upload(source: BinaryIO) -> StagedUpload:
+    """Copy an uploaded file to a named temp file and hash it, off the event loop."""
+    return await run_in_threadpool(_copy_and_hash, source)
+
+
+# ---------------------------------------------------------------------------
+# Extraction
+# ---------------------------------------------------------------------------
+def extract_text(path: str, content_type: str) -> str:
+    """Plain text of a PDF or TXT file (runs in the extraction pool)."""
+    if content_type == "application/pdf":
+        from pypdf import PdfReader
+        from pypdf.errors import PdfReadError
+
+        try:
+            reader = PdfReader(path)
+            return "\n".join(page.extract_text() or "" for page in reader.pages).strip()
+        except (PdfReadError, ValueError, KeyError) as e:
+            raise UnreadableDocument(f"Could not read the PDF: {e}") from None
+
+    with open(path, "rb") as f:
+        return f.read().decode("utf-8", errors="replace").strip()
+
+
+def get_extract_executor() -> ProcessPoolExecutor:
+    global _extract_executor
+    with _extract_executor_lock:
+        if _extract_executor is None:
+            _extract_executor = ProcessPoolExecutor(max_workers=settings.TEXT_EXTRACT_WORKERS)
+        return _extract_executor
+
+
+def shutdown_extract_executor() -> None:
+    global _extract_executor
+    with _extract_executor_lock:
+        if _extract_executor is not None:
+            _extract_executor.shutdown(wait=False, cancel_futures=True)
+            _extract_executor = None
+
+
+async def aextract_text(path: str, content_type: str) -> str:
+    """`extract_text` in the extraction pool. Raises ExtractionPoolSaturated."""
+    if not _extract_slots.acquire(blocking=False):
+        raise ExtractionPoolSaturated()
+    try:
+        future = get_extract_executor().submit(extract_text, path, content_type)
+    except Exception:
+        _extract_slots.release()
+        raise
+    future.add_done_callback(lambda _: _extract_slots.release())
+    return await asyncio.wrap_future(future)
+
+
+async def text_of_upload(staged: StagedUpload, content_type: str) -> Tuple[str, bool]:
+    """(text, whether it came from the content-hash cache)."""
+    key = f"{content_type}:{staged.sha256}"
+    cached = await text_cache.get(key)
+    if cached is not None:
+        return cached, True
+    text = await aextract_text(staged.path, content_type)
+    await text_cache.set(key, text)
+    return text, False
@@ -0,0 +1 @@
+# Lead Gen Tool — Benchmarks Package
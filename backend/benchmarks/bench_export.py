@@ -0,0 +1,39 @@
+"""
+Export throughput benchmark.
+
+Seeds a throwaway SQLite database with jobs of increasing size and times a full
+`/jobs/{job_id}/export` download for each. With keyset pagination the time per
+lead should stay roughly flat as the job grows (linear total cost); an
+OFFSET-paginated export shows time per lead climbing with the lead count.
+
+Run from the backend directory:
+    python -m benchmarks.bench_export --sizes 1000 5000 20000 --engine copy
+"""
+
+import argparse
+
+from benchmarks.harness import BenchEnvironment, best_of
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1000, 2000, 4000, 8000, 16000])
+    parser.add_argument("--engine", choices=["orm", "copy"], default="orm")
+    parser.add_argument("--repeat", type=int, default=3, help="Best-of-N timing per size.")
+    args = parser.parse_args()
+
+    with BenchEnvironment() as env:
+        print(f"{'leads':>8} {'seconds':>10} {'us/lead':>10}")
+        for size in args.sizes:
+            [job_id] = env.seed_jobs(jobs=1, leads_per_job=size)
+
+            def download():
+                response = env.client.get(f"/api/leads/jobs/{job_id}/export", params={"engine": args.engine})
+                response.raise_for_status()
+
+            best = best_of(download, args.repeat)
+            print(f"{size:>8} {best:>10.3f} {best / size * 1e6:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
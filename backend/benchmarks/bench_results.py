@@ -0,0 +1,65 @@
+"""
+Results page benchmark: ORM path vs the projected "columns" engine.
+
+Seeds a throwaway SQLite database with one job and walks every page of
+`/jobs/{job_id}/results` with each engine. The ORM path builds `JobLead` objects
+and validates each through `LeadResponse`; `engine=columns` selects only the
+response columns as tuples and writes them with orjson. Per-page latency is
+reported for each page size along with the speed-up over the ORM path.
+
+Run from the backend directory:
+    python -m benchmarks.bench_results --leads 20000 --page-sizes 100 1000 --order-by -confidence
+"""
+
+import argparse
+import time
+from typing import List
+
+from app.services.export import RESULT_ORDERINGS
+from benchmarks.harness import BenchEnvironment, summarize_latencies
+
+ENGINES = ("orm", "columns")
+
+
+def walk(env: BenchEnvironment, job_id: int, engine: str, page_size: int, order_by: str) -> List[float]:
+    """Fetch every page once; returns the latency of each request in seconds."""
+    cursor, samples = None, []
+    while True:
+        params = {"limit": page_size, "order_by": order_by, "engine": engine}
+        if cursor is not None:
+            params["cursor"] = cursor
+        start = time.perf_counter()
+        response = env.client.get(f"/api/leads/jobs/{job_id}/results", params=params)
+        samples.append(time.perf_counter() - start)
+        response.raise_for_status()
+        cursor = response.json()["next_cursor"]
+        if cursor is None:
+            return samples
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--leads", type=int, default=20000)
+    parser.add_argument("--page-sizes", type=int, nargs="+", default=[100, 1000])
+    parser.add_argument("--order-by", choices=RESULT_ORDERINGS, default="id")
+    parser.add_argument("--repeat", type=int, default=3, help="Full walks per engine and page size.")
+    args = parser.parse_args()
+
+    with BenchEnvironment() as env:
+        [job_id] = env.seed_jobs(jobs=1, leads_per_job=args.leads)
+        print(f"{'page':>6} {'engine':>8} {'p50 ms':>9} {'p99 ms':>9} {'mean ms':>9} {'speed-up':>9}")
+        for page_size in args.page_sizes:
+            baseline = None
+            for engine in ENGINES:
+                walk(env, job_id, engine, page_size, args.order_by)  # warm-up
+                samples = [s for _ in range(args.repeat) for s in walk(env, job_id, engine, page_size, args.order_by)]
+                summary = summarize_latencies(samples)
+                baseline = baseline or summary["mean_ms"]
+                print(
+                    f"{page_size:>6} {engine:>8} {summary['p50_ms']:>9.2f} {summary['p99_ms']:>9.2f} "
+                    f"{summary['mean_ms']:>9.2f} {baseline / summary['mean_ms']:>8.2f}x"
+                )
+
+
+if __name__ == "__main__":
+    main()
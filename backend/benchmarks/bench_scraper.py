@@ -0,0 +1,52 @@
+"""
+Scraper engine throughput benchmark.
+
+Runs the ScrapeEngine against the local fixture site (with simulated per-page
+latency) at several concurrency levels and reports pages per second. Uses the
+browser-less fetcher by default; pass --browser to render with Playwright.
+
+Run from the backend directory:
+    python -m benchmarks.bench_scraper --concurrency 1 2 4 8 16 --latency 0.05
+"""
+
+import argparse
+import asyncio
+
+from app.services.scraper import DomainRateLimiter, HttpxFetcherPool, PlaywrightFetcherPool, ScrapeEngine
+from tests.fixture_site import FixtureSite
+
+
+async def run_once(site: FixtureSite, pool, concurrency: int, queries: int, rate: float) -> ScrapeEngine:
+    seeds = [site.url(f"/search?q=bench{i}") for i in range(queries)]
+    engine = ScrapeEngine(
+        pool=pool,
+        lead_count=10 ** 9,  # never stop early: visit every page
+        concurrency=concurrency,
+        rate_limiter=DomainRateLimiter(rate=rate, burst=max(1.0, rate)),
+    )
+    await engine.run(seeds)
+    return engine
+
+
+async def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--queries", type=int, default=8, help="Seed queries (independent paginations).")
+    parser.add_argument("--pages", type=int, default=5, help="Pages per query.")
+    parser.add_argument("--latency", type=float, default=0.05, help="Simulated server latency per page (s).")
+    parser.add_argument("--rate", type=float, default=1000.0, help="Per-domain requests/s allowed.")
+    parser.add_argument("--browser", action="store_true", help="Render pages with Playwright.")
+    args = parser.parse_args()
+
+    print(f"{'concurrency':>11} {'pages':>6} {'seconds':>8} {'pages/s':>8}")
+    with FixtureSite(pages_per_query=args.pages, leads_per_page=10, latency=args.latency) as site:
+        for concurrency in args.concurrency:
+            pool = PlaywrightFetcherPool(size=min(concurrency, 4)) if args.browser else HttpxFetcherPool(size=concurrency)
+            async with pool:
+                engine = await run_once(site, pool, concurrency, args.queries, args.rate)
+            stats = engine.stats
+            print(f"{concurrency:>11} {stats.pages:>6} {stats.elapsed:>8.2f} {stats.pages_per_second:>8.1f}")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,165 @@
+"""
+Shared setup for the benchmarks: a throwaway database wired into the app,
+fast seeding and latency summaries.
+
+`BenchEnvironment` creates the schema on the given database (a temporary
+SQLite file by default), points the app's sync and async session dependencies
+at it and opens a `TestClient`, so requests go through the full FastAPI stack
+without a server process.
+"""
+
+import math
+import os
+import shutil
+import tempfile
+import time
+from typing import Callable, Dict, List, Optional, Sequence
+
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, make_url
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+from app.database import Base, get_async_db, get_db, to_async_url
+from app.models.models import Job, User
+from app.services.ingestion import LeadIngestor
+from main import app
+
+SEED_CHUNK = 10_000
+
+
+def lead_row(job_id: int, i: int) -> Dict:
+    # The same `i` is the same person in every job, as with contacts found by several jobs
+    return {
+        "job_id": job_id,
+        "name": f"Lead {i}",
+        "email": f"lead{i}@example.com",
+        "company": f"Company {i % 97}",
+        "title": "CTO",
+        "source_url": f"https://example.com/people/{i}",
+        "confidence": (i % 100) / 100,
+    }
+
+
+class BenchEnvironment:
+    """
+    Usage:
+        with BenchEnvironment(database_url) as env:
+            job_ids = env.seed_jobs(jobs=10, leads_per_job=1000)
+            env.client.get(f"/api/leads/jobs/{job_ids[0]}/results")
+
+    Pass a dedicated Postgres database to benchmark against Postgres: the
+    schema is created in it and its tables are dropped again on exit.
+    """
+
+    def __init__(self, database_url: Optional[str] = None):
+        self._tmpdir = None
+        if database_url is None:
+            self._tmpdir = tempfile.mkdtemp(prefix="leadgen-bench-")
+            database_url = f"sqlite:///{os.path.join(self._tmpdir, 'bench.db')}"
+        self.database_url = database_url
+        self.dialect = make_url(database_url).get_backend_name()
+
+    def __enter__(self) -> "BenchEnvironment":
+        self.engine = create_engine(self.database_url)
+        self.SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=self.engine)
+        Base.metadata.drop_all(bind=self.engine)
+        Base.metadata.create_all(bind=self.engine)
+
+        self.async_engine = create_async_engine(to_async_url(self.database_url), poolclass=NullPool)
+        self.AsyncSessionLocal = async_sessionmaker(bind=self.async_engine, expire_on_commit=False)
+
+        def override_get_db():
+            db = self.SessionLocal()
+            try:
+                yield db
+            finally:
+                db.close()
+
+        async def override_get_async_db():
+            db = self.AsyncSessionLocal()
+            try:
+                yield db
+            finally:
+                await db.close()
+
+        app.dependency_overrides[get_db] = override_get_db
+        app.dependency_overrides[get_async_db] = override_get_async_db
+        # Entering the client keeps one event loop for the whole run
+        self.client = TestClient(app).__enter__()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.client.__exit__(None, None, None)
+        app.dependency_overrides.pop(get_db, None)
+        app.dependency_overrides.pop(get_async_db, None)
+        Base.metadata.drop_all(bind=self.engine)
+        self.engine.dispose()
+        if self._tmpdir is not None:
+            shutil.rmtree(self._tmpdir, ignore_errors=True)
+
+    def seed_user(self, email: str, hashed_password: str = "x") -> int:
+        db = self.SessionLocal()
+        try:
+            user = User(email=email, hashed_password=hashed_password)
+            db.add(user)
+            db.commit()
+            return user.id
+        finally:
+            db.close()
+
+    def seed_jobs(self, jobs: int, leads_per_job: int, user_id: Optional[int] = None) -> List[int]:
+        """Create `jobs` completed jobs of `leads_per_job` leads each; return their ids."""
+        if user_id is None:
+            user_id = self.seed_user(f"bench_{time.time_ns()}@example.com")
+        db = self.SessionLocal()
+        try:
+            job_ids = []
+            for _ in range(jobs):
+                job = Job(user_id=user_id, intent="sales", lead_count=leads_per_job, status="completed", progress=100)
+                db.add(job)
+                db.commit()
+                # Through the ingestor, so contacts, job_leads and stats are what a real job leaves
+                with LeadIngestor(db, job, batch_size=SEED_CHUNK) as ingestor:
+                    ingestor.extend(lead_row(job.id, i) for i in range(leads_per_job))
+                job.progress = 100
+                db.commit()
+                job_ids.append(job.id)
+            return job_ids
+        finally:
+            db.close()
+
+
+# ---------------------------------------------------------------------------
+# Measurement helpers
+# ---------------------------------------------------------------------------
+def percentile(samples: Sequence[float], q: float) -> float:
+    """Nearest-rank percentile, `q` in [0, 100]."""
+    ordered = sorted(samples)
+    rank = max(1, math.ceil(q / 100 * len(ordered)))
+    return ordered[rank - 1]
+
+
+def summarize_latencies(samples: Sequence[float]) -> Dict[str, float]:
+    """Latency summary in milliseconds."""
+    return {
+        "count": len(samples),
+        "p50_ms": round(percentile(samples, 50) * 1000, 3),
+        "p99_ms": round(percentile(samples, 99) * 1000, 3),
+        "mean_ms": round(sum(samples) / len(samples) * 1000, 3),
+        "max_ms": round(max(samples) * 1000, 3),
+    }
+
+
+def time_calls(call: Callable[[], object], iterations: int) -> List[float]:
+    samples = []
+    for _ in range(iterations):
+        start = time.perf_counter()
+        call()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def best_of(call: Callable[[], object], repeat: int) -> float:
+    return min(time_calls(call, repeat))
@@ -2,16 +2,32 @@
 Lead Gen Tool — Backend Entry Point
 """
 
-from fastapi import FastAPI
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI, Response
 from fastapi.middleware.cors import CORSMiddleware
 
 from app.auth.router import router as auth_router
-from app.routes import leads, upload
+from app.auth.security import shutdown_hash_executor
+from app.config import settings
+from app.metrics import MetricsMiddleware, render_latest
+from app.profiling import SQLProfilingMiddleware
+from app.routes import debug, leads, upload
+from app.uploads import UploadSizeLimitMiddleware, shutdown_extract_executor
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    yield
+    shutdown_hash_executor()
+    shutdown_extract_executor()
+
 
 app = FastAPI(
     title="Lead Gen Tool API",
     description="Dynamic context-aware lead scraping engine",
     version="0.1.0",
+    lifespan=lifespan,
 )
 
 # ---------------------------------------------------------------------------
@@ -25,12 +41,26 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# ---------------------------------------------------------------------------
+# Uploads — hard cap on upload bodies (UPLOAD_MAX_BYTES)
+# ---------------------------------------------------------------------------
+app.add_middleware(UploadSizeLimitMiddleware, path_prefix="/api/upload")
+
+# ---------------------------------------------------------------------------
+# Metrics — SQL stats per request (Server-Timing) and per-route latency for
+# /metrics (outermost, so it times everything)
+# ---------------------------------------------------------------------------
+app.add_middleware(SQLProfilingMiddleware)
+app.add_middleware(MetricsMiddleware)
+
 # ---------------------------------------------------------------------------
 # Routers
 # ---------------------------------------------------------------------------
 app.include_router(auth_router, prefix="/api/auth", tags=["Authentication"])
 app.include_router(leads.router, prefix="/api/leads", tags=["Leads"])
 app.include_router(upload.router, prefix="/api/upload", tags=["Upload"])
+if settings.SQL_DEBUG_ENDPOINT:
+    app.include_router(debug.router, prefix="/api/debug", tags=["Debug"])
 
 
 @app.get("/", tags=["Health"])
@@ -39,6 +69,13 @@ async def health_check():
     return {"status": "ok", "service": "Lead Gen Tool API"}
 
 
+@app.get("/metrics", tags=["Health"], include_in_schema=False)
+def metrics():
+    """Prometheus scrape endpoint."""
+    body, content_type = render_latest()
+    return Response(content=body, media_type=content_type)
+
+
 if __name__ == "__main__":
     import uvicorn
 
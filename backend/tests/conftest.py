@@ -0,0 +1,77 @@
+import pytest
+from sqlalchemy.engine import make_url
+
+from app.auth import principal
+from app.config import settings
+from app.database import Base
+from app.models.models import Contact, Job, JobLead, User
+from app.services import ai_engine
+from app.services.cache import TwoTierCache
+from app.services.contacts import contact_fingerprint
+from tests.support import StubOpenAI, TestingSessionLocal, engine
+
+
+def pytest_collection_modifyitems(config, items):
+    if make_url(settings.DATABASE_URL).get_backend_name() == "postgresql":
+        return
+    skip = pytest.mark.skip(reason="needs PostgreSQL (DATABASE_URL is not a PostgreSQL URL)")
+    for item in items:
+        if "postgres" in item.keywords:
+            item.add_marker(skip)
+
+
+@pytest.fixture(scope="module")
+def setup_database():
+    """
+    Setup the isolated test database.
+    """
+    Base.metadata.drop_all(bind=engine)
+    Base.metadata.create_all(bind=engine)
+    
+    # Populate dummy data
+    db = TestingSessionLocal()
+    
+    # Create variables to share IDs back to the test suite
+    test_state = {}
+    
+    try:
+        dummy_user = User(email="dummy_test@example.com", hashed_password="hashed_password", full_name="Test User")
+        db.add(dummy_user)
+        db.commit()
+        db.refresh(dummy_user)
+        
+        dummy_job = Job(user_id=dummy_user.id, intent="sales", lead_count=50, status="completed")
+        db.add(dummy_job)
+        db.commit()
+        db.refresh(dummy_job)
+        
+        alice = {"name": "Alice CEO", "email": "alice@test.com"}
+        bob = {"name": "Bob CTO", "email": "bob@test.com"}
+        dummy_lead1 = JobLead(job_id=dummy_job.id, contact=Contact(fingerprint=contact_fingerprint(alice), **alice), confidence=0.95)
+        dummy_lead2 = JobLead(job_id=dummy_job.id, contact=Contact(fingerprint=contact_fingerprint(bob), **bob), confidence=0.88)
+        db.add_all([dummy_lead1, dummy_lead2])
+        db.commit()
+        
+        test_state["job_id"] = dummy_job.id
+    finally:
+        db.close()
+        
+    yield test_state
+    
+    # Teardown
+    Base.metadata.drop_all(bind=engine)
+
+
+
+@pytest.fixture
+def local_principal_cache(monkeypatch):
+    cache = TwoTierCache("test:principal", maxsize=16, ttl=60, redis_factory=None)
+    monkeypatch.setattr(principal, "principal_cache", cache)
+    return cache
+
+
+@pytest.fixture
+def stub_client(monkeypatch):
+    stub = StubOpenAI()
+    monkeypatch.setattr(ai_engine, "client", stub)
+    return stub
@@ -0,0 +1,104 @@
+"""
+Local static HTTP fixture site for scraper tests and benchmarks.
+
+Serves `/search?q=<query>&page=<n>` listing pages in the markup understood by
+`app.services.scraper.extract_leads`, with `rel="next"` links up to
+`pages_per_query`, and an optional per-request latency to mimic a real site.
+Pages carry an ETag; a matching If-None-Match is answered with 304.
+"""
+
+import hashlib
+import html
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+
+class _FixtureServer(ThreadingHTTPServer):
+    # The default backlog of 5 stalls high-concurrency benchmarks on SYN retries
+    request_queue_size = 128
+
+
+class FixtureSite:
+    """
+    Usage:
+        with FixtureSite(pages_per_query=3, leads_per_page=10) as site:
+            url = site.url("/search?q=python")
+    """
+
+    def __init__(self, pages_per_query: int = 3, leads_per_page: int = 10, latency: float = 0.0):
+        self.pages_per_query = pages_per_query
+        self.leads_per_page = leads_per_page
+        self.latency = latency
+        self.requests = 0
+        self.not_modified = 0
+        self._lock = threading.Lock()
+        self._server = _FixtureServer(("127.0.0.1", 0), self._handler())
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    def __enter__(self) -> "FixtureSite":
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self._server.shutdown()
+        self._server.server_close()
+
+    @property
+    def base_url(self) -> str:
+        host, port = self._server.server_address
+        return f"http://{host}:{port}"
+
+    def url(self, path: str) -> str:
+        return f"{self.base_url}{path}"
+
+    def render(self, query: str, page: int) -> str:
+        cards = "\n".join(
+            f'<div data-lead data-name="{html.escape(query)} Person {page}-{i}" '
+            f'data-email="p{page}_{i}@{html.escape(query.replace(" ", "-"))}.example" '
+            f'data-company="Company {i}" data-title="Engineer" '
+            f'data-source-url="/people/{html.escape(query.replace(" ", "-"))}/{page}-{i}"></div>'
+            for i in range(self.leads_per_page)
+        )
+        next_link = ""
+        if page < self.pages_per_query:
+            next_link = f'<a rel="next" href="/search?q={html.escape(query)}&amp;page={page + 1}">Next</a>'
+        return f"<html><body>{cards}{next_link}</body></html>"
+
+    def _handler(self):
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                with site._lock:
+                    site.requests += 1
+                if site.latency:
+                    time.sleep(site.latency)
+
+                parts = urlsplit(self.path)
+                params = parse_qs(parts.query)
+                if parts.path != "/search":
+                    self.send_error(404)
+                    return
+                body = site.render(params.get("q", [""])[0], int(params.get("page", ["1"])[0])).encode("utf-8")
+                etag = f'"{hashlib.sha1(body).hexdigest()}"'
+                if self.headers.get("If-None-Match") == etag:
+                    with site._lock:
+                        site.not_modified += 1
+                    self.send_response(304)
+                    self.send_header("ETag", etag)
+                    self.end_headers()
+                    return
+                self.send_response(200)
+                self.send_header("Content-Type", "text/html; charset=utf-8")
+                self.send_header("ETag", etag)
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                pass
+
+        return Handler
@@ -0,0 +1,85 @@
+"""
+Test database, session factories and API client shared by the test modules.
+
+Importing this module points the app's database and Redis dependencies at the
+test database (DATABASE_URL with `_test` appended) and per-request clients.
+The fixtures built on these live in `conftest.py`.
+"""
+
+import json
+from types import SimpleNamespace
+
+from redis import asyncio as aioredis
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine
+from sqlalchemy.ext.asyncio import async_sessionmaker, create_async_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
+
+from app.config import settings
+from app.database import get_async_db, get_db, to_async_url
+from app.redis import get_redis
+from main import app
+
+# For testing, we append `_test` to the database name so we don't accidentally
+# drop all production tables when running `pytest`.
+original_db = settings.DATABASE_URL.split("/")[-1]
+TEST_SQLALCHEMY_DATABASE_URL = settings.DATABASE_URL.replace(original_db, f"{original_db}_test")
+engine = create_engine(TEST_SQLALCHEMY_DATABASE_URL, pool_pre_ping=True)
+TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+# TestClient runs each request on a fresh event loop, so async connections must not be pooled across requests
+async_engine = create_async_engine(to_async_url(TEST_SQLALCHEMY_DATABASE_URL), poolclass=NullPool)
+TestingAsyncSessionLocal = async_sessionmaker(bind=async_engine, autoflush=False, expire_on_commit=False)
+
+
+def override_get_db():
+    try:
+        db = TestingSessionLocal()
+        yield db
+    finally:
+        db.close()
+
+
+async def override_get_async_db():
+    db = TestingAsyncSessionLocal()
+    try:
+        yield db
+    finally:
+        await db.close()
+
+
+async def override_get_redis():
+    # A client per request: the shared pool's connections are bound to one event loop
+    client = aioredis.Redis.from_url(settings.REDIS_URL, decode_responses=True)
+    try:
+        yield client
+    finally:
+        await client.aclose()
+
+
+app.dependency_overrides[get_db] = override_get_db
+app.dependency_overrides[get_async_db] = override_get_async_db
+app.dependency_overrides[get_redis] = override_get_redis
+client = TestClient(app)
+
+
+SEARCH_PARAMS = {
+    "keywords": ["Python", "FastAPI"],
+    "job_titles": ["Backend Engineer"],
+    "industries": ["SaaS"],
+    "location": "Remote",
+    "experience_level": "Senior",
+}
+
+
+class StubOpenAI:
+    """Stands in for the OpenAI client and counts completion calls."""
+
+    def __init__(self):
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, **kwargs):
+        self.calls += 1
+        message = SimpleNamespace(content=json.dumps(SEARCH_PARAMS))
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
@@ -0,0 +1,64 @@
+from redis import asyncio as aioredis
+
+from app.config import settings
+from app.services import ai_engine
+from app.services.cache import TwoTierCache
+from tests.support import SEARCH_PARAMS
+
+
+def _fresh_redis():
+    return aioredis.Redis.from_url(settings.REDIS_URL, decode_responses=True)
+
+
+async def test_parse_resume_local_tier(stub_client, monkeypatch):
+    cache = TwoTierCache("test:ai", maxsize=2, ttl=60, redis_factory=None)
+    monkeypatch.setattr(ai_engine, "resume_cache", cache)
+
+    first = await ai_engine.parse_resume("Senior  Python engineer\n")
+    # Whitespace-only differences normalize to the same cache key
+    second = await ai_engine.parse_resume("  Senior Python engineer")
+
+    assert first == second == SEARCH_PARAMS
+    assert stub_client.calls == 1
+    assert cache.stats()["misses"] == 1
+    assert cache.stats()["local_hits"] == 1
+
+
+async def test_parse_resume_lru_bound(stub_client, monkeypatch):
+    cache = TwoTierCache("test:ai", maxsize=2, ttl=60, redis_factory=None)
+    monkeypatch.setattr(ai_engine, "resume_cache", cache)
+
+    for text in ("resume a", "resume b", "resume c", "resume a"):
+        await ai_engine.parse_resume(text)
+
+    # "resume a" was evicted by "resume c" and had to be parsed again
+    assert stub_client.calls == 4
+    assert cache.stats()["local_size"] == 2
+
+
+async def test_parse_resume_redis_tier(stub_client, monkeypatch):
+    redis_client = _fresh_redis()
+    cache = TwoTierCache("test:ai", maxsize=8, ttl=60, redis_factory=lambda: redis_client)
+    monkeypatch.setattr(ai_engine, "resume_cache", cache)
+    text = "Growth lead for fintech startups"
+    await redis_client.delete(cache._redis_key(ai_engine.cache_key(text)))
+
+    try:
+        await ai_engine.parse_resume(text)
+        # Simulate another worker process: empty local tier, shared Redis tier
+        cache.clear_local()
+        result = await ai_engine.parse_resume(text)
+
+        assert result == SEARCH_PARAMS
+        assert stub_client.calls == 1
+        assert cache.stats()["redis_hits"] == 1
+        assert await redis_client.ttl(cache._redis_key(ai_engine.cache_key(text))) > 0
+    finally:
+        await redis_client.delete(cache._redis_key(ai_engine.cache_key(text)))
+        await redis_client.aclose()
+
+
+def test_cache_key_tracks_model(monkeypatch):
+    key = ai_engine.cache_key("same text")
+    monkeypatch.setattr(ai_engine, "MODEL", "gpt-4o-mini")
+    assert ai_engine.cache_key("same text") != key
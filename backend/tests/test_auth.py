@@ -1,7 +1,18 @@
-import pytest
+import asyncio
+import threading
+
 from fastapi.testclient import TestClient
+from passlib.context import CryptContext
+from redis import asyncio as aioredis
+from sqlalchemy import event, select
+
+from app.auth import principal, security
+from app.auth.security import pwd_context
+from app.config import settings
+from app.models.models import User
 from main import app
-from tests.test_leads import setup_database
+from app.services.cache import TwoTierCache
+from tests.support import async_engine, TestingAsyncSessionLocal, TestingSessionLocal
 
 client = TestClient(app)
 
@@ -45,3 +56,101 @@ def test_login_user_invalid_password(setup_database):
     )
     assert response.status_code == 401
     assert "Incorrect email or password" in response.json()["detail"]
+
+
+def test_login_rehashes_outdated_password(setup_database):
+    db = TestingSessionLocal()
+    try:
+        legacy_hash = CryptContext(schemes=["bcrypt"], bcrypt__rounds=4).hash("legacypass1")
+        user = User(email="legacy@example.com", hashed_password=legacy_hash)
+        db.add(user)
+        db.commit()
+
+        response = client.post(
+            "/api/auth/login",
+            data={"username": "legacy@example.com", "password": "legacypass1"}
+        )
+        assert response.status_code == 200
+
+        db.refresh(user)
+        assert user.hashed_password != legacy_hash
+        assert user.hashed_password.startswith(f"$2b${settings.BCRYPT_ROUNDS:02d}$")
+        assert not pwd_context.needs_update(user.hashed_password)
+    finally:
+        db.close()
+
+
+def test_login_returns_503_when_hash_pool_saturated(setup_database, monkeypatch):
+    full = threading.BoundedSemaphore(1)
+    full.acquire()
+    monkeypatch.setattr(security, "_hash_slots", full)
+
+    response = client.post(
+        "/api/auth/login",
+        data={"username": "authuser@example.com", "password": "mypassword1"}
+    )
+    assert response.status_code == 503
+    assert response.headers["Retry-After"] == "1"
+
+
+def test_current_user_is_cached_and_invalidated(setup_database, local_principal_cache):
+    login = client.post(
+        "/api/auth/login",
+        data={"username": "authuser@example.com", "password": "mypassword1"}
+    )
+    headers = {"Authorization": f"Bearer {login.json()['access_token']}"}
+
+    db = TestingSessionLocal()
+    user = db.execute(select(User).where(User.email == "authuser@example.com")).scalar_one()
+
+    statements = []
+    def count(conn, cursor, statement, *args):
+        statements.append(statement)
+    event.listen(async_engine.sync_engine, "before_cursor_execute", count)
+
+    try:
+        first = client.get("/api/auth/me", headers=headers)
+        assert first.status_code == 200
+        assert first.json()["email"] == "authuser@example.com"
+        assert len(statements) == 1
+
+        # Warm cache: no database round trip at all
+        assert client.get("/api/auth/me", headers=headers).status_code == 200
+        assert len(statements) == 1
+        assert local_principal_cache.stats()["local_hits"] == 1
+
+        # Deactivating the user through the ORM drops the cached principal on commit
+        user.is_active = False
+        db.commit()
+        assert local_principal_cache.stats()["local_size"] == 0
+        assert client.get("/api/auth/me", headers=headers).status_code == 400
+    finally:
+        event.remove(async_engine.sync_engine, "before_cursor_execute", count)
+        user.is_active = True
+        db.commit()
+        db.close()
+
+
+async def test_async_commit_invalidates_off_the_blocking_client(setup_database, monkeypatch):
+    redis_client = aioredis.Redis.from_url(settings.REDIS_URL, decode_responses=True)
+    cache = TwoTierCache("test:principal", maxsize=16, ttl=60, redis_factory=lambda: redis_client)
+    monkeypatch.setattr(principal, "principal_cache", cache)
+
+    def blocking_redis():
+        raise AssertionError("blocking Redis client used on the event loop")
+    monkeypatch.setattr(principal, "get_sync_redis", blocking_redis)
+
+    try:
+        async with TestingAsyncSessionLocal() as db:
+            user = User(email="principal-async@example.com", hashed_password="x")
+            db.add(user)
+            await db.commit()
+            await principal.cache_principal(user)
+
+            user.is_active = False
+            await db.commit()
+            assert cache.stats()["local_size"] == 0
+            await asyncio.gather(*principal._redis_deletes)
+            assert await redis_client.exists(f"cache:test:principal:{user.id}") == 0
+    finally:
+        await redis_client.aclose()
@@ -0,0 +1,113 @@
+import threading
+import time
+
+from prometheus_client import REGISTRY
+from sqlalchemy import update
+
+from app.config import settings
+from app.models.models import Job, User
+from app.redis import get_sync_redis
+from app.services.cancellation import CancellationToken, cancel_key
+from app.services.checkpoint import checkpoint_key
+from app.services.scraper import HttpxFetcherPool, ScrapeEngine
+from app.tasks import scrape_task
+from app.tasks.celery_app import celery_app
+from tests.fixture_site import FixtureSite
+from tests.support import SEARCH_PARAMS, client, TestingSessionLocal
+
+
+def test_token_reads_flag_at_most_once_per_interval():
+    redis_client = get_sync_redis()
+    redis_client.delete(cancel_key(616161))
+    token = CancellationToken(redis_client, 616161, interval=60)
+    assert not token.cancelled()
+
+    redis_client.set(cancel_key(616161), repr(time.time()))
+    try:
+        # Cached until the interval has passed
+        assert not token.cancelled()
+        assert CancellationToken(redis_client, 616161, interval=60).cancelled()
+    finally:
+        redis_client.delete(cancel_key(616161))
+
+
+async def test_engine_stops_when_asked():
+    with FixtureSite(pages_per_query=20, leads_per_page=5) as site:
+        async with HttpxFetcherPool(size=1) as pool:
+            engine = ScrapeEngine(
+                pool=pool, lead_count=100, concurrency=1,
+                should_stop=lambda: engine.stats.pages >= 3,
+            )
+            leads = await engine.run([site.url("/search?q=python")])
+
+    assert engine.stopped
+    assert engine.stats.pages == 3
+    assert len(leads) == 15
+
+
+def test_cancel_flags_job_for_its_worker(setup_database):
+    job_id = client.post(
+        "/api/leads/generate", json={"intent": "sales", "lead_count": 5, "search_params": SEARCH_PARAMS}
+    ).json()["id"]
+    db = TestingSessionLocal()
+    try:
+        assert db.get(Job, job_id).task_id
+    finally:
+        db.close()
+
+    response = client.post(f"/api/leads/jobs/{job_id}/cancel")
+    assert response.status_code == 200
+    try:
+        assert CancellationToken(get_sync_redis(), job_id).cancelled()
+    finally:
+        get_sync_redis().delete(cancel_key(job_id))
+
+
+def test_running_scrape_stops_after_cancel(setup_database, monkeypatch):
+    monkeypatch.setattr(celery_app.conf, "task_always_eager", True)
+    monkeypatch.setattr(scrape_task, "SessionLocal", TestingSessionLocal)
+    monkeypatch.setattr(settings, "SCRAPER_FETCHER", "httpx")
+    monkeypatch.setattr(settings, "SCRAPER_CONCURRENCY", 1)
+    monkeypatch.setattr(settings, "SCRAPER_DOMAIN_RATE", 1000.0)
+    monkeypatch.setattr(settings, "CANCEL_CHECK_INTERVAL_SECONDS", 0.05)
+
+    db = TestingSessionLocal()
+    try:
+        user = User(email="cancel-running@example.com", hashed_password="x")
+        db.add(user)
+        db.commit()
+        job = Job(user_id=user.id, intent="growth", lead_count=200, status="pending")
+        db.add(job)
+        db.commit()
+        redis_client = get_sync_redis()
+        redis_client.delete(cancel_key(job.id))
+        stops_before = REGISTRY.get_sample_value("job_cancel_stop_seconds_count") or 0
+
+        with FixtureSite(pages_per_query=40, leads_per_page=5, latency=0.02) as site:
+            monkeypatch.setattr(settings, "SCRAPER_SEARCH_URL_TEMPLATE", site.url("/search?q={query}"))
+
+            def cancel_when_running():
+                # What cancel_job does, from another "request" while the task runs
+                while site.requests < 3:
+                    time.sleep(0.005)
+                cancel_db = TestingSessionLocal()
+                cancel_db.execute(update(Job).where(Job.id == job.id).values(status="cancelled"))
+                cancel_db.commit()
+                cancel_db.close()
+                redis_client.set(cancel_key(job.id), repr(time.time()))
+
+            canceller = threading.Thread(target=cancel_when_running)
+            canceller.start()
+            scrape_task.scrape_leads_task.apply(args=(job.id, {"job_titles": ["CTO"]}, 200))
+            canceller.join()
+            requests = site.requests
+
+        db.refresh(job)
+        assert job.status == "cancelled"
+        # 40 pages for the whole job; the worker let go a few pages after the cancel
+        assert requests < 15
+        assert REGISTRY.get_sample_value("job_cancel_stop_seconds_count") == stops_before + 1
+        assert not redis_client.exists(checkpoint_key(job.id))
+    finally:
+        get_sync_redis().delete(cancel_key(job.id))
+        db.close()
@@ -0,0 +1,208 @@
+import threading
+import time
+
+from sqlalchemy import func, select
+
+from app.config import settings
+from app.models.models import Job, JobLead, User
+from app.redis import get_sync_redis
+from app.services.cancellation import cancel_key
+from app.services.checkpoint import ScrapeCheckpoint, checkpoint_key
+from app.services.ingestion import LeadIngestor
+from app.services.scraper import CrawlState, HttpxFetcherPool, ScrapeEngine
+from app.tasks import scrape_task
+from app.tasks.celery_app import celery_app
+from tests.fixture_site import FixtureSite
+from tests.support import TestingSessionLocal
+
+
+def test_checkpoint_roundtrip():
+    checkpoint = ScrapeCheckpoint(get_sync_redis(), job_id=535353, part="shard-1")
+    checkpoint.clear()
+    try:
+        assert checkpoint.load() == (None, [])
+        checkpoint.save(CrawlState(done=["a"], pending=["b"], leads=1), [{"name": "Ada"}])
+        checkpoint.save(CrawlState(done=["a", "b"], pending=[], leads=2), [{"name": "Bob"}])
+        state, leads = checkpoint.load()
+        assert state == CrawlState(done=["a", "b"], pending=[], leads=2)
+        assert [lead["name"] for lead in leads] == ["Ada", "Bob"]
+    finally:
+        checkpoint.clear()
+
+
+async def test_engine_resumes_from_checkpoint():
+    with FixtureSite(pages_per_query=6, leads_per_page=5) as site:
+        seed = [site.url("/search?q=python")]
+        checkpoints = []
+        async with HttpxFetcherPool(size=1) as pool:
+            engine = ScrapeEngine(
+                pool=pool, lead_count=30, concurrency=1, checkpoint_every=2,
+                on_checkpoint=lambda state, leads: checkpoints.append((state, leads)),
+            )
+            full = await engine.run(seed)
+
+        # Every 2 pages, plus the final one
+        assert [len(leads) for _, leads in checkpoints] == [10, 10, 10, 0]
+        first, saved = checkpoints[0]
+        assert len(first.done) == 2 and len(first.pending) == 1 and first.leads == 10
+
+        requests_before = site.requests
+        async with HttpxFetcherPool(size=1) as pool:
+            resumed = await ScrapeEngine(pool=pool, lead_count=30, concurrency=1).run(seed, resume=first)
+
+    # Only the pages after the checkpoint are loaded again
+    assert site.requests - requests_before == 4
+    assert saved + resumed == full
+
+
+
+async def test_engine_runs_callbacks_off_the_event_loop_one_at_a_time():
+    loop_thread = threading.get_ident()
+    threads, running, overlapped = set(), [], []
+
+    def save(*args):
+        threads.add(threading.get_ident())
+        running.append(args)
+        overlapped.append(len(running) > 1)
+        time.sleep(0.005)
+        running.remove(args)
+
+    def should_stop():
+        threads.add(threading.get_ident())
+        return False
+
+    with FixtureSite(pages_per_query=6, leads_per_page=5) as site:
+        seed = [site.url(f"/search?q={query}") for query in ("python", "golang", "rust")]
+        async with HttpxFetcherPool(size=4) as pool:
+            await ScrapeEngine(
+                pool=pool, lead_count=60, concurrency=4, checkpoint_every=1,
+                on_progress=save, on_checkpoint=save, should_stop=should_stop,
+            ).run(seed)
+
+    assert overlapped and not any(overlapped)
+    assert loop_thread not in threads
+
+
+def test_retried_task_resumes_from_checkpoint(setup_database, monkeypatch):
+    monkeypatch.setattr(celery_app.conf, "task_always_eager", True)
+    monkeypatch.setattr(scrape_task, "SessionLocal", TestingSessionLocal)
+    monkeypatch.setattr(settings, "SCRAPER_FETCHER", "httpx")
+    monkeypatch.setattr(settings, "SCRAPER_CONCURRENCY", 1)
+    monkeypatch.setattr(settings, "SCRAPER_DOMAIN_RATE", 1000.0)
+    monkeypatch.setattr(settings, "SCRAPER_CHECKPOINT_PAGES", 2)
+
+    # The worker is "lost" right after the second batch is stored, before its checkpoint
+    saves = []
+    original_save = ScrapeCheckpoint.save
+
+    def flaky_save(self, state, leads=None):
+        saves.append(state.leads)
+        if len(saves) == 2:
+            raise RuntimeError("worker lost")
+        original_save(self, state, leads)
+
+    monkeypatch.setattr(ScrapeCheckpoint, "save", flaky_save)
+
+    db = TestingSessionLocal()
+    try:
+        user = User(email="resume@example.com", hashed_password="x")
+        db.add(user)
+        db.commit()
+        job = Job(user_id=user.id, intent="sales", lead_count=30, status="pending")
+        db.add(job)
+        db.commit()
+        get_sync_redis().delete(checkpoint_key(job.id), cancel_key(job.id))
+
+        with FixtureSite(pages_per_query=8, leads_per_page=5) as site:
+            monkeypatch.setattr(settings, "SCRAPER_SEARCH_URL_TEMPLATE", site.url("/search?q={query}"))
+            scrape_task.scrape_leads_task.apply(args=(job.id, {"job_titles": ["CTO"]}, 30))
+            requests = site.requests
+
+        db.refresh(job)
+        assert job.status == "completed"
+        assert job.progress == 100
+        count = db.execute(select(func.count()).select_from(JobLead).where(JobLead.job_id == job.id)).scalar_one()
+        assert count == 30
+        # 4 pages before the failure, then 4 from the first checkpoint on (a restart would load 6)
+        assert requests == 8
+        assert not get_sync_redis().exists(checkpoint_key(job.id))
+    finally:
+        db.close()
+
+
+def test_failed_shard_returns_its_checkpointed_leads(setup_database, monkeypatch):
+    monkeypatch.setattr(celery_app.conf, "task_always_eager", True)
+    monkeypatch.setattr(scrape_task, "SessionLocal", TestingSessionLocal)
+    monkeypatch.setattr(settings, "SCRAPE_MAX_RETRIES", 0)
+
+    async def failing_scrape(search_params, lead_count, on_checkpoint=None, **kwargs):
+        on_checkpoint(CrawlState(done=["b"], pending=["c"], leads=2), [{"name": "Bob"}])
+        raise RuntimeError("site down")
+
+    monkeypatch.setattr(scrape_task, "scrape_leads", failing_scrape)
+
+    db = TestingSessionLocal()
+    try:
+        user = User(email="shard-failure@example.com", hashed_password="x")
+        db.add(user)
+        db.commit()
+        job = Job(user_id=user.id, intent="sales", lead_count=20, status="processing")
+        db.add(job)
+        db.commit()
+        job_id = job.id
+    finally:
+        db.close()
+
+    checkpoint = ScrapeCheckpoint(get_sync_redis(), job_id, "shard-0")
+    checkpoint.clear()
+    try:
+        # Left by an earlier attempt
+        checkpoint.save(CrawlState(done=["a"], pending=["b"], leads=1), [{"name": "Ada"}])
+
+        result = scrape_task.scrape_shard_task.apply(args=(job_id, 0, ["python"], 10)).get()
+        assert result["error"] == "site down"
+        assert [lead["name"] for lead in result["leads"]] == ["Ada", "Bob"]
+        # Still kept until the merge has stored them
+        assert checkpoint.load()[0] is not None
+    finally:
+        checkpoint.clear()
+
+
+def test_redelivered_task_keeps_leads_stored_before_the_first_checkpoint(setup_database, monkeypatch):
+    monkeypatch.setattr(celery_app.conf, "task_always_eager", True)
+    monkeypatch.setattr(scrape_task, "SessionLocal", TestingSessionLocal)
+    monkeypatch.setattr(settings, "SCRAPER_FETCHER", "httpx")
+    monkeypatch.setattr(settings, "SCRAPER_CONCURRENCY", 1)
+    monkeypatch.setattr(settings, "SCRAPER_DOMAIN_RATE", 1000.0)
+
+    def prefill_again(*args, **kwargs):
+        raise AssertionError("known contacts stored twice")
+
+    monkeypatch.setattr(scrape_task, "_store_known_contacts", prefill_again)
+
+    db = TestingSessionLocal()
+    try:
+        user = User(email="redelivered@example.com", hashed_password="x")
+        db.add(user)
+        db.commit()
+        # Picked up by a worker that was lost after serving 4 known contacts, before any checkpoint
+        job = Job(user_id=user.id, intent="sales", lead_count=20, status="processing", progress=20, known_leads=4)
+        db.add(job)
+        db.commit()
+        get_sync_redis().delete(checkpoint_key(job.id), cancel_key(job.id))
+
+        with LeadIngestor(db, job) as ingestor:
+            ingestor.extend([{"name": f"Known {i}", "email": f"known{i}@example.com"} for i in range(4)])
+
+        with FixtureSite(pages_per_query=8, leads_per_page=5) as site:
+            monkeypatch.setattr(settings, "SCRAPER_SEARCH_URL_TEMPLATE", site.url("/search?q={query}"))
+            scrape_task.scrape_leads_task.apply(args=(job.id, {"job_titles": ["CTO"]}, 20))
+
+        db.refresh(job)
+        assert job.status == "completed"
+        assert job.progress == 100
+        assert job.known_leads == 4
+        count = db.execute(select(func.count()).select_from(JobLead).where(JobLead.job_id == job.id)).scalar_one()
+        assert count == 20
+    finally:
+        db.close()
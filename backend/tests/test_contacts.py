@@ -0,0 +1,140 @@
+from sqlalchemy import func, select
+
+from app.config import settings
+from app.models.models import Contact, Job, JobLead, User
+from app.redis import get_sync_redis
+from app.services import contacts
+from app.services.contacts import known_contacts
+from app.services.ingestion import LeadIngestor
+from app.tasks import scrape_task
+from app.tasks.celery_app import celery_app
+from tests.fixture_site import FixtureSite
+from tests.support import TestingSessionLocal
+
+
+def _job(db, email, lead_count=10):
+    user = User(email=email, hashed_password="x")
+    db.add(user)
+    db.commit()
+    job = Job(user_id=user.id, intent="sales", lead_count=lead_count, status="processing")
+    db.add(job)
+    db.commit()
+    return job
+
+
+def test_contacts_are_shared_across_jobs(setup_database):
+    db = TestingSessionLocal()
+    try:
+        first, second = _job(db, "contacts-1@example.com"), _job(db, "contacts-2@example.com")
+        with LeadIngestor(db, first) as ingestor:
+            ingestor.extend([
+                {"name": "Ada", "company": "Acme", "email": "ada@acme.com"},
+                {"name": "Bob", "company": "Acme"},
+            ])
+        with LeadIngestor(db, second) as ingestor:
+            ingestor.add({"email": "ADA@acme.com", "title": "CTO", "confidence": 0.9})
+
+        contacts = db.execute(
+            select(Contact).where(Contact.company == "Acme").order_by(Contact.id)
+        ).scalars().all()
+        assert [contact.name for contact in contacts] == ["Ada", "Bob"]
+        # The later scrape adds what it found and keeps what it did not
+        assert (contacts[0].title, contacts[0].confidence) == ("CTO", 0.9)
+        links = db.execute(
+            select(JobLead.job_id, JobLead.contact_id)
+            .where(JobLead.job_id.in_([first.id, second.id]))
+            .order_by(JobLead.job_id, JobLead.contact_id)
+        ).all()
+        assert links == [(first.id, contacts[0].id), (first.id, contacts[1].id), (second.id, contacts[0].id)]
+    finally:
+        db.close()
+
+
+def test_contact_fingerprint_tells_apart_people_on_one_page():
+    page = "https://directory.test/search?q=cto"
+    alice = contacts.contact_fingerprint({"name": "Alice", "company": "Acme", "source_url": page})
+    bob = contacts.contact_fingerprint({"name": "Bob", "company": "Beta", "source_url": page})
+    assert alice != bob
+    assert alice == contacts.contact_fingerprint({"name": " alice ", "company": "ACME", "source_url": page + "#top"})
+    # An email is the person, wherever they were found
+    ada = contacts.contact_fingerprint({"email": "Ada@acme.com", "source_url": page})
+    assert ada == contacts.contact_fingerprint({"email": "ada@acme.com", "name": "Ada L."})
+
+
+def test_known_contacts_match_titles_and_skip_received(setup_database):
+    db = TestingSessionLocal()
+    try:
+        own, other = _job(db, "known-1@example.com"), _job(db, "known-2@example.com")
+        with LeadIngestor(db, own) as ingestor:
+            ingestor.add({"name": "Dee", "company": "Delta", "title": "Head of Data"})
+        with LeadIngestor(db, other) as ingestor:
+            ingestor.extend([
+                {"name": "Eve", "company": "Epsilon", "title": "Deputy Head of Data"},
+                {"name": "Fay", "company": "Zeta", "title": "Data Engineer"},
+            ])
+
+        found = known_contacts(db, own.user_id, {"job_titles": ["head of data"], "keywords": ["fintech"]}, 10)
+        assert [contact["name"] for contact in found] == ["Eve"]
+        assert known_contacts(db, own.user_id, {"keywords": ["fintech"]}, 10) == []
+    finally:
+        db.close()
+
+
+def test_known_contacts_match_whole_words(setup_database, monkeypatch):
+    # One candidate per query, so the walk has to page past the substring-only matches
+    monkeypatch.setattr(contacts, "KNOWN_CONTACTS_CHUNK", 1)
+    db = TestingSessionLocal()
+    try:
+        source, own = _job(db, "words-1@example.com"), _job(db, "words-2@example.com")
+        with LeadIngestor(db, source) as ingestor:
+            ingestor.add({"name": "Ivy", "company": "Iota", "title": "CTO & Co-Founder"})
+        with LeadIngestor(db, source) as ingestor:
+            ingestor.extend([
+                {"name": "Gus", "company": "Gamma", "title": "Sales Director"},
+                {"name": "Hal", "company": "Eta", "title": "Project Coordinator"},
+            ])
+
+        # The newest contacts contain "cto" only inside other words
+        found = known_contacts(db, own.user_id, {"job_titles": ["CTO"]}, 1)
+        assert [contact["name"] for contact in found] == ["Ivy"]
+        assert known_contacts(db, own.user_id, {"job_titles": ["coo"]}, 10) == []
+    finally:
+        db.close()
+
+
+def test_worker_serves_known_contacts_before_scraping(setup_database, monkeypatch):
+    monkeypatch.setattr(celery_app.conf, "task_always_eager", True)
+    monkeypatch.setattr(scrape_task, "SessionLocal", TestingSessionLocal)
+    monkeypatch.setattr(settings, "SCRAPER_FETCHER", "httpx")
+    monkeypatch.setattr(settings, "SCRAPER_CONCURRENCY", 1)
+    monkeypatch.setattr(settings, "SCRAPER_DOMAIN_RATE", 1000.0)
+
+    db = TestingSessionLocal()
+    try:
+        earlier = _job(db, "earlier@example.com")
+        with LeadIngestor(db, earlier) as ingestor:
+            ingestor.extend({"name": f"Known {i}", "company": "Acme", "title": "VP Sales"} for i in range(15))
+        contacts_before = db.execute(select(func.count()).select_from(Contact)).scalar_one()
+
+        job = _job(db, "prefill@example.com", lead_count=20)
+        job.status = "pending"
+        db.commit()
+        get_sync_redis().delete(f"dedup:bloom:{job.user_id}")
+
+        with FixtureSite(pages_per_query=5, leads_per_page=5) as site:
+            monkeypatch.setattr(settings, "SCRAPER_SEARCH_URL_TEMPLATE", site.url("/search?q={query}"))
+            scrape_task.scrape_leads_task.apply(args=(job.id, {"job_titles": ["VP Sales"]}, 20))
+
+        db.refresh(job)
+        assert job.status == "completed"
+        assert job.known_leads == 10
+        # Only the other half of the job was scraped
+        assert site.requests == 2
+        count = db.execute(select(func.count()).select_from(JobLead).where(JobLead.job_id == job.id)).scalar_one()
+        assert count == 20
+        linked = db.execute(select(func.count()).select_from(JobLead).where(JobLead.job_id == job.id)).scalar_one()
+        assert linked == 20
+        # Only the scraped half is new to the store
+        assert db.execute(select(func.count()).select_from(Contact)).scalar_one() == contacts_before + 10
+    finally:
+        db.close()
@@ -0,0 +1,204 @@
+from redis.exceptions import ConnectionError as RedisConnectionError
+from sqlalchemy import func, select
+
+from app.config import settings
+from app.models.models import Contact, Job, JobLead, User
+from app.redis import get_sync_redis
+from app.services.dedup import (
+    LeadDeduplicator,
+    RedisScalableBloomFilter,
+    lead_fingerprints,
+    normalize_url,
+)
+from app.services.ingestion import LeadIngestor
+from app.services.scraper import extract_leads
+from tests.support import TestingSessionLocal
+
+
+def test_fingerprints_normalize_inputs():
+    assert normalize_url("HTTPS://www.Example.com/in/ada/?utm_source=x&b=2&a=1#top") == "https://example.com/in/ada?a=1&b=2"
+    first = lead_fingerprints({"email": " Ada@Example.com ", "name": "Ada  Lovelace", "company": "Analytical"})
+    second = lead_fingerprints({"email": "ada@example.com", "name": "ada lovelace", "company": "ANALYTICAL"})
+    assert first == second
+    assert len(first) == 2
+    assert lead_fingerprints({"name": "No Company"}) == []
+
+
+def test_scalable_bloom_filter_grows():
+    bloom = RedisScalableBloomFilter(get_sync_redis(), "test:bloom", capacity=50, error_rate=0.01)
+    bloom.clear()
+    try:
+        members = [f"member-{i}" for i in range(300)]
+        bloom.add_many(members)
+        layers, _ = bloom._meta()
+        assert layers >= 3
+
+        assert all(bloom.contains_many(members))
+        strangers = bloom.contains_many([f"stranger-{i}" for i in range(1000)])
+        # Compound error bound is error_rate / (1 - tightening) = 2%
+        assert sum(strangers) < 40
+    finally:
+        bloom.clear()
+
+
+def _ingest(db, job, leads, redis_client):
+    dedup = LeadDeduplicator(db, redis_client, job.user_id)
+    with LeadIngestor(db, job, batch_size=3, dedup=dedup) as ingestor:
+        ingestor.extend(leads)
+    return ingestor
+
+
+def test_dedup_drops_leads_seen_in_earlier_jobs(setup_database):
+    db = TestingSessionLocal()
+    redis_client = get_sync_redis()
+    try:
+        user = User(email="dedup@example.com", hashed_password="x")
+        db.add(user)
+        db.commit()
+        RedisScalableBloomFilter(redis_client, f"dedup:bloom:{user.id}", 1, 0.1).clear()
+
+        first_job = Job(user_id=user.id, intent="sales", lead_count=10, status="processing")
+        second_job = Job(user_id=user.id, intent="sales", lead_count=10, status="processing")
+        db.add_all([first_job, second_job])
+        db.commit()
+
+        _ingest(db, first_job, [
+            {"name": "Ada", "company": "Acme", "email": "ada@acme.com"},
+            {"name": "Bob", "company": "Acme", "source_url": "https://acme.com/team/bob"},
+            # Same person as Ada within the same run
+            {"name": "ada", "company": "ACME"},
+        ], redis_client)
+        assert first_job.duplicates_dropped == 1
+
+        _ingest(db, second_job, [
+            {"name": "Ada L.", "company": "Other", "email": "ADA@acme.com"},
+            {"name": "Robert", "company": "Acme", "source_url": "https://www.acme.com/team/bob/"},
+            {"name": "Cy", "company": "Acme", "email": "cy@acme.com"},
+        ], redis_client)
+        db.refresh(second_job)
+        assert second_job.duplicates_dropped == 2
+
+        names = db.execute(select(Contact.name).join(JobLead).where(JobLead.job_id == second_job.id)).scalars().all()
+        assert names == ["Cy"]
+    finally:
+        db.close()
+
+
+def test_dedup_rebuilds_bloom_after_redis_loss(setup_database):
+    db = TestingSessionLocal()
+    redis_client = get_sync_redis()
+    try:
+        user = User(email="dedup-rebuild@example.com", hashed_password="x")
+        db.add(user)
+        db.commit()
+        bloom = RedisScalableBloomFilter(redis_client, f"dedup:bloom:{user.id}", 1, 0.1)
+        bloom.clear()
+
+        earlier = Job(user_id=user.id, intent="sales", lead_count=10, status="processing")
+        job = Job(user_id=user.id, intent="sales", lead_count=10, status="processing")
+        db.add_all([earlier, job])
+        db.commit()
+        _ingest(db, earlier, [{"email": "cy@acme.com"}], redis_client)
+        # Redis lost the filter; the exact fingerprints in the database remain
+        bloom.clear()
+
+        ingestor = _ingest(db, job, [{"email": "cy@acme.com"}, {"email": "new@acme.com"}], redis_client)
+
+        assert ingestor.persisted == 1
+        assert job.duplicates_dropped == 1
+        assert redis_client.exists(f"dedup:bloom:{user.id}:meta")
+        count = db.execute(select(func.count()).select_from(JobLead).where(JobLead.job_id == job.id)).scalar_one()
+        assert count == 1
+    finally:
+        db.close()
+
+
+def test_dedup_keeps_different_people_listed_on_one_page(setup_database):
+    db = TestingSessionLocal()
+    redis_client = get_sync_redis()
+    try:
+        user = User(email="dedup-page@example.com", hashed_password="x")
+        db.add(user)
+        db.commit()
+        RedisScalableBloomFilter(redis_client, f"dedup:bloom:{user.id}", 1, 0.1).clear()
+        job = Job(user_id=user.id, intent="sales", lead_count=10, status="processing")
+        db.add(job)
+        db.commit()
+
+        leads, _ = extract_leads(
+            '<div data-lead data-name="Alice" data-company="Acme"></div>'
+            '<div data-lead data-name="Bob" data-company="Beta"></div>',
+            "https://directory.test/search?q=cto",
+        )
+        ingestor = _ingest(db, job, leads, redis_client)
+
+        assert ingestor.persisted == 2
+        assert job.duplicates_dropped == 0
+    finally:
+        db.close()
+
+
+def _user_with_bloom(db, redis_client, email):
+    user = User(email=email, hashed_password="x")
+    db.add(user)
+    db.commit()
+    bloom = RedisScalableBloomFilter(redis_client, f"dedup:bloom:{user.id}", 1, 0.1)
+    bloom.clear()
+    return user, bloom
+
+
+def test_dedup_drops_bloom_filter_that_missed_an_update(setup_database, monkeypatch):
+    db = TestingSessionLocal()
+    redis_client = get_sync_redis()
+    try:
+        user, bloom = _user_with_bloom(db, redis_client, "dedup-stale@example.com")
+        dedup = LeadDeduplicator(db, redis_client, user.id)
+        kept, fingerprints = dedup.filter_batch([{"email": "dee@acme.com"}])
+        dedup.record(fingerprints)
+        db.commit()
+
+        def unavailable(*args, **kwargs):
+            raise RedisConnectionError("redis went away")
+        monkeypatch.setattr(dedup.bloom, "add_many", unavailable)
+        dedup.remember(fingerprints)
+        assert not bloom.exists()
+
+        # The next job rebuilds the filter, this time with the fingerprint
+        assert LeadDeduplicator(db, redis_client, user.id).bloom.contains_many(fingerprints) == [True]
+    finally:
+        db.close()
+
+
+def test_dedup_rebuild_is_atomic_and_exclusive(setup_database, monkeypatch):
+    db = TestingSessionLocal()
+    redis_client = get_sync_redis()
+    try:
+        user, bloom = _user_with_bloom(db, redis_client, "dedup-lock@example.com")
+        dedup = LeadDeduplicator(db, redis_client, user.id)
+        _, fingerprints = dedup.filter_batch([{"email": f"p{i}@acme.com"} for i in range(5)])
+        dedup.record(fingerprints)
+        db.commit()
+        bloom.invalidate()
+
+        # Another job is rebuilding: don't wait forever, and don't touch its filter
+        monkeypatch.setattr(settings, "DEDUP_BLOOM_REBUILD_WAIT", 0.1)
+        redis_client.set(f"{bloom.key}:lock", "another-job", ex=5)
+        try:
+            assert LeadDeduplicator(db, redis_client, user.id).bloom is None
+        finally:
+            redis_client.delete(f"{bloom.key}:lock")
+        assert not bloom.exists()
+
+        # A rebuild that fails part-way leaves no filter behind that looks complete
+        def unavailable(self, items, create=True):
+            raise RedisConnectionError("redis went away")
+        monkeypatch.setattr(RedisScalableBloomFilter, "add_many", unavailable)
+        assert LeadDeduplicator(db, redis_client, user.id).bloom is None
+        assert not bloom.exists()
+        monkeypatch.undo()
+
+        rebuilt = LeadDeduplicator(db, redis_client, user.id).bloom
+        assert rebuilt.contains_many(fingerprints) == [True] * 5
+        assert not redis_client.exists(f"{bloom.key}:next:meta")
+    finally:
+        db.close()
@@ -0,0 +1,55 @@
+import pytest
+from sqlalchemy import func, select
+
+from app.models.models import Job, JobLead
+from app.services.ingestion import LeadIngestor
+from tests.support import TestingSessionLocal
+
+
+def test_ingestor_writes_in_batches(setup_database):
+    db = TestingSessionLocal()
+    try:
+        job = Job(user_id=1, intent="growth", lead_count=500, status="processing")
+        db.add(job)
+        db.commit()
+
+        with LeadIngestor(db, job, batch_size=200) as ingestor:
+            ingestor.extend(
+                {"name": f"Lead {i}", "email": f"lead{i}@example.com", "confidence": 0.5, "unknown": "ignored"}
+                for i in range(450)
+            )
+            # Two full batches are flushed while adding; the tail waits for exit
+            assert ingestor.batches == 2
+            assert ingestor.persisted == 400
+
+        assert ingestor.batches == 3
+        assert ingestor.persisted == 450
+
+        db.refresh(job)
+        assert job.progress == 90
+        count = db.execute(select(func.count()).select_from(JobLead).where(JobLead.job_id == job.id)).scalar_one()
+        assert count == 450
+    finally:
+        db.close()
+
+
+def test_ingestor_keeps_committed_batches_on_error(setup_database):
+    db = TestingSessionLocal()
+    try:
+        job = Job(user_id=1, intent="growth", lead_count=100, status="processing")
+        db.add(job)
+        db.commit()
+
+        def leads():
+            for i in range(30):
+                yield {"name": f"Lead {i}"}
+            raise RuntimeError("scraper crashed")
+
+        with pytest.raises(RuntimeError, match="scraper crashed"):
+            with LeadIngestor(db, job, batch_size=25) as ingestor:
+                ingestor.extend(leads())
+
+        count = db.execute(select(func.count()).select_from(JobLead).where(JobLead.job_id == job.id)).scalar_one()
+        assert count == 25
+    finally:
+        db.close()
@@ -0,0 +1,58 @@
+from app.models.models import Job, JobStatCount, User
+from app.services.ingestion import LeadIngestor
+from app.services.job_stats import email_domain
+from tests.support import client, TestingSessionLocal
+
+
+def test_email_domain():
+    assert email_domain("Ada@Example.COM ") == "example.com"
+    assert email_domain("no-at-sign") is None
+    assert email_domain(None) is None
+
+
+def test_stats_accumulate_across_batches(setup_database):
+    db = TestingSessionLocal()
+    try:
+        user = User(email="stats@example.com", hashed_password="x")
+        db.add(user)
+        db.commit()
+        job = Job(user_id=user.id, intent="sales", lead_count=9, status="processing")
+        db.add(job)
+        db.commit()
+
+        leads = (
+            [{"name": f"A{i}", "email": f"a{i}@acme.io", "company": "Acme", "confidence": 0.9} for i in range(5)]
+            + [{"name": f"B{i}", "email": f"b{i}@Beta.dev", "company": " Beta ", "confidence": 0.6} for i in range(3)]
+            + [{"name": "C", "email": None, "company": None, "confidence": 0.0}]
+        )
+        # Batches of 2: the same company / domain is counted across several upserts
+        with LeadIngestor(db, job, batch_size=2) as ingestor:
+            ingestor.extend(leads)
+        job_id = job.id
+        stored_counts = db.query(JobStatCount).filter_by(job_id=job_id).count()
+    finally:
+        db.close()
+
+    response = client.get(f"/api/leads/jobs/{job_id}/stats", params={"top": 1})
+    assert response.status_code == 200
+    data = response.json()
+    assert data["status"] == "processing"
+    assert data["lead_count"] == 9
+    assert data["with_email"] == 8
+    assert abs(data["average_confidence"] - (5 * 0.9 + 3 * 0.6) / 9) < 1e-9
+    assert data["top_companies"] == [{"value": "Acme", "count": 5}]
+    assert data["top_email_domains"] == [{"value": "acme.io", "count": 5}]
+    assert stored_counts == 4
+
+    full = client.get(f"/api/leads/jobs/{job_id}/stats").json()
+    assert full["top_companies"][1] == {"value": "Beta", "count": 3}
+    assert full["top_email_domains"][1] == {"value": "beta.dev", "count": 3}
+
+
+def test_stats_of_job_without_leads(setup_database):
+    response = client.get(f"/api/leads/jobs/{setup_database['job_id']}/stats")
+    assert response.status_code == 200
+    assert response.json()["lead_count"] == 0
+    assert response.json()["average_confidence"] is None
+
+    assert client.get("/api/leads/jobs/99999/stats").status_code == 404
@@ -1,77 +1,28 @@
+import io
+import json
+import threading
+
 import pytest
-from fastapi.testclient import TestClient
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+from celery import signals
+from redis import asyncio as aioredis
 
-from app.database import Base, get_db
-from app.models.models import Job, User, Lead
 from app.config import settings
+from app.models.models import Job, User
+from app.redis import get_redis, get_sync_redis
+from app.schemas.schemas import LeadResponse
+from app.services.export import RESULT_FIELDS, _crlf_records, iter_csv_orm
+from app.services.ingestion import LeadIngestor
+from app.services.job_events import job_state_key, publish_job_state
+from app.tasks import scrape_task
 from main import app
-
-# For testing, we append `_test` to the database name so we don't accidentally
-# drop all production tables when running `pytest`.
-original_db = settings.DATABASE_URL.split("/")[-1]
-TEST_SQLALCHEMY_DATABASE_URL = settings.DATABASE_URL.replace(original_db, f"{original_db}_test")
-engine = create_engine(TEST_SQLALCHEMY_DATABASE_URL, pool_pre_ping=True)
-TestingSessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
-
-
-def override_get_db():
-    try:
-        db = TestingSessionLocal()
-        yield db
-    finally:
-        db.close()
-
-
-app.dependency_overrides[get_db] = override_get_db
-client = TestClient(app)
-
-
-@pytest.fixture(scope="module")
-def setup_database():
-    """
-    Setup the isolated test database.
-    """
-    Base.metadata.drop_all(bind=engine)
-    Base.metadata.create_all(bind=engine)
-    
-    # Populate dummy data
-    db = TestingSessionLocal()
-    
-    # Create variables to share IDs back to the test suite
-    test_state = {}
-    
-    try:
-        dummy_user = User(email="dummy_test@example.com", hashed_password="hashed_password", full_name="Test User")
-        db.add(dummy_user)
-        db.commit()
-        db.refresh(dummy_user)
-        
-        dummy_job = Job(user_id=dummy_user.id, intent="sales", lead_count=50, status="completed")
-        db.add(dummy_job)
-        db.commit()
-        db.refresh(dummy_job)
-        
-        dummy_lead1 = Lead(job_id=dummy_job.id, name="Alice CEO", email="alice@test.com", confidence=0.95)
-        dummy_lead2 = Lead(job_id=dummy_job.id, name="Bob CTO", email="bob@test.com", confidence=0.88)
-        db.add_all([dummy_lead1, dummy_lead2])
-        db.commit()
-        
-        test_state["job_id"] = dummy_job.id
-    finally:
-        db.close()
-        
-    yield test_state
-    
-    # Teardown
-    Base.metadata.drop_all(bind=engine)
+from tests.fixture_site import FixtureSite
+from tests.support import SEARCH_PARAMS, TestingAsyncSessionLocal, TestingSessionLocal, client, override_get_redis
 
 
 def test_generate_leads(setup_database):
     response = client.post(
         "/api/leads/generate",
-        json={"intent": "career", "lead_count": 50},
+        json={"intent": "career", "lead_count": 50, "search_params": SEARCH_PARAMS},
     )
     assert response.status_code == 202
     data = response.json()
@@ -79,9 +30,51 @@ def test_generate_leads(setup_database):
     assert data["lead_count"] == 50
     assert data["status"] == "pending"
     assert data["progress"] == 0
+    assert data["search_params"]["job_titles"] == SEARCH_PARAMS["job_titles"]
     assert "id" in data
 
 
+def test_generate_leads_needs_something_to_search_for(setup_database):
+    response = client.post(
+        "/api/leads/generate",
+        json={"intent": "career", "lead_count": 50, "search_params": {"location": "Berlin"}},
+    )
+    assert response.status_code == 422
+
+
+def test_generate_leads_enqueues_the_scrape(setup_database, monkeypatch):
+    published = []
+
+    def capture(sender=None, body=None, **kwargs):
+        published.append((sender, body[0]))
+
+    signals.before_task_publish.connect(capture, weak=False)
+    try:
+        response = client.post(
+            "/api/leads/generate",
+            json={"intent": "sales", "lead_count": 5, "search_params": {"job_titles": ["CTO"]}},
+        )
+    finally:
+        signals.before_task_publish.disconnect(capture)
+    job_id = response.json()["id"]
+
+    [(task, args)] = published
+    assert task == "scrape_leads_task"
+    assert list(args) == [job_id, {"keywords": [], "job_titles": ["CTO"], "industries": []}, 5]
+
+    # The worker scrapes with what the API stored
+    monkeypatch.setattr(scrape_task, "SessionLocal", TestingSessionLocal)
+    monkeypatch.setattr(settings, "SCRAPER_FETCHER", "httpx")
+    monkeypatch.setattr(settings, "SCRAPER_DOMAIN_RATE", 1000.0)
+    with FixtureSite(pages_per_query=2, leads_per_page=5) as site:
+        monkeypatch.setattr(settings, "SCRAPER_SEARCH_URL_TEMPLATE", site.url("/search?q={query}"))
+        scrape_task.scrape_leads_task.apply(args=args)
+
+    job = client.get(f"/api/leads/jobs/{job_id}").json()
+    assert job["status"] == "completed"
+    assert len(client.get(f"/api/leads/jobs/{job_id}/results").json()["items"]) == 5
+
+
 def test_get_job_status_existing(setup_database):
     # Fetch the previously populated dummy completed job
     job_id = setup_database["job_id"]
@@ -105,18 +98,34 @@ def test_get_job_results_populated(setup_database):
     response = client.get(f"/api/leads/jobs/{job_id}/results")
     assert response.status_code == 200
     data = response.json()
-    assert isinstance(data, list)
-    assert len(data) == 2
+    assert isinstance(data["items"], list)
+    assert len(data["items"]) == 2
+    assert data["next_cursor"] is None
     
-    names = [lead["name"] for lead in data]
+    names = [lead["name"] for lead in data["items"]]
     assert "Alice CEO" in names
     assert "Bob CTO" in names
 
+
+def test_get_job_results_cursor_pagination(setup_database):
+    job_id = setup_database["job_id"]
+    first = client.get(f"/api/leads/jobs/{job_id}/results", params={"limit": 1}).json()
+    assert len(first["items"]) == 1
+    assert first["next_cursor"] == first["items"][0]["id"]
+
+    second = client.get(
+        f"/api/leads/jobs/{job_id}/results",
+        params={"limit": 1, "cursor": first["next_cursor"]},
+    ).json()
+    assert len(second["items"]) == 1
+    assert second["items"][0]["id"] > first["items"][0]["id"]
+    assert second["next_cursor"] is None
+
 def test_get_job_results_empty(setup_database):
     # Create a new pending job 
     create_response = client.post(
         "/api/leads/generate",
-        json={"intent": "growth", "lead_count": 5},
+        json={"intent": "growth", "lead_count": 5, "search_params": SEARCH_PARAMS},
     )
     job_id = create_response.json()["id"]
 
@@ -124,8 +133,8 @@ def test_get_job_results_empty(setup_database):
     response = client.get(f"/api/leads/jobs/{job_id}/results")
     assert response.status_code == 200
     data = response.json()
-    assert isinstance(data, list)
-    assert len(data) == 0
+    assert data["items"] == []
+    assert data["next_cursor"] is None
 
 
 def test_export_job_results_csv(setup_database):
@@ -141,11 +150,197 @@ def test_export_job_results_csv(setup_database):
     assert "Alice CEO,alice@test.com" in csv_content
 
 
+async def test_iter_csv_orm_streams_across_partitions(setup_database):
+    job_id = setup_database["job_id"]
+    db = TestingAsyncSessionLocal()
+    try:
+        chunks = [chunk async for chunk in iter_csv_orm(db, job_id, chunk_size=1)]
+    finally:
+        await db.close()
+
+    # Header, then one chunk per single-row partition
+    assert len(chunks) == 3
+    assert ",Alice CEO," in chunks[1]
+    assert ",Bob CTO," in chunks[2]
+
+
+def test_export_job_results_copy_engine_gzip(setup_database):
+    job_id = setup_database["job_id"]
+    response = client.get(f"/api/leads/jobs/{job_id}/export", params={"engine": "copy", "gzip": True})
+    assert response.status_code == 200
+    assert response.headers["content-encoding"] == "gzip"
+
+    # httpx transparently decodes the gzip body
+    lines = response.text.splitlines()
+    assert lines[0] == "ID,Name,Email,Company,Title,Source URL,Confidence%"
+    assert len(lines) == 3
+    assert "Alice CEO,alice@test.com" in response.text
+
+
+def test_export_csv_engines_write_the_same_bytes(setup_database):
+    job_id = setup_database["job_id"]
+    orm, copy = (
+        client.get(f"/api/leads/jobs/{job_id}/export", params={"engine": engine}) for engine in ("orm", "copy")
+    )
+    assert orm.status_code == copy.status_code == 200
+    assert copy.content == orm.content
+    assert ",95.0\r\n" in orm.text
+
+
+def test_crlf_records_leaves_quoted_newlines():
+    first, quoted = _crlf_records(b'1,Ada,"a\nb', False)
+    second, quoted = _crlf_records(b'c",9.0\n2,"say ""hi""",1.0\n', quoted)
+    assert first + second == b'1,Ada,"a\nb' + b'c",9.0\r\n2,"say ""hi""",1.0\r\n'
+    assert not quoted
+
+
+@pytest.mark.postgres
+def test_copy_engine_writes_the_orm_engines_bytes_on_postgres(setup_database):
+    db = TestingSessionLocal()
+    try:
+        user = User(email="copy-parity@example.com", hashed_password="x")
+        db.add(user)
+        db.commit()
+        job = Job(user_id=user.id, intent="sales", lead_count=8, status="completed")
+        db.add(job)
+        db.commit()
+        with LeadIngestor(db, job) as ingestor:
+            ingestor.extend([
+                {"name": "Ada", "email": "ada@acme.io", "company": "Acme, Inc.", "title": "CTO", "confidence": 0.95},
+                {"name": "", "email": None, "company": "", "title": None, "confidence": None},
+                {"name": 'Bo "the" Boss', "title": "Head of\nData", "source_url": "https://x.io/b", "confidence": 1.0},
+                {"name": "Cy", "title": "Line\r\nBreak", "confidence": 0.29},
+                {"name": "Dee Ümlaut", "company": "Zeta", "confidence": 0.00125},
+                {"name": "Eve", "company": "Eta", "confidence": 0.12345},
+                {"name": "Fay", "company": "Theta", "confidence": 0.026749999999999999},
+                {"name": "Gus", "company": "Iota", "confidence": 1e-07},
+            ])
+        job_id = job.id
+    finally:
+        db.close()
+
+    orm, copy = (
+        client.get(f"/api/leads/jobs/{job_id}/export", params={"engine": engine}) for engine in ("orm", "copy")
+    )
+    assert orm.status_code == copy.status_code == 200
+    assert copy.content == orm.content
+    assert orm.content.count(b"\r\n") == 9 + 1  # header and 8 records, plus the quoted "\r\n"
+    assert b",0.13\r\n" in orm.content and b",12.35\r\n" in orm.content
+
+
+def test_export_job_results_ndjson(setup_database):
+    job_id = setup_database["job_id"]
+    response = client.get(f"/api/leads/jobs/{job_id}/export", params={"format": "ndjson"})
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    assert response.headers["content-disposition"].endswith(".ndjson")
+
+    records = [json.loads(line) for line in response.text.splitlines()]
+    assert [r["name"] for r in records] == ["Alice CEO", "Bob CTO"]
+    # Types survive the round trip: confidence stays a 0-1 float
+    assert records[0]["confidence"] == 0.95
+
+
+def test_export_job_results_parquet(setup_database):
+    pq = pytest.importorskip("pyarrow.parquet")
+    job_id = setup_database["job_id"]
+    response = client.get(f"/api/leads/jobs/{job_id}/export", params={"format": "parquet"})
+    assert response.status_code == 200
+
+    table = pq.read_table(io.BytesIO(response.content))
+    assert table.num_rows == 2
+    assert table.column("email").to_pylist() == ["alice@test.com", "bob@test.com"]
+    assert table.column("confidence").to_pylist() == [0.95, 0.88]
+
+
+def test_export_rejects_copy_engine_for_typed_formats(setup_database):
+    job_id = setup_database["job_id"]
+    for fmt in ("ndjson", "parquet"):
+        response = client.get(f"/api/leads/jobs/{job_id}/export", params={"format": fmt, "engine": "copy"})
+        assert response.status_code == 400
+
+
+def _sse_events(body: str):
+    return [json.loads(line[len("data: "):]) for line in body.splitlines() if line.startswith("data: ")]
+
+
+def test_job_events_seeds_snapshot_from_db(setup_database):
+    job_id = setup_database["job_id"]
+    get_sync_redis().delete(job_state_key(job_id))
+
+    response = client.get(f"/api/leads/jobs/{job_id}/events")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/event-stream")
+
+    # A completed job emits its snapshot and closes the stream
+    events = _sse_events(response.text)
+    assert len(events) == 1
+    assert events[0]["status"] == "completed"
+    assert get_sync_redis().exists(job_state_key(job_id))
+
+
+def test_job_events_relays_worker_updates(setup_database):
+    db = TestingSessionLocal()
+    try:
+        job = Job(user_id=1, intent="growth", lead_count=10, status="processing", progress=0)
+        db.add(job)
+        db.commit()
+        db.refresh(job)
+
+        redis_client = get_sync_redis()
+        publish_job_state(redis_client, job)
+
+        def worker_updates():
+            job.progress = 50
+            publish_job_state(redis_client, job)
+            job.progress = 100
+            job.status = "completed"
+            publish_job_state(redis_client, job)
+
+        timer = threading.Timer(0.5, worker_updates)
+        timer.start()
+        response = client.get(f"/api/leads/jobs/{job.id}/events")
+        timer.join()
+    finally:
+        db.close()
+
+    events = _sse_events(response.text)
+    assert [(e["status"], e["progress"]) for e in events] == [
+        ("processing", 0), ("processing", 50), ("completed", 100),
+    ]
+
+
+def test_job_events_fall_back_to_db_without_redis(setup_database):
+    job_id = setup_database["job_id"]
+
+    async def unreachable_redis():
+        client = aioredis.Redis(host="127.0.0.1", port=1, decode_responses=True)
+        try:
+            yield client
+        finally:
+            await client.aclose()
+
+    app.dependency_overrides[get_redis] = unreachable_redis
+    try:
+        response = client.get(f"/api/leads/jobs/{job_id}/events")
+    finally:
+        app.dependency_overrides[get_redis] = override_get_redis
+
+    assert response.status_code == 200
+    assert [event["status"] for event in _sse_events(response.text)] == ["completed"]
+
+
+def test_job_events_not_found(setup_database):
+    get_sync_redis().delete(job_state_key(99999))
+    response = client.get("/api/leads/jobs/99999/events")
+    assert response.status_code == 404
+
+
 def test_cancel_job_pending(setup_database):
     # Enqueue a new job and cancel it instantly
     create_response = client.post(
         "/api/leads/generate",
-        json={"intent": "sales", "lead_count": 5},
+        json={"intent": "sales", "lead_count": 5, "search_params": SEARCH_PARAMS},
     )
     job_id = create_response.json()["id"]
 
@@ -162,3 +357,92 @@ def test_cancel_job_invalid_state(setup_database):
     response = client.post(f"/api/leads/jobs/{job_id}/cancel")
     assert response.status_code == 409
     assert "Cannot cancel job" in response.json()["detail"]
+
+
+@pytest.fixture(scope="module")
+def filter_job(setup_database):
+    """A completed job with leads of varied confidence, companies and email domains."""
+    db = TestingSessionLocal()
+    try:
+        job = Job(user_id=1, intent="sales", lead_count=6, status="completed", progress=100)
+        db.add(job)
+        db.commit()
+        leads = [
+            ("Ada", "ada@Acme.io", "Acme", 0.95),
+            ("Bob", "bob@acme.io", "ACME", 0.80),
+            ("Cy", "cy@beta.dev", "Beta", 0.80),
+            ("Di", "di@beta.dev", "Beta", 0.40),
+            ("Ed", None, "Gamma", 0.10),
+            ("Flo", "flo@acme.io", "Acme", 0.85),
+        ]
+        with LeadIngestor(db, job) as ingestor:
+            ingestor.extend(
+                {"name": name, "email": email, "company": company, "confidence": confidence}
+                for name, email, company, confidence in leads
+            )
+        return job.id
+    finally:
+        db.close()
+
+
+def _walk(job_id, **params):
+    """Names of all leads on every page, following next_cursor."""
+    names, cursor = [], None
+    while True:
+        query = {"limit": 2, **params, **({"cursor": cursor} if cursor is not None else {})}
+        response = client.get(f"/api/leads/jobs/{job_id}/results", params=query)
+        assert response.status_code == 200, response.text
+        page = response.json()
+        names += [lead["name"] for lead in page["items"]]
+        cursor = page["next_cursor"]
+        if cursor is None:
+            return names
+
+
+def test_get_job_results_sorted_by_confidence(filter_job):
+    # Ties (Bob / Cy at 0.80) are broken by id in the same direction
+    assert _walk(filter_job, order_by="-confidence") == ["Ada", "Flo", "Cy", "Bob", "Di", "Ed"]
+    assert _walk(filter_job, order_by="confidence") == ["Ed", "Di", "Bob", "Cy", "Flo", "Ada"]
+    assert _walk(filter_job, order_by="-created_at") == ["Flo", "Ed", "Di", "Cy", "Bob", "Ada"]
+
+
+def test_get_job_results_filters(filter_job):
+    assert _walk(filter_job, min_confidence=0.8) == ["Ada", "Bob", "Cy", "Flo"]
+    assert _walk(filter_job, company="acme") == ["Ada", "Bob", "Flo"]
+    assert _walk(filter_job, email_domain="@ACME.io", order_by="-confidence") == ["Ada", "Flo", "Bob"]
+    assert _walk(filter_job, email_domain="beta.dev", min_confidence=0.5) == ["Cy"]
+
+
+def test_get_job_results_rejects_bad_cursor(filter_job):
+    response = client.get(
+        f"/api/leads/jobs/{filter_job}/results", params={"order_by": "-confidence", "cursor": "not-a-cursor"}
+    )
+    assert response.status_code == 400
+    response = client.get(f"/api/leads/jobs/{filter_job}/results", params={"order_by": "name"})
+    assert response.status_code == 422
+
+
+def _pages(job_id, **params):
+    """Every page as returned, following next_cursor."""
+    pages, cursor = [], None
+    while True:
+        query = {"limit": 2, **params, **({"cursor": cursor} if cursor is not None else {})}
+        response = client.get(f"/api/leads/jobs/{job_id}/results", params=query)
+        assert response.status_code == 200, response.text
+        assert response.headers["content-type"] == "application/json"
+        pages.append(response.json())
+        cursor = pages[-1]["next_cursor"]
+        if cursor is None:
+            return pages
+
+
+def test_get_job_results_columns_engine_matches_orm(filter_job):
+    assert RESULT_FIELDS == tuple(LeadResponse.model_fields)
+    for params in (
+        {},
+        {"order_by": "-confidence"},
+        {"order_by": "created_at", "company": "acme"},
+        {"order_by": "-created_at", "min_confidence": 0.5, "limit": 3},
+        {"email_domain": "beta.dev", "limit": 1000},
+    ):
+        assert _pages(filter_job, engine="columns", **params) == _pages(filter_job, **params)
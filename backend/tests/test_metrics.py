@@ -0,0 +1,85 @@
+import pytest
+from fastapi.testclient import TestClient
+from prometheus_client import REGISTRY
+from redis.exceptions import ConnectionError as RedisConnectionError
+from sqlalchemy import create_engine, text
+
+from app.metrics import TimedQueuePool, instrument_engine
+from app.services.cache import TwoTierCache
+from app.tasks.celery_app import celery_app
+from main import app
+
+client = TestClient(app)
+
+
+@celery_app.task(name="tests.metrics.divide")
+def divide(a, b):
+    return a / b
+
+
+def sample(name, **labels):
+    return REGISTRY.get_sample_value(name, labels) or 0.0
+
+
+def test_metrics_endpoint_reports_route_latency(setup_database):
+    labels = {"method": "GET", "route": "/api/leads/jobs/{job_id}", "status": "200"}
+    before = sample("http_request_duration_seconds_count", **labels)
+
+    assert client.get(f"/api/leads/jobs/{setup_database['job_id']}").status_code == 200
+    assert client.get("/api/leads/jobs/999999").status_code == 404
+
+    response = client.get("/metrics")
+    assert response.status_code == 200
+    assert response.headers["content-type"].startswith("text/plain")
+    assert sample("http_request_duration_seconds_count", **labels) == before + 1
+    assert sample("http_request_duration_seconds_count", **{**labels, "status": "404"}) >= 1
+    # Route templates, never raw paths, as labels
+    assert "/api/leads/jobs/999999" not in response.text
+    assert 'redis_pool_max_connections{pool="sync"}' in response.text
+
+
+def test_pool_checkout_metrics(tmp_path):
+    engine = create_engine(
+        f"sqlite:///{tmp_path / 'pool.db'}", poolclass=TimedQueuePool, pool_logging_name="test_pool"
+    )
+    instrument_engine(engine, "test_pool")
+    before = sample("db_pool_checkout_wait_seconds_count", engine="test_pool")
+    try:
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+            assert sample("db_pool_connections_in_use", engine="test_pool") == 1
+        assert sample("db_pool_connections_in_use", engine="test_pool") == 0
+        assert sample("db_pool_checkout_wait_seconds_count", engine="test_pool") == before + 1
+    finally:
+        engine.dispose()
+
+
+def test_celery_task_outcomes():
+    success = sample("celery_tasks_total", task="tests.metrics.divide", state="SUCCESS")
+    failure = sample("celery_tasks_total", task="tests.metrics.divide", state="FAILURE")
+
+    assert divide.apply(args=(4, 2)).get() == 2
+    with pytest.raises(ZeroDivisionError):
+        divide.apply(args=(1, 0)).get()
+
+    assert sample("celery_tasks_total", task="tests.metrics.divide", state="SUCCESS") == success + 1
+    assert sample("celery_tasks_total", task="tests.metrics.divide", state="FAILURE") == failure + 1
+    assert sample("celery_task_duration_seconds_count", task="tests.metrics.divide", state="SUCCESS") >= 1
+
+
+async def test_cache_lookups_by_tier_and_result():
+    def unreachable():
+        raise RedisConnectionError("redis down")
+
+    cache = TwoTierCache("test:metrics", maxsize=4, ttl=60, redis_factory=unreachable)
+    lookups = lambda tier, result: sample("cache_lookups_total", cache="test:metrics", tier=tier, result=result)
+
+    assert await cache.get("k") is None
+    await cache.set("k", 1)
+    assert await cache.get("k") == 1
+
+    assert lookups("local", "miss") == 1
+    assert lookups("redis", "error") == 1
+    assert lookups("local", "hit") == 1
+    assert sample("cache_redis_errors_total", cache="test:metrics", operation="write") == 1
+    assert cache.stats()["errors"] == 2
@@ -0,0 +1,113 @@
+import secrets
+import time
+
+from app.config import settings
+from app.models.models import Job, User
+from app.redis import get_sync_redis
+from app.services.page_cache import PageCache, PageCacheStats
+from app.services.scraper import CachingFetcherPool, HttpxFetcherPool, ScrapeEngine
+from app.tasks import scrape_task
+from app.tasks.celery_app import celery_app
+from tests.fixture_site import FixtureSite
+from tests.support import client, TestingSessionLocal
+
+
+def _objects(tmp_path):
+    return [path for path in (tmp_path / "objects").rglob("*") if path.is_file()]
+
+
+def test_cache_keys_ttls_and_content_addressing(tmp_path):
+    cache = PageCache(str(tmp_path), max_bytes=10**6, ttl=3600, domain_ttls={"news.test": 0})
+
+    cache.store("https://www.site.test/a?utm_source=mail&b=1#top", "<html>A</html>", etag='"a"')
+    page = cache.lookup("https://site.test/a?b=1")
+    assert (page.body, page.etag, page.fresh) == ("<html>A</html>", '"a"', True)
+    assert cache.lookup("https://site.test/other") is None
+
+    # The same body under another URL is stored once
+    cache.store("https://site.test/copy", "<html>A</html>")
+    assert len(_objects(tmp_path)) == 1
+
+    cache.store("http://live.news.test/front", "<html>News</html>")
+    assert cache.ttl_for("http://live.news.test/front") == 0
+    assert cache.lookup("http://live.news.test/front").fresh is False
+    cache.refresh("http://live.news.test/front", etag='"n"')
+    assert cache.lookup("http://live.news.test/front").etag == '"n"'
+
+
+def test_cache_evicts_least_recently_used(tmp_path):
+    cache = PageCache(str(tmp_path), max_bytes=10**6, ttl=3600)
+    bodies = {name: secrets.token_hex(2000) for name in "abcd"}
+    cache.store("https://site.test/a", bodies["a"])
+    cache.max_bytes = int(cache.size() * 3.5)
+
+    for name in "bc":
+        time.sleep(0.01)
+        cache.store(f"https://site.test/{name}", bodies[name])
+    time.sleep(0.01)
+    cache.lookup("https://site.test/a")
+    time.sleep(0.01)
+    cache.store("https://site.test/d", bodies["d"])
+
+    assert cache.lookup("https://site.test/b") is None
+    assert [cache.lookup(f"https://site.test/{name}").body for name in "acd"] == [bodies[name] for name in "acd"]
+    assert len(_objects(tmp_path)) == 3
+    assert cache.size() <= cache.max_bytes
+
+
+async def _crawl(site, cache, stats):
+    async with CachingFetcherPool(HttpxFetcherPool(size=1), cache, stats=stats) as pool:
+        return await ScrapeEngine(pool=pool, lead_count=30, concurrency=1).run([site.url("/search?q=python")])
+
+
+async def test_caching_pool_serves_and_revalidates(tmp_path):
+    cache = PageCache(str(tmp_path), max_bytes=10**7, ttl=3600)
+    with FixtureSite(pages_per_query=5, leads_per_page=10) as site:
+        first = PageCacheStats()
+        leads = await _crawl(site, cache, first)
+        assert (first.hits, first.misses, site.requests) == (0, 3, 3)
+
+        second = PageCacheStats()
+        assert await _crawl(site, cache, second) == leads
+        assert (second.hits, second.hit_rate, site.requests) == (3, 1.0, 3)
+
+        # Expired entries are revalidated instead of downloaded again
+        cache.ttl = 0
+        third = PageCacheStats()
+        assert await _crawl(site, cache, third) == leads
+        assert (third.revalidated, third.misses, site.not_modified) == (3, 0, 3)
+
+
+def test_hit_rates_are_reported_per_job(setup_database, monkeypatch, tmp_path):
+    monkeypatch.setattr(celery_app.conf, "task_always_eager", True)
+    monkeypatch.setattr(scrape_task, "SessionLocal", TestingSessionLocal)
+    monkeypatch.setattr(settings, "SCRAPER_FETCHER", "httpx")
+    monkeypatch.setattr(settings, "SCRAPER_CONCURRENCY", 1)
+    monkeypatch.setattr(settings, "SCRAPER_DOMAIN_RATE", 1000.0)
+    monkeypatch.setattr(settings, "SCRAPER_CACHE_DIR", str(tmp_path))
+
+    db = TestingSessionLocal()
+    try:
+        job_ids = []
+        for email in ("cache-1@example.com", "cache-2@example.com"):
+            user = User(email=email, hashed_password="x")
+            db.add(user)
+            db.commit()
+            job = Job(user_id=user.id, intent="sales", lead_count=20, status="pending")
+            db.add(job)
+            db.commit()
+            get_sync_redis().delete(f"dedup:bloom:{user.id}")
+            job_ids.append(job.id)
+    finally:
+        db.close()
+
+    with FixtureSite(pages_per_query=5, leads_per_page=10) as site:
+        monkeypatch.setattr(settings, "SCRAPER_SEARCH_URL_TEMPLATE", site.url("/search?q={query}"))
+        for job_id in job_ids:
+            scrape_task.scrape_leads_task.apply(args=(job_id, {"keywords": ["python"]}, 20))
+    assert site.requests == 2
+
+    first, second = (client.get(f"/api/leads/jobs/{job_id}/stats").json() for job_id in job_ids)
+    assert (first["pages_downloaded"], first["page_cache_hit_rate"]) == (2, 0.0)
+    assert (second["pages_cached"], second["pages_downloaded"], second["page_cache_hit_rate"]) == (2, 0, 1.0)
+    assert second["lead_count"] == 20
@@ -0,0 +1,76 @@
+import logging
+import re
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import select
+
+from app import profiling
+from app.config import settings
+from app.models.models import JobLead
+from app.routes import debug
+from app.tasks.celery_app import celery_app
+from main import app
+from tests.support import TestingSessionLocal
+
+client = TestClient(app)
+
+debug_app = FastAPI()
+debug_app.include_router(debug.router, prefix="/api/debug")
+debug_client = TestClient(debug_app)
+
+
+@celery_app.task(name="tests.profiling.count_leads")
+def count_leads(job_id):
+    db = TestingSessionLocal()
+    try:
+        return len(db.execute(select(JobLead).where(JobLead.job_id == job_id)).scalars().all())
+    finally:
+        db.close()
+
+
+def test_server_timing_header(setup_database):
+    response = client.get(f"/api/leads/jobs/{setup_database['job_id']}")
+    assert response.status_code == 200
+    assert re.fullmatch(r'db;dur=\d+\.\d\d;desc="1 queries"', response.headers["server-timing"])
+
+
+def test_repeated_statement_shape_is_flagged(setup_database, caplog):
+    profiling.reset()
+    db = TestingSessionLocal()
+    stats, token = profiling.start("GET /n-plus-one")
+    try:
+        # One lookup per id instead of a single IN query
+        for lead_id in range(settings.SQL_N_PLUS_ONE_THRESHOLD):
+            db.get(JobLead, lead_id + 1)
+            db.expunge_all()
+    finally:
+        with caplog.at_level(logging.WARNING, logger="app.profiling"):
+            profiling.finish(stats, token)
+        db.close()
+
+    assert stats.count == settings.SQL_N_PLUS_ONE_THRESHOLD
+    assert "Possible N+1 in GET /n-plus-one" in caplog.text
+    [finding] = profiling.n_plus_one_findings()
+    assert finding["executions"] == settings.SQL_N_PLUS_ONE_THRESHOLD
+    assert finding["statement"].startswith("SELECT job_leads.id")
+    assert profiling.current_stats() is None
+
+
+def test_debug_endpoint_lists_slowest_statements(setup_database):
+    profiling.reset()
+    client.get(f"/api/leads/jobs/{setup_database['job_id']}/results")
+
+    body = debug_client.get("/api/debug/sql").json()
+    durations = [entry["duration_ms"] for entry in body["slowest"]]
+    assert durations and durations == sorted(durations, reverse=True)
+    assert any(entry["context"] == f"GET /api/leads/jobs/{setup_database['job_id']}/results" for entry in body["slowest"])
+
+    assert debug_client.delete("/api/debug/sql").status_code == 204
+    assert debug_client.get("/api/debug/sql").json() == {"slowest": [], "n_plus_one": []}
+
+
+def test_celery_task_sql_stats_are_logged(setup_database, caplog):
+    with caplog.at_level(logging.INFO, logger="app.profiling"):
+        assert count_leads.apply(args=(setup_database["job_id"],)).get() >= 1
+    assert re.search(r"Task tests.profiling.count_leads\[.+\] ran 1 queries in \d+\.\dms", caplog.text)
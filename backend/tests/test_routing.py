@@ -0,0 +1,109 @@
+from types import SimpleNamespace
+
+import pytest
+from celery import signals
+
+from app.models.models import Job, User
+from app.redis import get_sync_redis
+from app.tasks import generate_leads
+from app.tasks.celery_app import celery_app
+from app.tasks.generate_leads import generate_leads_task
+from app.tasks.routing import QueueDepthCollector, broker_queue_keys, enqueue_job
+from app.tasks.workers import worker_argv
+from tests.support import TestingSessionLocal
+
+
+def route(name, headers):
+    options = celery_app.amqp.router.route({"headers": headers}, name, (1,), {})
+    return options["queue"].name, options.get("priority")
+
+
+@pytest.mark.parametrize("lead_count,intent,queue,priority", [
+    (50, "career", "jobs.small", 0),
+    (100, "growth", "jobs.small", 6),
+    (101, "sales", "jobs.medium", 3),
+    (1000, "growth", "jobs.large", 6),
+])
+def test_job_tasks_routed_by_size_and_intent(lead_count, intent, queue, priority):
+    assert route("app.tasks.generate_leads", {"lead_count": lead_count, "intent": intent}) == (queue, priority)
+    assert route("scrape_leads_task", {"lead_count": lead_count, "intent": intent}) == (queue, priority)
+
+
+def test_unrouted_tasks_use_default_queue():
+    assert route("app.tasks.generate_leads", {})[0] == "celery"
+    assert route("some.other.task", {"lead_count": 10})[0] == "celery"
+
+
+def test_enqueue_job_publishes_to_tier_queue():
+    published = []
+
+    def capture(sender=None, routing_key=None, headers=None, properties=None, **kwargs):
+        published.append((routing_key, headers, properties))
+
+    signals.before_task_publish.connect(capture, weak=False)
+    try:
+        enqueue_job(generate_leads_task, SimpleNamespace(id=42, lead_count=800, intent="career"))
+    finally:
+        signals.before_task_publish.disconnect(capture)
+
+    [(routing_key, headers, properties)] = published
+    assert routing_key == "jobs.large"
+    assert headers["lead_count"] == 800
+    assert headers["argsrepr"] == "(42,)"
+    assert properties["priority"] == 0
+
+
+def test_generate_leads_hands_pending_jobs_to_the_scrape_task(setup_database, monkeypatch):
+    monkeypatch.setattr(generate_leads, "SessionLocal", TestingSessionLocal)
+    published = []
+
+    def capture(sender=None, body=None, **kwargs):
+        published.append((sender, list(body[0])))
+
+    db = TestingSessionLocal()
+    try:
+        user = User(email="handover@example.com", hashed_password="x")
+        db.add(user)
+        db.commit()
+        params = {"job_titles": ["CTO"]}
+        queued = Job(user_id=user.id, intent="sales", lead_count=10, status="pending", search_params=params)
+        running = Job(user_id=user.id, intent="sales", lead_count=10, status="processing", search_params=params)
+        legacy = Job(user_id=user.id, intent="sales", lead_count=10, status="pending")
+        db.add_all([queued, running, legacy])
+        db.commit()
+
+        signals.before_task_publish.connect(capture, weak=False)
+        try:
+            for job in (queued, running, legacy):
+                generate_leads_task.apply(args=(job.id,))
+        finally:
+            signals.before_task_publish.disconnect(capture)
+
+        # Only the pending job with search parameters is scraped
+        assert published == [("scrape_leads_task", [queued.id, params, 10])]
+        db.refresh(legacy)
+        assert legacy.status == "failed"
+        assert legacy.error_message == "Job has no search parameters to scrape with."
+    finally:
+        db.close()
+
+
+def test_queue_depth_collector():
+    client = get_sync_redis()
+    keys = broker_queue_keys("test.jobs")
+    client.delete(*keys)
+    try:
+        client.rpush(keys[0], "a", "b")
+        client.rpush(keys[2], "c")
+        [family] = QueueDepthCollector(["test.jobs"], client=client).collect()
+        depths = {sample.labels["priority"]: sample.value for sample in family.samples}
+        assert depths == {"0": 2, "3": 0, "6": 1, "9": 0}
+    finally:
+        client.delete(*keys)
+
+
+def test_worker_argv():
+    argv = worker_argv("small", ["--loglevel=info"])
+    assert argv[argv.index("-Q") + 1] == "jobs.small"
+    assert argv[argv.index("-c") + 1] == "8"
+    assert argv[-1] == "--loglevel=info"
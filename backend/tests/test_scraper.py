@@ -0,0 +1,97 @@
+import time
+
+import pytest
+
+from app.services.scraper import (
+    DomainRateLimiter,
+    HttpxFetcherPool,
+    PlaywrightFetcherPool,
+    ScrapeEngine,
+    TokenBucket,
+    build_query_plan,
+    extract_leads,
+)
+from tests.fixture_site import FixtureSite
+
+
+def test_build_query_plan():
+    plan = build_query_plan({
+        "job_titles": ["CTO", "VP Engineering"],
+        "keywords": ["fintech"],
+        "location": "Berlin",
+    })
+    assert plan == ["CTO fintech Berlin", "VP Engineering fintech Berlin"]
+    assert build_query_plan({}) == []
+
+
+def test_extract_leads_markup():
+    html = (
+        '<div data-lead data-name="Ada" data-email="ada@example.com" data-company="Acme"></div>'
+        '<div data-lead data-name="Bob" data-source-url="/people/bob"></div>'
+        '<a rel="next" href="/search?q=x&page=2">Next</a>'
+    )
+    leads, links = extract_leads(html, "http://site.test/search?q=x")
+    assert leads == [
+        # No profile link: the listing page is not the lead's URL
+        {"name": "Ada", "email": "ada@example.com", "company": "Acme"},
+        {"name": "Bob", "source_url": "http://site.test/people/bob"},
+    ]
+    assert links == ["http://site.test/search?q=x&page=2"]
+
+
+async def test_token_bucket_throttles():
+    bucket = TokenBucket(rate=20, capacity=1)
+    started = time.monotonic()
+    for _ in range(5):
+        await bucket.acquire()
+    # First token is free, the next four each wait 1/20 s
+    assert time.monotonic() - started >= 0.19
+
+
+async def test_engine_stops_at_lead_count():
+    with FixtureSite(pages_per_query=10, leads_per_page=10) as site:
+        async with HttpxFetcherPool(size=2) as pool:
+            engine = ScrapeEngine(pool=pool, lead_count=25, concurrency=1)
+            leads = await engine.run([site.url("/search?q=python")])
+
+    assert len(leads) == 25
+    # One worker walking the pagination: 3 pages cover 25 leads, the rest are never fetched
+    assert engine.stats.pages == 3
+
+
+async def test_engine_concurrent_pages_across_queries():
+    with FixtureSite(pages_per_query=3, leads_per_page=5, latency=0.05) as site:
+        seeds = [site.url(f"/search?q=query{i}") for i in range(4)]
+        async with HttpxFetcherPool(size=2) as pool:
+            engine = ScrapeEngine(
+                pool=pool,
+                lead_count=1000,
+                concurrency=4,
+                rate_limiter=DomainRateLimiter(rate=1000, burst=1000),
+            )
+            started = time.monotonic()
+            leads = await engine.run(seeds)
+            elapsed = time.monotonic() - started
+
+    # Everything reachable was visited exactly once
+    assert engine.stats.pages == 12
+    assert len(leads) == 60
+    assert len({lead["email"] for lead in leads}) == 60
+    # 12 pages at 50 ms each would take >= 0.6 s serially
+    assert elapsed < 0.5
+
+
+async def test_playwright_pool_against_fixture_site():
+    try:
+        pool = await PlaywrightFetcherPool(size=2).__aenter__()
+    except Exception as e:
+        pytest.skip(f"Playwright browser not available: {e}")
+
+    try:
+        with FixtureSite(pages_per_query=2, leads_per_page=3) as site:
+            engine = ScrapeEngine(pool=pool, lead_count=6, concurrency=2)
+            leads = await engine.run([site.url("/search?q=browser")])
+    finally:
+        await pool.__aexit__(None, None, None)
+
+    assert len(leads) == 6
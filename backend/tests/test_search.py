@@ -0,0 +1,59 @@
+from app.auth.security import create_access_token
+from app.models.models import Job, User
+from app.services.ingestion import LeadIngestor
+from app.services.search import fts5_query
+from tests.support import client, TestingSessionLocal
+
+
+def _user_with_leads(email, leads):
+    db = TestingSessionLocal()
+    try:
+        user = User(email=email, hashed_password="x")
+        db.add(user)
+        db.commit()
+        job = Job(user_id=user.id, intent="sales", lead_count=len(leads), status="completed")
+        db.add(job)
+        db.commit()
+        with LeadIngestor(db, job) as ingestor:
+            ingestor.extend({"name": name, "company": company, "title": title} for name, company, title in leads)
+        return {"Authorization": f"Bearer {create_access_token(user.id)}"}
+    finally:
+        db.close()
+
+
+def test_fts5_query_quotes_words():
+    assert fts5_query('CTO "fintech" OR -x') == '"CTO" "fintech" "OR" "x"'
+    assert fts5_query("  -- ") is None
+
+
+def test_search_ranks_and_pages(setup_database, local_principal_cache):
+    headers = _user_with_leads("searcher@example.com", [
+        ("Ada Lovelace", "Ledger Fintech", "CTO"),
+        ("Bob Byte", "Fintech Labs", "Chief Technology Officer"),
+        ("Cy Cto", "Fintech Bank", "Sales Lead"),
+        ("Di Data", "Retail Co", "CTO"),
+        ("Ed Early", "Coin Fintech", "CTO Office"),
+    ])
+    # Another user's matching lead is never returned
+    _user_with_leads("other@example.com", [("Zed", "Fintech Corp", "CTO")])
+
+    first = client.get("/api/leads/search", params={"q": "cto fintechs", "limit": 2}, headers=headers)
+    assert first.status_code == 200
+    page = first.json()
+    # A title match outranks a name match; "fintechs" matches "Fintech" (stemmed)
+    assert [hit["name"] for hit in page["items"]] == ["Ada Lovelace", "Ed Early"]
+    assert page["items"][0]["score"] <= page["items"][1]["score"]
+
+    rest = client.get(
+        "/api/leads/search", params={"q": "cto fintechs", "limit": 2, "cursor": page["next_cursor"]}, headers=headers
+    ).json()
+    assert [hit["name"] for hit in rest["items"]] == ["Cy Cto"]
+    assert rest["next_cursor"] is None
+
+
+def test_search_requires_auth_and_valid_cursor(setup_database, local_principal_cache):
+    assert client.get("/api/leads/search", params={"q": "cto"}).status_code == 401
+    headers = _user_with_leads("cursor@example.com", [])
+    response = client.get("/api/leads/search", params={"q": "cto", "cursor": "???"}, headers=headers)
+    assert response.status_code == 400
+    assert client.get("/api/leads/search", params={"q": "!!"}, headers=headers).json()["items"] == []
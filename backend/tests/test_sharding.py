@@ -0,0 +1,78 @@
+from sqlalchemy import func, select
+
+from app.config import settings
+from app.models.models import Job, JobLead, User
+from app.redis import get_sync_redis
+from app.services.cancellation import cancel_key
+from app.services.sharding import ShardProgress, plan_shards, shard_progress_key
+from app.tasks import scrape_task
+from app.tasks.celery_app import celery_app
+from tests.fixture_site import FixtureSite
+from tests.support import TestingSessionLocal
+
+
+def test_plan_shards():
+    queries = [f"q{i}" for i in range(10)]
+    assert len(plan_shards(queries, settings.SCRAPE_SHARD_MIN_LEADS - 1)) == 1
+
+    shards = plan_shards(queries, 1000)
+    assert len(shards) == settings.SCRAPE_MAX_SHARDS
+    assert sum(shard.lead_quota for shard in shards) == 1000
+    assert sorted(q for shard in shards for q in shard.queries) == sorted(queries)
+    # Capped by the number of queries
+    assert len(plan_shards(queries[:3], 1000)) == 3
+
+
+def test_shard_progress_aggregates():
+    client = get_sync_redis()
+    progress = ShardProgress(client, job_id=424242, lead_count=100)
+    progress.clear()
+    try:
+        assert progress.report(0, 10) == 9
+        assert progress.report(1, 40) == 45
+        assert progress.report(1, 40) is None
+        assert progress.report(0, 200) == 90
+    finally:
+        progress.clear()
+
+
+def test_large_job_fans_out_and_merges(setup_database, monkeypatch):
+    monkeypatch.setattr(celery_app.conf, "task_always_eager", True)
+    monkeypatch.setattr(scrape_task, "SessionLocal", TestingSessionLocal)
+    monkeypatch.setattr(settings, "SCRAPER_FETCHER", "httpx")
+    monkeypatch.setattr(settings, "SCRAPER_DOMAIN_RATE", 1000.0)
+    monkeypatch.setattr(settings, "SCRAPE_SHARD_MIN_LEADS", 20)
+    monkeypatch.setattr(settings, "SCRAPE_LEADS_PER_SHARD", 10)
+
+    shard_calls = []
+    original_shard = scrape_task.scrape_shard_task.run
+    monkeypatch.setattr(
+        scrape_task.scrape_shard_task, "run",
+        lambda *args: shard_calls.append(args[1]) or original_shard(*args),
+    )
+
+    db = TestingSessionLocal()
+    try:
+        user = User(email="shards@example.com", hashed_password="x")
+        db.add(user)
+        db.commit()
+        job = Job(user_id=user.id, intent="growth", lead_count=40, status="pending")
+        db.add(job)
+        db.commit()
+        get_sync_redis().delete(shard_progress_key(job.id), cancel_key(job.id))
+
+        search_params = {"job_titles": ["CTO", "CFO", "COO", "CMO"], "keywords": ["fintech"]}
+        with FixtureSite(pages_per_query=5, leads_per_page=5) as site:
+            monkeypatch.setattr(settings, "SCRAPER_SEARCH_URL_TEMPLATE", site.url("/search?q={query}"))
+            scrape_task.scrape_leads_task.apply(args=(job.id, search_params, 40))
+
+        db.refresh(job)
+        assert sorted(shard_calls) == [0, 1, 2, 3]
+        assert job.status == "completed"
+        assert job.progress == 100
+        assert job.error_message is None
+        count = db.execute(select(func.count()).select_from(JobLead).where(JobLead.job_id == job.id)).scalar_one()
+        assert count == 40
+        assert not get_sync_redis().exists(shard_progress_key(job.id))
+    finally:
+        db.close()
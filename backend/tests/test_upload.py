@@ -0,0 +1,89 @@
+import pytest
+
+from app.config import settings
+from app import uploads
+from app.services import ai_engine
+from app.services.cache import TwoTierCache
+from tests.support import SEARCH_PARAMS, client
+
+
+def _pdf(text: str) -> bytes:
+    """A minimal one-page PDF showing `text`."""
+    stream = f"BT /F1 12 Tf 72 720 Td ({text}) Tj ET".encode()
+    objects = [
+        b"<< /Type /Catalog /Pages 2 0 R >>",
+        b"<< /Type /Pages /Kids [3 0 R] /Count 1 >>",
+        b"<< /Type /Page /Parent 2 0 R /MediaBox [0 0 612 792] /Contents 4 0 R "
+        b"/Resources << /Font << /F1 5 0 R >> >> >>",
+        b"<< /Length %d >>\nstream\n" % len(stream) + stream + b"\nendstream",
+        b"<< /Type /Font /Subtype /Type1 /BaseFont /Helvetica >>",
+    ]
+    body = b"%PDF-1.4\n"
+    offsets = []
+    for number, obj in enumerate(objects, start=1):
+        offsets.append(len(body))
+        body += b"%d 0 obj\n" % number + obj + b"\nendobj\n"
+    xref = len(body)
+    body += b"xref\n0 %d\n0000000000 65535 f \n" % (len(objects) + 1)
+    body += b"".join(b"%010d 00000 n \n" % offset for offset in offsets)
+    body += b"trailer\n<< /Size %d /Root 1 0 R >>\nstartxref\n%d\n%%%%EOF\n" % (len(objects) + 1, xref)
+    return body
+
+
+@pytest.fixture
+def local_caches(monkeypatch, stub_client):
+    monkeypatch.setattr(uploads, "text_cache", TwoTierCache("test:upload", maxsize=8, ttl=60, redis_factory=None))
+    monkeypatch.setattr(ai_engine, "resume_cache", TwoTierCache("test:ai", maxsize=8, ttl=60, redis_factory=None))
+    return stub_client
+
+
+def test_upload_txt_extracts_once_per_content(local_caches):
+    files = {"file": ("resume.txt", b"Senior Python engineer, Berlin", "text/plain")}
+    first = client.post("/api/upload/resume", files=files)
+    assert first.status_code == 200
+    data = first.json()
+    assert data["size_bytes"] == 30
+    assert data["text_cached"] is False
+    assert data["search_params"] == SEARCH_PARAMS
+
+    # Same bytes under another name: no extraction, no second AI call
+    again = client.post("/api/upload/resume", files={"file": ("copy.txt", b"Senior Python engineer, Berlin", "text/plain")})
+    assert again.json()["text_cached"] is True
+    assert again.json()["content_sha256"] == data["content_sha256"]
+    assert local_caches.calls == 1
+
+
+def test_upload_pdf_text_is_extracted(local_caches):
+    files = {"file": ("resume.pdf", _pdf("Staff Data Engineer"), "application/pdf")}
+    response = client.post("/api/upload/resume", files=files)
+    assert response.status_code == 200
+    key = f"application/pdf:{response.json()['content_sha256']}"
+    assert "Staff Data Engineer" in uploads.text_cache._get_local(key)
+
+
+def test_upload_rejects_unreadable_pdf(local_caches):
+    response = client.post("/api/upload/resume", files={"file": ("resume.pdf", b"not a pdf", "application/pdf")})
+    assert response.status_code == 422
+
+
+def test_upload_over_limit_is_rejected(local_caches, monkeypatch):
+    monkeypatch.setattr(settings, "UPLOAD_MAX_BYTES", 1024)
+    files = {"file": ("resume.txt", b"x" * 4096, "text/plain")}
+    assert client.post("/api/upload/resume", files=files).status_code == 413
+
+    # Without Content-Length the body is counted as it streams in
+    def chunks():
+        yield (
+            b'--xyz\r\nContent-Disposition: form-data; name="file"; filename="resume.txt"\r\n'
+            b"Content-Type: text/plain\r\n\r\n"
+        )
+        for _ in range(8):
+            yield b"x" * 512
+
+    response = client.post(
+        "/api/upload/resume",
+        content=chunks(),
+        headers={"Content-Type": "multipart/form-data; boundary=xyz"},
+    )
+    assert response.status_code == 413
+    assert local_caches.calls == 0
@@ -16,7 +16,7 @@ export default function UploadPage() {
         if (!file) return;
 
         setUploading(true);
-        // TODO: call uploadResume(file) then generateLeads(intent)
+        // TODO: call uploadResume(file) then generateLeads(intent, search_params)
         setTimeout(() => setUploading(false), 1500); // placeholder
     };
 
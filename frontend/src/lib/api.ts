@@ -2,6 +2,8 @@
  * API service layer — Axios-based client for backend communication.
  */
 
+import type { Job, LeadPage, SearchParams } from "@/types";
+
 const API_BASE_URL = process.env.NEXT_PUBLIC_API_URL || "http://localhost:8000/api";
 
 // ---------------------------------------------------------------------------
@@ -56,10 +58,10 @@ export async function login(email: string, password: string) {
 // ---------------------------------------------------------------------------
 // Leads
 // ---------------------------------------------------------------------------
-export async function generateLeads(intent: string, leadCount: number = 100) {
+export async function generateLeads(intent: string, searchParams: SearchParams, leadCount: number = 100) {
     return apiFetch("/leads/generate", {
         method: "POST",
-        body: JSON.stringify({ intent, lead_count: leadCount }),
+        body: JSON.stringify({ intent, lead_count: leadCount, search_params: searchParams }),
     });
 }
 
@@ -67,8 +69,25 @@ export async function getJobStatus(jobId: number) {
     return apiFetch(`/leads/jobs/${jobId}`);
 }
 
-export async function getJobResults(jobId: number) {
-    return apiFetch(`/leads/jobs/${jobId}/results`);
+/**
+ * Subscribe to a job's status/progress over Server-Sent Events instead of polling.
+ * Returns the EventSource so callers can close() it on unmount.
+ */
+export function subscribeJobEvents(jobId: number, onUpdate: (job: Job) => void) {
+    const source = new EventSource(`${API_BASE_URL}/leads/jobs/${jobId}/events`);
+    source.addEventListener("job", (event) => {
+        const job = JSON.parse((event as MessageEvent).data) as Job;
+        onUpdate(job);
+        if (["completed", "failed", "cancelled"].includes(job.status)) {
+            source.close();
+        }
+    });
+    return source;
+}
+
+export async function getJobResults(jobId: number, cursor?: number | string | null) {
+    const query = cursor != null ? `?cursor=${encodeURIComponent(cursor)}` : "";
+    return apiFetch<LeadPage>(`/leads/jobs/${jobId}/results${query}`);
 }
 
 // ---------------------------------------------------------------------------
@@ -9,11 +9,22 @@ export interface User {
     created_at: string;
 }
 
+// What a job searches for, as returned by /upload/resume
+export interface SearchParams {
+    keywords: string[];
+    job_titles: string[];
+    industries: string[];
+    location?: string;
+    experience_level?: string;
+}
+
 export interface Job {
     id: number;
     intent: "career" | "growth";
     lead_count: number;
-    status: "pending" | "processing" | "completed" | "failed";
+    search_params?: SearchParams;
+    status: "pending" | "processing" | "completed" | "failed" | "cancelled";
+    progress: number;
     result_url?: string;
     created_at: string;
 }
@@ -27,3 +38,9 @@ export interface Lead {
     source_url?: string;
     confidence: number;
 }
+
+export interface LeadPage {
+    items: Lead[];
+    // A lead id when ordered by id, an opaque token for other orderings
+    next_cursor: number | string | null;
+}